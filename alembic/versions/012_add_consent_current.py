@@ -0,0 +1,53 @@
+"""add consent_current table
+
+Revision ID: 012
+Revises: 06cc4d717681
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = '012'
+down_revision = '06cc4d717681'
+branch_labels = None
+depends_on = None
+
+purpose_enum = postgresql.ENUM(name='purpose_enum', create_type=False)
+status_enum = postgresql.ENUM(name='status_enum', create_type=False)
+
+
+def upgrade() -> None:
+    op.create_table(
+        'consent_current',
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('purpose', purpose_enum, nullable=False),
+        sa.Column('status', status_enum, nullable=False),
+        sa.Column('expires_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('consent_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('version', sa.Integer(), nullable=False, server_default='1'),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_id', 'purpose'),
+    )
+    op.create_index(op.f('ix_consent_current_consent_id'), 'consent_current', ['consent_id'], unique=False)
+    op.create_index(op.f('ix_consent_current_updated_at'), 'consent_current', ['updated_at'], unique=False)
+
+    # Backfill from the newest history row per (user_id, purpose); version counts the rows seen so far.
+    op.execute("""
+        INSERT INTO consent_current (user_id, purpose, status, expires_at, consent_id, version, updated_at)
+        SELECT DISTINCT ON (h.user_id, h.purpose)
+            h.user_id, h.purpose, h.status, h.expires_at, h.id,
+            COUNT(*) OVER (PARTITION BY h.user_id, h.purpose),
+            h.timestamp
+        FROM consent_history h
+        ORDER BY h.user_id, h.purpose, h.timestamp DESC, h.id DESC
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_consent_current_updated_at'), table_name='consent_current')
+    op.drop_index(op.f('ix_consent_current_consent_id'), table_name='consent_current')
+    op.drop_table('consent_current')
@@ -0,0 +1,39 @@
+"""add decision_rollups table
+
+Revision ID: 013
+Revises: 012
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = '013'
+down_revision = '012'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'decision_rollups',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True, server_default=sa.text('gen_random_uuid()')),
+        sa.Column('bucket_start', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('tenant_id', sa.String(length=255), nullable=False, server_default=''),
+        sa.Column('region', sa.String(length=10), nullable=False),
+        sa.Column('purpose', sa.String(length=50), nullable=False),
+        sa.Column('allowed', sa.Boolean(), nullable=False),
+        sa.Column('reason', sa.String(length=64), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False, server_default='0'),
+        sa.UniqueConstraint('bucket_start', 'tenant_id', 'region', 'purpose', 'allowed', 'reason', name='uq_decision_rollup_key'),
+    )
+    op.create_index(op.f('ix_decision_rollups_bucket_start'), 'decision_rollups', ['bucket_start'], unique=False)
+    op.create_index('idx_decision_rollup_purpose_region', 'decision_rollups', ['purpose', 'region', 'bucket_start'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_decision_rollup_purpose_region', table_name='decision_rollups')
+    op.drop_index(op.f('ix_decision_rollups_bucket_start'), table_name='decision_rollups')
+    op.drop_table('decision_rollups')
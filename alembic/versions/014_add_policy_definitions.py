@@ -0,0 +1,39 @@
+"""add policy_definitions table
+
+Revision ID: 014
+Revises: 013
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = '014'
+down_revision = '013'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'policy_definitions',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True, server_default=sa.text('gen_random_uuid()')),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.Column('definition', postgresql.JSONB(), nullable=False),
+        sa.Column('is_active', sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column('created_by', sa.String(length=255), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('published_at', sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index(op.f('ix_policy_definitions_version'), 'policy_definitions', ['version'], unique=True)
+    op.create_index(op.f('ix_policy_definitions_is_active'), 'policy_definitions', ['is_active'], unique=False)
+    op.create_index(op.f('ix_policy_definitions_published_at'), 'policy_definitions', ['published_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_policy_definitions_published_at'), table_name='policy_definitions')
+    op.drop_index(op.f('ix_policy_definitions_is_active'), table_name='policy_definitions')
+    op.drop_index(op.f('ix_policy_definitions_version'), table_name='policy_definitions')
+    op.drop_table('policy_definitions')
@@ -0,0 +1,69 @@
+"""intern policy snapshots into policy_snapshots
+
+Revision ID: 015
+Revises: 014
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+import hashlib
+import json
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = '015'
+down_revision = '014'
+branch_labels = None
+depends_on = None
+
+_TABLES = ('consent_history', 'audit_logs')
+
+
+def _hash(snapshot) -> str:
+    return hashlib.sha256(json.dumps(snapshot, sort_keys=True, separators=(",", ":")).encode("utf-8")).hexdigest()
+
+
+def upgrade() -> None:
+    op.create_table(
+        'policy_snapshots',
+        sa.Column('content_hash', sa.String(length=64), primary_key=True),
+        sa.Column('snapshot', postgresql.JSONB(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    )
+    for table in _TABLES:
+        op.add_column(table, sa.Column('policy_snapshot_id', sa.String(length=64), nullable=True))
+
+    # Hashes are computed here, not in SQL, so they match the application's canonical JSON (jsonb::text differs).
+    # There are only a handful of distinct snapshots; each table is then backfilled by one set-based UPDATE.
+    bind = op.get_bind()
+    snapshots = {}
+    for table in _TABLES:
+        for snapshot in bind.execute(sa.text(f"SELECT DISTINCT policy_snapshot::jsonb AS snapshot FROM {table} WHERE policy_snapshot IS NOT NULL")).scalars():
+            snapshots.setdefault(_hash(snapshot), snapshot)
+    if snapshots:
+        bind.execute(sa.text("INSERT INTO policy_snapshots (content_hash, snapshot) VALUES (:hash, CAST(:snap AS jsonb)) ON CONFLICT (content_hash) DO NOTHING"), [{"hash": content_hash, "snap": json.dumps(snapshot)} for content_hash, snapshot in snapshots.items()])
+    op.execute("ALTER TABLE audit_logs DISABLE TRIGGER audit_logs_prevent_update")
+    for table in _TABLES:
+        op.execute(f"UPDATE {table} AS t SET policy_snapshot_id = s.content_hash FROM policy_snapshots AS s WHERE t.policy_snapshot IS NOT NULL AND t.policy_snapshot::jsonb = s.snapshot")
+    op.execute("ALTER TABLE audit_logs ENABLE TRIGGER audit_logs_prevent_update")
+
+    for table in _TABLES:
+        op.create_foreign_key(f'fk_{table}_policy_snapshot_id', table, 'policy_snapshots', ['policy_snapshot_id'], ['content_hash'])
+        op.create_index(op.f(f'ix_{table}_policy_snapshot_id'), table, ['policy_snapshot_id'], unique=False)
+        op.drop_column(table, 'policy_snapshot')
+
+
+def downgrade() -> None:
+    for table in _TABLES:
+        op.add_column(table, sa.Column('policy_snapshot', sa.JSON(), nullable=True))
+    op.execute("ALTER TABLE audit_logs DISABLE TRIGGER audit_logs_prevent_update")
+    for table in _TABLES:
+        op.execute(f"UPDATE {table} AS t SET policy_snapshot = s.snapshot::json FROM policy_snapshots AS s WHERE t.policy_snapshot_id = s.content_hash")
+    op.execute("ALTER TABLE audit_logs ENABLE TRIGGER audit_logs_prevent_update")
+    for table in _TABLES:
+        op.drop_index(op.f(f'ix_{table}_policy_snapshot_id'), table_name=table)
+        op.drop_constraint(f'fk_{table}_policy_snapshot_id', table, type_='foreignkey')
+        op.drop_column(table, 'policy_snapshot_id')
+    op.drop_table('policy_snapshots')
@@ -0,0 +1,26 @@
+"""extend idx_user_timestamp with id for keyset pagination
+
+Revision ID: 018
+Revises: 017
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+from alembic import op
+
+
+revision = '018'
+down_revision = '017'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # History pages are ordered by (timestamp, id); with id in the index the keyset predicate and ORDER BY are
+    # served by a single backward index range scan without a sort on timestamp ties.
+    op.drop_index('idx_user_timestamp', table_name='consent_history')
+    op.create_index('idx_user_timestamp', 'consent_history', ['user_id', 'timestamp', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_user_timestamp', table_name='consent_history')
+    op.create_index('idx_user_timestamp', 'consent_history', ['user_id', 'timestamp'], unique=False)
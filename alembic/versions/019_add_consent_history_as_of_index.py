@@ -0,0 +1,26 @@
+"""index consent_history for point-in-time lookups
+
+Revision ID: 019
+Revises: 018
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+from alembic import op
+
+
+revision = '019'
+down_revision = '018'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # "Latest row for (user, purpose) at or before T" is one backward probe on this index; it also covers every
+    # lookup idx_user_purpose served, so that index goes.
+    op.create_index('idx_user_purpose_timestamp', 'consent_history', ['user_id', 'purpose', 'timestamp', 'id'], unique=False)
+    op.drop_index('idx_user_purpose', table_name='consent_history')
+
+
+def downgrade() -> None:
+    op.create_index('idx_user_purpose', 'consent_history', ['user_id', 'purpose'], unique=False)
+    op.drop_index('idx_user_purpose_timestamp', table_name='consent_history')
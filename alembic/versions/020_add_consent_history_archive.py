@@ -0,0 +1,74 @@
+"""add consent_history_archive for compacted history
+
+Revision ID: 020
+Revises: 019
+Create Date: 2026-10-17 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = '020'
+down_revision = '019'
+branch_labels = None
+depends_on = None
+
+purpose_enum = postgresql.ENUM(name='purpose_enum', create_type=False)
+status_enum = postgresql.ENUM(name='status_enum', create_type=False)
+region_enum = postgresql.ENUM(name='region_enum', create_type=False)
+
+
+def upgrade() -> None:
+    # Rows only arrive here by compaction and are never updated, so pages are packed full (fillfactor 100) and
+    # the wide JSON columns are compressed with lz4 when the server supports it.
+    op.create_table(
+        'consent_history_archive',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('tenant_id', sa.String(length=255), nullable=True),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('purpose', purpose_enum, nullable=False),
+        sa.Column('status', status_enum, nullable=False),
+        sa.Column('region', region_enum, nullable=False),
+        sa.Column('granted_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('valid_from', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('valid_until', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('timestamp', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('expires_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('policy_snapshot_id', sa.String(length=64), nullable=True),
+        sa.Column('source', sa.String(length=50), nullable=True),
+        sa.Column('user_agent', sa.String(length=500), nullable=True),
+        sa.Column('ip_address', sa.String(length=45), nullable=True),
+        sa.Column('meta', postgresql.JSONB(), nullable=True),
+        sa.Column('archived_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['policy_snapshot_id'], ['policy_snapshots.content_hash']),
+        sa.PrimaryKeyConstraint('id'),
+        postgresql_with={'fillfactor': 100},
+    )
+    op.execute("""
+        DO $$
+        BEGIN
+            IF current_setting('server_version_num')::int >= 140000 THEN
+                ALTER TABLE consent_history_archive ALTER COLUMN meta SET COMPRESSION lz4;
+            END IF;
+        EXCEPTION WHEN feature_not_supported THEN
+            NULL;
+        END $$;
+    """)
+    op.create_index('idx_archive_user_purpose_timestamp', 'consent_history_archive', ['user_id', 'purpose', 'timestamp', 'id'], unique=False)
+    op.create_index('idx_archive_user_timestamp', 'consent_history_archive', ['user_id', 'timestamp', 'id'], unique=False)
+    op.create_index(op.f('ix_consent_history_archive_timestamp'), 'consent_history_archive', ['timestamp'], unique=False)
+
+
+def downgrade() -> None:
+    op.execute("""
+        INSERT INTO consent_history (id, tenant_id, user_id, purpose, status, region, granted_at, valid_from, valid_until, timestamp, expires_at, policy_snapshot_id, source, user_agent, ip_address, meta)
+        SELECT id, tenant_id, user_id, purpose, status, region, granted_at, valid_from, valid_until, timestamp, expires_at, policy_snapshot_id, source, user_agent, ip_address, meta
+        FROM consent_history_archive
+    """)
+    op.drop_index(op.f('ix_consent_history_archive_timestamp'), table_name='consent_history_archive')
+    op.drop_index('idx_archive_user_timestamp', table_name='consent_history_archive')
+    op.drop_index('idx_archive_user_purpose_timestamp', table_name='consent_history_archive')
+    op.drop_table('consent_history_archive')
@@ -0,0 +1,68 @@
+"""partition consent_history by month on timestamp
+
+Revision ID: 021
+Revises: 020
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '021'
+down_revision = '020'
+branch_labels = None
+depends_on = None
+
+MONTHS_AHEAD = 3
+
+
+def _secondary_index_definitions(bind):
+    # Definitions read from a partitioned parent say "ON ONLY", which would skip the partitions when replayed.
+    rows = bind.execute(sa.text("SELECT indexdef FROM pg_indexes WHERE schemaname = current_schema() AND tablename = 'consent_history' AND indexname <> 'consent_history_pkey'")).scalars().all()
+    return [definition.replace(" ON ONLY ", " ON ") for definition in rows]
+
+
+def upgrade() -> None:
+    # Retention then drops whole months (DETACH + DROP) instead of deleting row by row. The primary key has to include
+    # the partition key. Nothing references consent_history by foreign key (consent_current.consent_id is a plain
+    # column), so the swap needs no constraint juggling elsewhere. Rows outside the pre-created months land in the
+    # default partition; app/jobs/partitions.py keeps creating months ahead.
+    bind = op.get_bind()
+    index_definitions = _secondary_index_definitions(bind)
+    op.execute("ALTER TABLE consent_history RENAME TO consent_history_unpartitioned")
+    op.execute('CREATE TABLE consent_history (LIKE consent_history_unpartitioned INCLUDING DEFAULTS INCLUDING CONSTRAINTS) PARTITION BY RANGE ("timestamp")')
+    op.execute(f"""
+        DO $$
+        DECLARE
+            bucket timestamptz := date_trunc('month', coalesce((SELECT min("timestamp") FROM consent_history_unpartitioned), now()) AT TIME ZONE 'UTC') AT TIME ZONE 'UTC';
+            horizon timestamptz := (date_trunc('month', now() AT TIME ZONE 'UTC') + interval '{MONTHS_AHEAD + 1} months') AT TIME ZONE 'UTC';
+        BEGIN
+            WHILE bucket < horizon LOOP
+                EXECUTE format('CREATE TABLE %I PARTITION OF consent_history FOR VALUES FROM (%L) TO (%L)', 'consent_history_p' || to_char(bucket AT TIME ZONE 'UTC', 'YYYY_MM'), bucket, bucket + interval '1 month');
+                bucket := bucket + interval '1 month';
+            END LOOP;
+        END $$;
+    """)
+    op.execute("CREATE TABLE consent_history_default PARTITION OF consent_history DEFAULT")
+    op.execute("INSERT INTO consent_history SELECT * FROM consent_history_unpartitioned")
+    op.execute("DROP TABLE consent_history_unpartitioned")
+    op.execute('ALTER TABLE consent_history ADD CONSTRAINT consent_history_pkey PRIMARY KEY (id, "timestamp")')
+    op.create_foreign_key('consent_history_user_id_fkey', 'consent_history', 'users', ['user_id'], ['id'], ondelete='CASCADE')
+    op.create_foreign_key('consent_history_policy_snapshot_id_fkey', 'consent_history', 'policy_snapshots', ['policy_snapshot_id'], ['content_hash'])
+    for definition in index_definitions:
+        op.execute(definition)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    index_definitions = _secondary_index_definitions(bind)
+    op.execute("ALTER TABLE consent_history RENAME TO consent_history_partitioned")
+    op.execute("CREATE TABLE consent_history (LIKE consent_history_partitioned INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+    op.execute("INSERT INTO consent_history SELECT * FROM consent_history_partitioned")
+    op.execute("DROP TABLE consent_history_partitioned CASCADE")
+    op.execute("ALTER TABLE consent_history ADD CONSTRAINT consent_history_pkey PRIMARY KEY (id)")
+    op.create_foreign_key('consent_history_user_id_fkey', 'consent_history', 'users', ['user_id'], ['id'], ondelete='CASCADE')
+    op.create_foreign_key('consent_history_policy_snapshot_id_fkey', 'consent_history', 'policy_snapshots', ['policy_snapshot_id'], ['content_hash'])
+    for definition in index_definitions:
+        op.execute(definition)
@@ -0,0 +1,74 @@
+"""partition audit_logs by month on event_time
+
+Revision ID: 022
+Revises: 021
+Create Date: 2026-10-17 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '022'
+down_revision = '021'
+branch_labels = None
+depends_on = None
+
+MONTHS_AHEAD = 3
+
+
+def _secondary_index_definitions(bind):
+    # Definitions read from a partitioned parent say "ON ONLY", which would skip the partitions when replayed.
+    rows = bind.execute(sa.text("SELECT indexdef FROM pg_indexes WHERE schemaname = current_schema() AND tablename = 'audit_logs' AND indexname NOT IN ('audit_logs_pkey', 'ix_audit_logs_user_id')")).scalars().all()
+    return [definition.replace(" ON ONLY ", " ON ") for definition in rows]
+
+
+def _add_constraints_and_triggers(primary_key: str) -> None:
+    op.execute(f"ALTER TABLE audit_logs ADD CONSTRAINT audit_logs_pkey PRIMARY KEY ({primary_key})")
+    op.create_foreign_key('audit_logs_subject_id_fkey', 'audit_logs', 'users', ['subject_id'], ['id'], ondelete='CASCADE')
+    op.create_foreign_key('audit_logs_user_id_fkey', 'audit_logs', 'users', ['user_id'], ['id'], ondelete='CASCADE')
+    op.create_foreign_key('audit_logs_policy_snapshot_id_fkey', 'audit_logs', 'policy_snapshots', ['policy_snapshot_id'], ['content_hash'])
+    # Same row triggers as migration 006; on a partitioned parent they are cloned onto every partition (Postgres 13+).
+    op.execute("CREATE TRIGGER audit_logs_prevent_update BEFORE UPDATE ON audit_logs FOR EACH ROW EXECUTE FUNCTION prevent_audit_log_update()")
+    op.execute("CREATE TRIGGER audit_logs_prevent_delete BEFORE DELETE ON audit_logs FOR EACH ROW EXECUTE FUNCTION prevent_audit_log_delete()")
+
+
+def upgrade() -> None:
+    # Rows still cannot be updated or deleted; a whole month leaves the live table only by being exported to a verified
+    # archive file and detached (app/jobs/audit_archive.py). ix_audit_logs_user_id is not recreated: it is a prefix of
+    # idx_audit_user_created.
+    bind = op.get_bind()
+    index_definitions = _secondary_index_definitions(bind)
+    op.execute("ALTER TABLE audit_logs RENAME TO audit_logs_unpartitioned")
+    op.execute('CREATE TABLE audit_logs (LIKE audit_logs_unpartitioned INCLUDING DEFAULTS INCLUDING CONSTRAINTS) PARTITION BY RANGE (event_time)')
+    op.execute(f"""
+        DO $$
+        DECLARE
+            bucket timestamptz := date_trunc('month', coalesce((SELECT min(event_time) FROM audit_logs_unpartitioned), now()) AT TIME ZONE 'UTC') AT TIME ZONE 'UTC';
+            horizon timestamptz := (date_trunc('month', now() AT TIME ZONE 'UTC') + interval '{MONTHS_AHEAD + 1} months') AT TIME ZONE 'UTC';
+        BEGIN
+            WHILE bucket < horizon LOOP
+                EXECUTE format('CREATE TABLE %I PARTITION OF audit_logs FOR VALUES FROM (%L) TO (%L)', 'audit_logs_p' || to_char(bucket AT TIME ZONE 'UTC', 'YYYY_MM'), bucket, bucket + interval '1 month');
+                bucket := bucket + interval '1 month';
+            END LOOP;
+        END $$;
+    """)
+    op.execute("CREATE TABLE audit_logs_default PARTITION OF audit_logs DEFAULT")
+    op.execute("INSERT INTO audit_logs SELECT * FROM audit_logs_unpartitioned")
+    op.execute("DROP TABLE audit_logs_unpartitioned")
+    _add_constraints_and_triggers("id, event_time")
+    for definition in index_definitions:
+        op.execute(definition)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    index_definitions = _secondary_index_definitions(bind)
+    op.execute("ALTER TABLE audit_logs RENAME TO audit_logs_partitioned")
+    op.execute("CREATE TABLE audit_logs (LIKE audit_logs_partitioned INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+    op.execute("INSERT INTO audit_logs SELECT * FROM audit_logs_partitioned")
+    op.execute("DROP TABLE audit_logs_partitioned CASCADE")
+    _add_constraints_and_triggers("id")
+    op.create_index(op.f('ix_audit_logs_user_id'), 'audit_logs', ['user_id'], unique=False)
+    for definition in index_definitions:
+        op.execute(definition)
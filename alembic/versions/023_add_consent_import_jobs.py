@@ -0,0 +1,40 @@
+"""add consent_import_jobs for bulk consent imports
+
+Revision ID: 023
+Revises: 022
+Create Date: 2026-10-17 21:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = '023'
+down_revision = '022'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'consent_import_jobs',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('source_format', sa.String(length=10), nullable=False),
+        sa.Column('submitted_by', sa.String(length=255), nullable=True),
+        sa.Column('total_rows', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('imported_rows', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('rejected_rows', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('errors', postgresql.JSONB(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('idx_consent_import_job_status', 'consent_import_jobs', ['status', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_consent_import_job_status', table_name='consent_import_jobs')
+    op.drop_table('consent_import_jobs')
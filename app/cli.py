@@ -0,0 +1,71 @@
+"""Command-line entry points: python -m app.cli <command> --help"""
+import argparse
+import csv
+import json
+import sys
+from typing import List, Optional
+
+
+def _region_batch(args: argparse.Namespace) -> int:
+    from app.services.region_service import get_resolver, parse_ip_list, resolve_regions
+    if not get_resolver().available:
+        print("warning: no GeoIP database loaded; every IP resolves to ROW", file=sys.stderr)
+    source = open(args.input, "rb") if args.input != "-" else sys.stdin.buffer
+    try:
+        head = source.peek(1)[:1] if hasattr(source, "peek") else b""
+        ips = parse_ip_list(source.read()) if head == b"[" else (line.decode("utf-8") for line in source)
+        writer = csv.writer(sys.stdout) if args.format == "csv" else None
+        if writer:
+            writer.writerow(["ip", "region", "detected"])
+        for ip, region, detected in resolve_regions(ips):
+            if writer:
+                writer.writerow([ip, region.value, int(detected)])
+            else:
+                sys.stdout.write(json.dumps({"ip": ip, "region": region.value, "detected": detected}) + "\n")
+    finally:
+        if source is not sys.stdin.buffer:
+            source.close()
+    return 0
+
+
+def _import_consents(args: argparse.Namespace) -> int:
+    from app.db.database import SessionLocal
+    from app.models.imports import ImportJobStatusEnum
+    from app.services import consent_import_service
+    source_format = args.format or ("csv" if args.input.lower().endswith(".csv") else "ndjson")
+    session = SessionLocal()
+    source = open(args.input, "rb") if args.input != "-" else sys.stdin.buffer
+    try:
+        job = consent_import_service.create_import_job(session, source_format, submitted_by="cli")
+        report = lambda job: print(f"{job.total_rows} read, {job.imported_rows} imported, {job.rejected_rows} rejected", file=sys.stderr)
+        job = consent_import_service.run_import(session, job, source, batch_size=args.batch_size, progress=report)
+        print(json.dumps({"job_id": str(job.id), "status": job.status, "total_rows": job.total_rows, "imported_rows": job.imported_rows, "rejected_rows": job.rejected_rows, "errors": job.errors or []}))
+        return 0 if job.status == ImportJobStatusEnum.COMPLETED else 1
+    finally:
+        if source is not sys.stdin.buffer:
+            source.close()
+        session.close()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="Consent & Privacy Preferences Service tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+    region_batch = commands.add_parser("region-batch", help="Map IPs (newline-delimited or a JSON array) to compliance regions")
+    region_batch.add_argument("input", nargs="?", default="-", help="Input file, '-' for stdin (default)")
+    region_batch.add_argument("--format", choices=["ndjson", "csv"], default="ndjson")
+    region_batch.set_defaults(handler=_region_batch)
+    import_consents = commands.add_parser("import-consents", help="Bulk-load consent records (CSV with a header row, or NDJSON) and print a JSON summary")
+    import_consents.add_argument("input", nargs="?", default="-", help="Input file, '-' for stdin (default)")
+    import_consents.add_argument("--format", choices=["ndjson", "csv"], default=None, help="Default: csv for *.csv files, otherwise ndjson")
+    import_consents.add_argument("--batch-size", type=int, default=None, help="Records per COPY and commit (default: CONSENT_IMPORT_BATCH_SIZE)")
+    import_consents.set_defaults(handler=_import_consents)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -10,6 +10,46 @@ class Settings(BaseSettings):
     DEBUG: bool = False
     MAXMIND_ACCOUNT_ID: Optional[str] = None
     MAXMIND_LICENSE_KEY: Optional[str] = None
+    GEOIP_DB_PATH: Optional[str] = None  # Defaults to app/geoip/GeoLite2-Country.mmdb
+    REGION_CACHE_SIZE: int = 65536  # ip -> region LRU entries per worker
+    GEOIP_RELOAD_POLL_SECONDS: int = 60  # Watch GEOIP_DB_PATH for a replaced file; 0 disables (use POST /admin/geoip/reload)
+    TRUSTED_PROXIES: str = ""  # Comma-separated CIDRs of our load balancers; when set, X-Forwarded-For is walked right-to-left past them
+    CLIENT_IP_HEADER: str = "X-Forwarded-For"
+    PUBLIC_IP: Optional[str] = None  # Address used for region detection when the client IP is local (e.g. dev machines)
+    RESOLVE_PUBLIC_IP_ON_STARTUP: bool = False  # Look PUBLIC_IP up once at startup via external services if unset
+    AUDIT_WRITER_ENABLED: bool = False  # Queue decision audit rows and bulk-insert them in the background
+    AUDIT_WRITER_QUEUE_SIZE: int = 10000
+    AUDIT_WRITER_FLUSH_INTERVAL_MS: int = 200
+    AUDIT_WRITER_BATCH_SIZE: int = 500
+    AUDIT_WRITER_SPOOL_PATH: Optional[str] = None  # Local append-only file replayed on startup after a crash
+    DECISION_AUDIT_MODE: str = "full"  # "full" writes one audit row per decision, "rollup" writes per-minute counters
+    DECISION_AUDIT_SAMPLE_RATE: float = 0.0  # Fraction of decisions still written as full rows in rollup mode
+    DECISION_AUDIT_WATCHLIST: str = ""  # Comma-separated user ids always written as full rows in rollup mode
+    AUTH_TOKEN_CACHE_SIZE: int = 10000  # Verified JWT payloads kept until their exp
+    AUTH_ACTOR_CACHE_SIZE: int = 10000
+    AUTH_ACTOR_CACHE_TTL_SECONDS: int = 30  # Upper bound on how long another worker may accept a deleted user's token
+    PASSWORD_POOL_WORKERS: int = 2  # bcrypt worker processes; 0 hashes inline on the request thread
+    PASSWORD_POOL_QUEUE_SIZE: int = 32  # Calls allowed to wait for a worker before new ones are rejected with 503
+    PASSWORD_POOL_ADMISSION_TIMEOUT_MS: int = 100
+    PASSWORD_POOL_RETRY_AFTER_SECONDS: int = 1
+    API_KEY_CACHE_SIZE: int = 10000
+    API_KEY_CACHE_TTL_SECONDS: int = 300  # Revocations from other workers also arrive via the revocation poll
+    API_KEY_REVOCATION_POLL_SECONDS: int = 15
+    DECISION_TOKEN_TTL_SECONDS: int = 300
+    DECISION_TOKEN_PRIVATE_KEY: Optional[str] = None  # PEM; enables asymmetric signing and a non-empty JWKS (needs PyJWT[crypto])
+    DECISION_TOKEN_ALGORITHM: str = "RS256"  # Used with DECISION_TOKEN_PRIVATE_KEY (RS256/ES256/EdDSA)
+    DECISION_TOKEN_KEY_ID: str = "decision-1"
+    DECISION_TOKEN_SECRET: Optional[str] = None  # HS256 secret shared with edge verifiers when no private key is set
+    CONSENT_COMPACTION_AGE_DAYS: int = 90  # Superseded history rows older than this move to consent_history_archive; 0 disables
+    CONSENT_COMPACTION_BATCH_SIZE: int = 5000  # Rows moved per transaction
+    PARTITION_MONTHS_AHEAD: int = 3  # Monthly partitions created ahead of time for partitioned tables (Postgres)
+    RETENTION_DELETE_BATCH_SIZE: int = 10000  # Rows per DELETE for retention ranges that do not cover a whole partition
+    AUDIT_ARCHIVE_DIR: str = "./audit-archive"  # Where closed audit_logs partitions are exported before being detached
+    AUDIT_ARCHIVE_FORMAT: str = "parquet"  # "parquet" (queryable via /admin/audit/archive, needs pyarrow) or "jsonl" (gzip)
+    IDEMPOTENCY_KEY_TTL_SECONDS: int = 86400  # How long a response stored under an Idempotency-Key is replayed to retries
+    IDEMPOTENCY_LEASE_SECONDS: int = 30  # How long an in-progress claim blocks retries (409) before a retry may take it over
+    CONSENT_IMPORT_BATCH_SIZE: int = 20000  # Records validated, loaded (COPY on Postgres) and committed together by bulk consent imports
+    CONSENT_IMPORT_MAX_AGE_DAYS: int = 3650  # Imported records stamped further back are rejected instead of creating partitions for them; keep within the consent retention period
     
     model_config = SettingsConfigDict(
         env_file=".env",
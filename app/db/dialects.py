@@ -0,0 +1,12 @@
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+
+def is_postgresql(db: Session) -> bool:
+    return db.get_bind().dialect.name == "postgresql"
+
+
+def upsert_insert(db: Session, table):
+    """Dialect-specific INSERT supporting ON CONFLICT (Postgres in production, SQLite in tests)."""
+    return pg_insert(table) if is_postgresql(db) else sqlite_insert(table)
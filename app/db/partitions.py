@@ -0,0 +1,108 @@
+import logging
+import re
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+from sqlalchemy import Table, TableClause, column, table as table_clause, text
+from sqlalchemy.orm import Session
+from app.db.dialects import is_postgresql
+
+logger = logging.getLogger(__name__)
+
+MonthlyPartition = Tuple[str, datetime, datetime]
+
+
+def month_start(value: datetime) -> datetime:
+    return datetime(value.year, value.month, 1, tzinfo=timezone.utc)
+
+
+def add_months(value: datetime, months: int) -> datetime:
+    year, month = divmod(value.month - 1 + months, 12)
+    return value.replace(year=value.year + year, month=month + 1)
+
+
+def partition_name(table: str, start: datetime) -> str:
+    return f"{table}_p{start.year:04d}_{start.month:02d}"
+
+
+def parse_partition_name(table: str, name: str) -> Optional[MonthlyPartition]:
+    """(name, lower, upper) for a monthly partition of `table` named by partition_name; None for anything else (e.g. the default partition)."""
+    match = re.fullmatch(rf"{re.escape(table)}_p(\d{{4}})_(\d{{2}})", name)
+    if not match:
+        return None
+    start = datetime(int(match.group(1)), int(match.group(2)), 1, tzinfo=timezone.utc)
+    return name, start, add_months(start, 1)
+
+
+def is_partitioned(db: Session, table: str) -> bool:
+    return is_postgresql(db) and db.execute(text("SELECT relkind = 'p' FROM pg_class WHERE oid = to_regclass(:table)"), {"table": table}).scalar() is True
+
+
+def list_partitions(db: Session, table: str) -> List[MonthlyPartition]:
+    names = db.execute(text("SELECT child.relname FROM pg_inherits JOIN pg_class child ON child.oid = pg_inherits.inhrelid WHERE pg_inherits.inhparent = to_regclass(:table)"), {"table": table}).scalars()
+    return sorted(filter(None, (parse_partition_name(table, name) for name in names)), key=lambda partition: partition[1])
+
+
+def detached_partitions(db: Session, table: str) -> List[MonthlyPartition]:
+    """Tables named like monthly partitions of `table` that are no longer attached to it, i.e. detached but not yet dropped."""
+    names = db.execute(text("SELECT relname FROM pg_class WHERE relkind = 'r' AND NOT relispartition AND pg_table_is_visible(oid) AND starts_with(relname, :prefix)"), {"prefix": f"{table}_p"}).scalars()
+    return sorted(filter(None, (parse_partition_name(table, name) for name in names)), key=lambda partition: partition[1])
+
+
+def partition_table(parent: Table, name: str) -> TableClause:
+    """`name` as a selectable with the columns of `parent`, for reading a partition (attached or not) directly."""
+    return table_clause(name, *[column(col.name, col.type) for col in parent.c])
+
+
+def _default_partition(db: Session, table: str) -> Optional[Tuple[str, str]]:
+    """(default partition name, partition key column) of `table`; None when it has no default partition."""
+    row = db.execute(text("SELECT child.relname, key.attname FROM pg_partitioned_table parent JOIN pg_class child ON child.oid = parent.partdefid JOIN pg_attribute key ON key.attrelid = parent.partrelid AND key.attnum = parent.partattrs[0] WHERE parent.partrelid = to_regclass(:table)"), {"table": table}).first()
+    return (row.relname, row.attname) if row else None
+
+
+def ensure_monthly_partitions(db: Session, table: str, *, start: datetime, end: datetime) -> List[str]:
+    """Create any missing monthly partitions covering [start, end). Returns the names created.
+
+    Postgres refuses to create a month while the default partition holds rows in its range (e.g. a bulk import of old
+    history), so such rows are moved in the same transaction: the default partition is detached, the month created
+    and filled from it, and the default reattached. Detaching also sheds the cloned immutability triggers, which
+    reattaching restores, so audit rows are moved without an UPDATE or DELETE ever reaching the live table.
+    """
+    existing = {name for name, _, _ in list_partitions(db, table)}
+    default = _default_partition(db, table)
+    created = []
+    month = month_start(start)
+    while month < end:
+        name = partition_name(table, month)
+        if name not in existing:
+            bounds = {"lower": month, "upper": add_months(month, 1)}
+            window = f'"{default[1]}" >= :lower AND "{default[1]}" < :upper' if default else ""
+            stranded = default is not None and db.execute(text(f'SELECT EXISTS (SELECT 1 FROM "{default[0]}" WHERE {window})'), bounds).scalar()
+            if stranded:
+                db.execute(text(f'ALTER TABLE "{table}" DETACH PARTITION "{default[0]}"'))
+            db.execute(text(f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF "{table}" FOR VALUES FROM (\'{month.isoformat()}\') TO (\'{add_months(month, 1).isoformat()}\')'))
+            if stranded:
+                moved = db.execute(text(f'INSERT INTO "{table}" SELECT * FROM "{default[0]}" WHERE {window}'), bounds).rowcount
+                db.execute(text(f'DELETE FROM "{default[0]}" WHERE {window}'), bounds)
+                db.execute(text(f'ALTER TABLE "{table}" ATTACH PARTITION "{default[0]}" DEFAULT'))
+                logger.info("Moved %d rows of %s from %s into the new partition %s", moved, table, default[0], name)
+            created.append(name)
+        month = add_months(month, 1)
+    db.commit()
+    return created
+
+
+def partitions_before(db: Session, table: str, cutoff: datetime) -> List[MonthlyPartition]:
+    """Monthly partitions whose whole range lies before `cutoff`."""
+    return [partition for partition in list_partitions(db, table) if partition[2] <= cutoff]
+
+
+def detach_partition(db: Session, table: str, name: str, *, drop: bool = True) -> None:
+    db.execute(text(f'ALTER TABLE "{table}" DETACH PARTITION "{name}"'))
+    if drop:
+        db.execute(text(f'DROP TABLE "{name}"'))
+    db.commit()
+
+
+def drop_partition_table(db: Session, name: str) -> None:
+    db.execute(text(f'DROP TABLE "{name}"'))
+    db.commit()
@@ -0,0 +1,97 @@
+from __future__ import annotations
+import gzip
+import json
+import logging
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional
+from sqlalchemy import FromClause, func, select
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.db import partitions
+from app.models import AuditLog
+from app.services.audit_cold_archive import file_sha256, verify_parquet_archive, write_parquet_archive
+from app.utils.helpers import ensure_utc, get_utc_now
+
+logger = logging.getLogger(__name__)
+
+_AUDIT_TABLE = AuditLog.__table__
+
+
+def _jsonable(value: Any) -> Any:
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, datetime):
+        return ensure_utc(value).isoformat()
+    return value
+
+
+def _range_filter(audit: FromClause, lower: datetime, upper: datetime):
+    return (audit.c.event_time >= lower, audit.c.event_time < upper)
+
+
+def export_audit_range(db: Session, lower: datetime, upper: datetime, path: Path, *, batch_size: int = 5000, source: Optional[FromClause] = None) -> Dict[str, Any]:
+    """Stream audit rows with lower <= event_time < upper into a gzip'd JSON-lines file and return its manifest.
+
+    The file is written under a temporary name and only renamed into place once it has been read back: the row count
+    must match both what was written and what the database holds for the range, and the manifest records the SHA-256
+    of the compressed bytes that were verified. `source` reads from a detached partition instead of audit_logs.
+    """
+    audit = _AUDIT_TABLE if source is None else source
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partial = path.with_name(path.name + ".partial")
+    written = 0
+    with gzip.open(partial, "wt", encoding="utf-8") as handle:
+        for row in db.execute(select(audit).where(*_range_filter(audit, lower, upper)).order_by(audit.c.event_time, audit.c.id).execution_options(yield_per=batch_size)).mappings():
+            handle.write(json.dumps({key: _jsonable(value) for key, value in row.items()}, separators=(",", ":")) + "\n")
+            written += 1
+    expected = db.execute(select(func.count()).select_from(audit).where(*_range_filter(audit, lower, upper))).scalar()
+    with gzip.open(partial, "rt", encoding="utf-8") as handle:
+        read_back = sum(1 for _ in handle)
+    if not written == read_back == expected:
+        partial.unlink()
+        raise ValueError(f"audit_archive_verification_failed: wrote {written}, read back {read_back}, expected {expected}")
+    partial.replace(path)
+    manifest = {"file": path.name, "rows": written, "sha256": file_sha256(path), "lower": lower.isoformat(), "upper": upper.isoformat(), "archived_at": get_utc_now().isoformat()}
+    path.with_name(path.name + ".manifest.json").write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    return manifest
+
+
+def verify_audit_archive(path: Path) -> bool:
+    """Re-check an archive file against its manifest (checksum and row count)."""
+    manifest = json.loads(path.with_name(path.name + ".manifest.json").read_text(encoding="utf-8"))
+    if file_sha256(path) != manifest["sha256"]:
+        return False
+    with gzip.open(path, "rt", encoding="utf-8") as handle:
+        return sum(1 for _ in handle) == manifest["rows"]
+
+
+def archive_stale_audit_partitions(db: Session, cutoff: datetime, archive_dir: Optional[str] = None) -> int:
+    """Archive and detach every closed monthly audit_logs partition that lies wholly before `cutoff`.
+
+    Archives are Parquet files searchable through query_audit_archive, or gzip'd JSON lines when AUDIT_ARCHIVE_FORMAT
+    is "jsonl". Each partition is detached first, so no late insert can land in it while it is exported, then archived
+    from the standalone table and dropped only after the archive verified against the manifest. A partition left
+    detached by a run that died is picked up by the next one. No row is ever updated or deleted, so the immutability
+    triggers stay in force. The current month is never touched. Returns the number of rows archived; 0 when audit_logs
+    is not partitioned.
+    """
+    if not partitions.is_partitioned(db, "audit_logs"):
+        return 0
+    directory = Path(archive_dir or settings.AUDIT_ARCHIVE_DIR)
+    cutoff = min(ensure_utc(cutoff), partitions.month_start(get_utc_now()))
+    archived = 0
+    parquet = settings.AUDIT_ARCHIVE_FORMAT == "parquet"
+    leftovers = partitions.detached_partitions(db, "audit_logs")
+    for name, lower, upper in leftovers + partitions.partitions_before(db, "audit_logs", cutoff):
+        if (name, lower, upper) not in leftovers:
+            partitions.detach_partition(db, "audit_logs", name, drop=False)
+        path = directory / (f"{name}.parquet" if parquet else f"{name}.jsonl.gz")
+        manifest = (write_parquet_archive if parquet else export_audit_range)(db, lower, upper, path, source=partitions.partition_table(_AUDIT_TABLE, name))
+        if not (verify_parquet_archive if parquet else verify_audit_archive)(path):
+            raise ValueError(f"audit_archive_verification_failed: {path}")
+        partitions.drop_partition_table(db, name)
+        logger.info("Archived %d audit rows from %s to %s (sha256 %s)", manifest["rows"], name, path, manifest["sha256"])
+        archived += manifest["rows"]
+    return archived
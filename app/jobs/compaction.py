@@ -0,0 +1,49 @@
+from __future__ import annotations
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.db.database import SessionLocal
+from app.models import AuditLog, ConsentCurrent, ConsentHistory, ConsentHistoryArchive
+from app.utils.helpers import get_utc_now
+
+logger = logging.getLogger(__name__)
+
+_COLUMNS = [column.name for column in ConsentHistory.__table__.columns]
+
+
+def compact_consent_history(db: Session, older_than: datetime, batch_size: int = 5000) -> int:
+    """Move superseded history rows recorded before `older_than` into consent_history_archive, one batch per commit.
+
+    A row is superseded once consent_current no longer points at it, so the current row of every purpose stays hot
+    regardless of age. Rows keep their ids; history pages and as-of lookups read both tables.
+    """
+    history = ConsentHistory.__table__
+    moved = 0
+    while True:
+        ids = [consent_id for (consent_id,) in db.execute(select(history.c.id).outerjoin(ConsentCurrent, ConsentCurrent.consent_id == history.c.id).where(history.c.timestamp < older_than, ConsentCurrent.consent_id.is_(None)).limit(batch_size))]
+        if not ids:
+            return moved
+        db.execute(insert(ConsentHistoryArchive).from_select(_COLUMNS, select(*[history.c[name] for name in _COLUMNS]).where(history.c.id.in_(ids))))
+        db.execute(delete(ConsentHistory).where(ConsentHistory.id.in_(ids)))
+        db.commit()
+        moved += len(ids)
+
+
+def run_consent_compaction(db: Optional[Session] = None) -> Dict[str, object]:
+    owns_session = db is None
+    session = db or SessionLocal()
+    try:
+        now = get_utc_now()
+        cutoff = now - timedelta(days=settings.CONSENT_COMPACTION_AGE_DAYS)
+        moved = compact_consent_history(session, cutoff, settings.CONSENT_COMPACTION_BATCH_SIZE)
+        if moved:
+            session.add(AuditLog(user_id=None, actor_type="system", event_type="retention_run", action="consent_history.compacted", details={"archived_count": moved, "cutoff_date": cutoff.isoformat()}, event_time=now, created_at=now))
+            session.commit()
+        logger.info("Consent compaction archived %d history rows older than %s", moved, cutoff.isoformat())
+        return {"archived_count": moved, "cutoff_date": cutoff.isoformat()}
+    finally:
+        if owns_session:
+            session.close()
@@ -0,0 +1,30 @@
+from __future__ import annotations
+import logging
+from typing import Dict, List, Optional
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.db import partitions
+from app.db.database import SessionLocal
+from app.utils.helpers import get_utc_now
+
+logger = logging.getLogger(__name__)
+
+PARTITIONED_TABLES = ("consent_history", "audit_logs")
+
+
+def run_partition_maintenance(db: Optional[Session] = None) -> Dict[str, List[str]]:
+    """Create the monthly partitions for the current month and PARTITION_MONTHS_AHEAD months after it. No-op on
+    tables that are not partitioned (SQLite, or before migrations 021/022)."""
+    owns_session = db is None
+    session = db or SessionLocal()
+    try:
+        now = get_utc_now()
+        end = partitions.add_months(partitions.month_start(now), settings.PARTITION_MONTHS_AHEAD + 1)
+        created = {table: partitions.ensure_monthly_partitions(session, table, start=now, end=end) for table in PARTITIONED_TABLES if partitions.is_partitioned(session, table)}
+        for table, names in created.items():
+            if names:
+                logger.info("Created partitions of %s: %s", table, ", ".join(names))
+        return created
+    finally:
+        if owns_session:
+            session.close()
@@ -1,12 +1,17 @@
 from __future__ import annotations
 import hashlib
 from datetime import timedelta
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional
+from sqlalchemy import delete, select, text
 from sqlalchemy.orm import Session
+from app.config import settings
+from app.db import partitions
 from app.db.database import SessionLocal
-from app.models import AuditLog, ConsentHistory, RetentionEntityEnum, RetentionJob, RetentionJobStatusEnum, RetentionRule, RetentionSchedule, SubjectRequest, User
+from app.jobs.audit_archive import archive_stale_audit_partitions
+from app.models import AuditLog, ConsentCurrent, ConsentHistory, ConsentHistoryArchive, RetentionEntityEnum, RetentionJob, RetentionJobStatusEnum, RetentionRule, RetentionSchedule, SubjectRequest, User
 from app.models.consent import StatusEnum
 from app.models.retention import RetentionEntityTypeEnum
+from app.services.preferences_service import bump_consent_versions
 from app.utils.helpers import get_utc_now
 
 
@@ -15,13 +20,53 @@ def _mark_expired_consents(db: Session) -> int:
     expired_consents = db.query(ConsentHistory).filter(ConsentHistory.status == StatusEnum.GRANTED, ConsentHistory.valid_until.isnot(None), ConsentHistory.valid_until <= now).all()
     for consent in expired_consents:
         consent.status = StatusEnum.EXPIRED
-    if expired_consents:
-        db.commit()
+    expired_ids = [consent.id for consent in expired_consents]
+    for start in range(0, len(expired_ids), 1000):
+        db.query(ConsentCurrent).filter(ConsentCurrent.consent_id.in_(expired_ids[start:start + 1000])).update({ConsentCurrent.status: StatusEnum.EXPIRED, ConsentCurrent.version: ConsentCurrent.version + 1}, synchronize_session=False)
+    bump_consent_versions(db, {consent.user_id for consent in expired_consents})
+    db.flush()
     return len(expired_consents)
 
 
+def _on_own_session(db: Session, work: Callable[..., int], *args) -> int:
+    """Run work that commits as it goes (batched deletes, partition detaches) on a session of its own, so those
+    commits carry none of the retention run's pending changes and a failed run still rolls back as one unit."""
+    with Session(bind=db.get_bind()) as session:
+        return work(session, *args)
+
+
+def _delete_in_batches(db: Session, model, cutoff, batch_size: int) -> int:
+    """DELETE rows with timestamp < cutoff a batch at a time, committing between batches so no single statement
+    holds locks or generates dead tuples for the whole range at once."""
+    deleted = 0
+    while True:
+        batch = select(model.id).where(model.timestamp < cutoff).limit(batch_size).scalar_subquery()
+        count = db.execute(delete(model).where(model.id.in_(batch)).execution_options(synchronize_session=False)).rowcount
+        db.commit()
+        deleted += count
+        if count < batch_size:
+            return deleted
+
+
+def _drop_stale_partitions(db: Session, table: str, cutoff) -> int:
+    """Detach and drop every monthly partition of `table` that lies wholly before `cutoff`; returns the rows they held."""
+    dropped = 0
+    for name, _, _ in partitions.partitions_before(db, table, cutoff):
+        dropped += db.execute(text(f'SELECT count(*) FROM "{name}"')).scalar()
+        partitions.detach_partition(db, table, name)
+    return dropped
+
+
+def _purge_consent_history(db: Session, cutoff) -> int:
+    dropped = _drop_stale_partitions(db, "consent_history", cutoff) if partitions.is_partitioned(db, "consent_history") else 0
+    batch_size = settings.RETENTION_DELETE_BATCH_SIZE
+    return dropped + _delete_in_batches(db, ConsentHistory, cutoff, batch_size) + _delete_in_batches(db, ConsentHistoryArchive, cutoff, batch_size)
+
+
 def _delete_stale_consents(db: Session, cutoff) -> int:
-    return db.query(ConsentHistory).filter(ConsentHistory.timestamp < cutoff).delete(synchronize_session=False)
+    bump_consent_versions(db, [user_id for (user_id,) in db.query(ConsentCurrent.user_id).filter(ConsentCurrent.updated_at < cutoff).distinct()])
+    db.query(ConsentCurrent).filter(ConsentCurrent.updated_at < cutoff).delete(synchronize_session=False)
+    return _on_own_session(db, _purge_consent_history, cutoff)
 
 
 def _delete_stale_subject_requests(db: Session, cutoff) -> int:
@@ -45,7 +90,7 @@ def run_retention_cleanup(db: Optional[Session] = None) -> Dict[str, object]:
     session = db or SessionLocal()
     job = RetentionJob(status=RetentionJobStatusEnum.RUNNING)
     session.add(job)
-    session.flush()
+    session.commit()  # the job row survives a failed run so it can be marked FAILED
     
     try:
         now = get_utc_now()
@@ -66,6 +111,8 @@ def run_retention_cleanup(db: Optional[Session] = None) -> Dict[str, object]:
             consent_types = {RetentionEntityTypeEnum.CONSENT_RECORD.value, "ConsentRecord", RetentionEntityEnum.CONSENT.value, "consent"}
             if entity_type_value in consent_types:
                 deleted_count = _delete_stale_consents(session, cutoff) + _delete_stale_subject_requests(session, cutoff)
+            elif entity_type_value in (RetentionEntityTypeEnum.AUDIT_LOG_ENTRY.value, "AuditLogEntry"):
+                deleted_count = _on_own_session(session, archive_stale_audit_partitions, cutoff)
             elif entity_type_value in (RetentionEntityTypeEnum.RIGHTS_REQUEST.value, "RightsRequest"):
                 deleted_count = _delete_stale_subject_requests(session, cutoff)
             elif entity_type_value in (RetentionEntityEnum.USER.value, "user"):
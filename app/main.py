@@ -2,13 +2,20 @@ import logging
 from typing import Optional
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 from fastapi import FastAPI, Request, status
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from app.config import settings
+from app.jobs.compaction import run_consent_compaction
+from app.jobs.partitions import run_partition_maintenance
 from app.jobs.retention import run_retention_cleanup
-from app.routes import admin, admin_policies_v1, auth, consent, decision, preferences, region, retention, subject_requests, users
+from app.services import api_key_service, decision_rollup_service, idempotency_service, policy_engine
+from app.services.audit_writer import audit_writer
+from app.services.password_hasher import PasswordPoolBusy, password_hasher
+from app.services.region_service import check_geoip_reload, init_public_ip
+from app.routes import admin, admin_api_keys, admin_consent_imports, admin_policies_v1, auth, consent, decision, preferences, region, retention, subject_requests, users
 
 logger = logging.getLogger(__name__)
 _scheduler: Optional[BackgroundScheduler] = None
@@ -26,6 +33,51 @@ def _ensure_scheduler() -> None:
         id="retention-cleanup",
         replace_existing=True,
     )
+    _scheduler.add_job(
+        run_partition_maintenance,
+        CronTrigger(hour=1, minute=0),
+        id="partition-maintenance",
+        replace_existing=True,
+    )
+    if settings.CONSENT_COMPACTION_AGE_DAYS > 0:
+        _scheduler.add_job(
+            run_consent_compaction,
+            CronTrigger(hour=3, minute=0),
+            id="consent-compaction",
+            replace_existing=True,
+        )
+    _scheduler.add_job(
+        policy_engine.refresh_active_policy,
+        IntervalTrigger(seconds=30),
+        id="policy-refresh",
+        replace_existing=True,
+    )
+    _scheduler.add_job(
+        api_key_service.refresh_revocations,
+        IntervalTrigger(seconds=settings.API_KEY_REVOCATION_POLL_SECONDS),
+        id="api-key-revocations",
+        replace_existing=True,
+    )
+    _scheduler.add_job(
+        idempotency_service.run_key_purge,
+        IntervalTrigger(hours=1),
+        id="idempotency-key-purge",
+        replace_existing=True,
+    )
+    if settings.GEOIP_RELOAD_POLL_SECONDS > 0:
+        _scheduler.add_job(
+            check_geoip_reload,
+            IntervalTrigger(seconds=settings.GEOIP_RELOAD_POLL_SECONDS),
+            id="geoip-reload",
+            replace_existing=True,
+        )
+    if decision_rollup_service.rollup_enabled():
+        _scheduler.add_job(
+            decision_rollup_service.run_rollup_flush,
+            IntervalTrigger(seconds=60),
+            id="decision-rollup-flush",
+            replace_existing=True,
+        )
     _scheduler.start()
 
 
@@ -98,6 +150,11 @@ def create_app() -> FastAPI:
         logger.error(f"Validation error on {request.method} {request.url.path}: {errors}")
         return JSONResponse(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, content={"detail": errors})
 
+    @app.exception_handler(PasswordPoolBusy)
+    async def password_pool_busy_handler(request: Request, exc: PasswordPoolBusy):
+        logger.warning(f"Password pool saturated on {request.method} {request.url.path}")
+        return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, content={"detail": "password_pool_busy"}, headers={"Retry-After": str(exc.retry_after)})
+
     @app.exception_handler(ValueError)
     async def value_error_handler(request: Request, exc: ValueError):
         error_message = str(exc) or "Invalid value"
@@ -120,14 +177,25 @@ def create_app() -> FastAPI:
     app.include_router(admin.router)
     app.include_router(retention.router)
     app.include_router(admin_policies_v1.router)
+    app.include_router(admin_api_keys.router)
+    app.include_router(admin_consent_imports.router)
 
     @app.on_event("startup")
     def _startup() -> None:
+        policy_engine.refresh_active_policy()
+        init_public_ip()
         _ensure_scheduler()
+        if settings.AUDIT_WRITER_ENABLED:
+            audit_writer.start()
+        password_hasher.start()
 
     @app.on_event("shutdown")
     def _shutdown() -> None:
         _shutdown_scheduler()
+        audit_writer.stop()
+        password_hasher.stop()
+        if decision_rollup_service.rollup_enabled():
+            decision_rollup_service.run_rollup_flush()
 
     @app.get("/", tags=["system"])
     def root():
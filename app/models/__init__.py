@@ -1,7 +1,10 @@
 from app.models.admin import Admin
-from app.models.audit import ActorTypeEnum, AuditLog, EventTypeEnum
+from app.models.api_key import ApiKey
+from app.models.audit import ActorTypeEnum, AuditLog, DecisionRollup, EventTypeEnum
 from app.models.consent import (
+    ConsentCurrent,
     ConsentHistory,
+    ConsentHistoryArchive,
     PurposeEnum,
     RegionEnum,
     RequestStatusEnum,
@@ -12,15 +15,27 @@ from app.models.consent import (
     SubjectRequest,
     User,
 )
+from app.models.idempotency import IdempotencyKey
+from app.models.imports import ConsentImportJob, ImportJobStatusEnum
+from app.models.policy import PolicyDefinition, PolicySnapshot
 from app.models.retention import RetentionJob, RetentionJobStatusEnum, RetentionRule
 from app.models.tokens import TokenPurposeEnum, VerificationToken
 
 __all__ = [
     "Admin",
+    "ApiKey",
     "ActorTypeEnum",
     "AuditLog",
+    "ConsentCurrent",
     "ConsentHistory",
+    "ConsentHistoryArchive",
+    "ConsentImportJob",
+    "DecisionRollup",
     "EventTypeEnum",
+    "IdempotencyKey",
+    "ImportJobStatusEnum",
+    "PolicyDefinition",
+    "PolicySnapshot",
     "PurposeEnum",
     "RegionEnum",
     "RequestStatusEnum",
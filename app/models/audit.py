@@ -3,8 +3,8 @@ import uuid
 from datetime import datetime
 from typing import Any, Dict, Optional
 
-from sqlalchemy import DateTime, ForeignKey, Index, String
-from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import Boolean, DateTime, ForeignKey, Index, Integer, String, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.sql import func
 
 from app.db.database import Base
@@ -31,6 +31,9 @@ class EventTypeEnum(str, enum.Enum):
 
 
 class AuditLog(Base):
+    """Append-only: Postgres triggers reject UPDATE and DELETE. On Postgres the table is range-partitioned by month on
+    `event_time` (migration 022) with primary key (id, event_time); old months leave only by archive-then-detach."""
+
     __tablename__ = "audit_logs"
 
     id: Mapped[uuid.UUID] = mapped_column(GUID, primary_key=True, default=uuid.uuid4)
@@ -39,15 +42,15 @@ class AuditLog(Base):
         GUID, ForeignKey("users.id", ondelete="CASCADE"), nullable=True, index=True
     )
     user_id: Mapped[Optional[uuid.UUID]] = mapped_column(
-        GUID, ForeignKey("users.id", ondelete="CASCADE"), nullable=True, index=True
+        GUID, ForeignKey("users.id", ondelete="CASCADE"), nullable=True
     )
     actor_type: Mapped[Optional[str]] = mapped_column(String(20), nullable=True, index=True)
     actor_id: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
     event_type: Mapped[Optional[str]] = mapped_column(String(50), nullable=True, index=True)
     action: Mapped[str] = mapped_column(String(64), nullable=False)
     details: Mapped[Dict[str, Any]] = mapped_column(JSONBType, nullable=False)
-    policy_snapshot: Mapped[Optional[Dict[str, Any]]] = mapped_column(
-        JSONBType, nullable=True
+    policy_snapshot_id: Mapped[Optional[str]] = mapped_column(
+        String(64), ForeignKey("policy_snapshots.content_hash"), nullable=True, index=True
     )
     event_time: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now(), nullable=False, index=True
@@ -56,4 +59,28 @@ class AuditLog(Base):
         DateTime(timezone=True), server_default=func.now(), nullable=False, index=True
     )
 
+    snapshot: Mapped[Optional["PolicySnapshot"]] = relationship()
+
     __table_args__ = (Index("idx_audit_user_created", "user_id", "created_at"),)
+
+    @property
+    def policy_snapshot(self) -> Optional[Dict[str, Any]]:
+        return self.snapshot.snapshot if self.snapshot else None
+
+
+class DecisionRollup(Base):
+    __tablename__ = "decision_rollups"
+
+    id: Mapped[uuid.UUID] = mapped_column(GUID, primary_key=True, default=uuid.uuid4)
+    bucket_start: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, index=True)
+    tenant_id: Mapped[str] = mapped_column(String(255), nullable=False, default="")
+    region: Mapped[str] = mapped_column(String(10), nullable=False)
+    purpose: Mapped[str] = mapped_column(String(50), nullable=False)
+    allowed: Mapped[bool] = mapped_column(Boolean, nullable=False)
+    reason: Mapped[str] = mapped_column(String(64), nullable=False)
+    count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        UniqueConstraint("bucket_start", "tenant_id", "region", "purpose", "allowed", "reason", name="uq_decision_rollup_key"),
+        Index("idx_decision_rollup_purpose_region", "purpose", "region", "bucket_start"),
+    )
@@ -83,6 +83,7 @@ class User(Base):
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
     deleted_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True, index=True)
+    consent_version: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
 
     consent_history: Mapped[List["ConsentHistory"]] = relationship(
         back_populates="user", cascade="all, delete-orphan"
@@ -93,6 +94,9 @@ class User(Base):
 
 
 class ConsentHistory(Base):
+    """On Postgres the table is range-partitioned by month on `timestamp` (migration 021) and its primary key is
+    (id, timestamp). Ids are generated UUIDs, so id alone remains the ORM identity."""
+
     __tablename__ = "consent_history"
 
     id: Mapped[uuid.UUID] = mapped_column(GUID, primary_key=True, default=uuid.uuid4)
@@ -108,18 +112,66 @@ class ConsentHistory(Base):
     valid_until: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True, index=True)
     timestamp: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
     expires_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True, index=True)
-    policy_snapshot: Mapped[Optional[Dict[str, Any]]] = mapped_column(JSONBType, nullable=True)
+    policy_snapshot_id: Mapped[Optional[str]] = mapped_column(String(64), ForeignKey("policy_snapshots.content_hash"), nullable=True, index=True)
     source: Mapped[Optional[str]] = mapped_column(String(50), nullable=True)
     user_agent: Mapped[Optional[str]] = mapped_column(String(500), nullable=True)
     ip_address: Mapped[Optional[str]] = mapped_column(String(45), nullable=True)
     meta: Mapped[Optional[Dict[str, Any]]] = mapped_column(JSONBType, nullable=True)
 
     user: Mapped["User"] = relationship(back_populates="consent_history")
+    snapshot: Mapped[Optional["PolicySnapshot"]] = relationship()
     __table_args__ = (
-        Index("idx_user_purpose", "user_id", "purpose"),
-        Index("idx_user_timestamp", "user_id", "timestamp"),
+        Index("idx_user_purpose_timestamp", "user_id", "purpose", "timestamp", "id"),
+        Index("idx_user_timestamp", "user_id", "timestamp", "id"),
     )
 
+    @property
+    def policy_snapshot(self) -> Optional[Dict[str, Any]]:
+        return self.snapshot.snapshot if self.snapshot else None
+
+
+class ConsentHistoryArchive(Base):
+    """Superseded consent_history rows moved out of the hot table by compaction; same columns, same ids."""
+
+    __tablename__ = "consent_history_archive"
+
+    id: Mapped[uuid.UUID] = mapped_column(GUID, primary_key=True)
+    tenant_id: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    user_id: Mapped[uuid.UUID] = mapped_column(GUID, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    purpose: Mapped[PurposeEnum] = mapped_column(SQLEnum(PurposeEnum, name="purpose_enum", values_callable=lambda x: [e.value for e in x]), nullable=False)
+    status: Mapped[StatusEnum] = mapped_column(SQLEnum(StatusEnum, name="status_enum", values_callable=lambda x: [e.value for e in x]), nullable=False)
+    region: Mapped[RegionEnum] = mapped_column(SQLEnum(RegionEnum, name="region_enum", values_callable=lambda x: [e.value for e in x]), nullable=False)
+    granted_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    valid_from: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    valid_until: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    timestamp: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, index=True)
+    expires_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    policy_snapshot_id: Mapped[Optional[str]] = mapped_column(String(64), ForeignKey("policy_snapshots.content_hash"), nullable=True)
+    source: Mapped[Optional[str]] = mapped_column(String(50), nullable=True)
+    user_agent: Mapped[Optional[str]] = mapped_column(String(500), nullable=True)
+    ip_address: Mapped[Optional[str]] = mapped_column(String(45), nullable=True)
+    meta: Mapped[Optional[Dict[str, Any]]] = mapped_column(JSONBType, nullable=True)
+    archived_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        Index("idx_archive_user_purpose_timestamp", "user_id", "purpose", "timestamp", "id"),
+        Index("idx_archive_user_timestamp", "user_id", "timestamp", "id"),
+    )
+
+
+class ConsentCurrent(Base):
+    """Latest consent state per (user, purpose), maintained in the same transaction as every ConsentHistory write."""
+
+    __tablename__ = "consent_current"
+
+    user_id: Mapped[uuid.UUID] = mapped_column(GUID, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    purpose: Mapped[PurposeEnum] = mapped_column(SQLEnum(PurposeEnum, name="purpose_enum", values_callable=lambda x: [e.value for e in x]), primary_key=True)
+    status: Mapped[StatusEnum] = mapped_column(SQLEnum(StatusEnum, name="status_enum", values_callable=lambda x: [e.value for e in x]), nullable=False)
+    expires_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    consent_id: Mapped[Optional[uuid.UUID]] = mapped_column(GUID, nullable=True, index=True)
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=1)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
+
 
 class RetentionSchedule(Base):
     __tablename__ = "retention_schedules"
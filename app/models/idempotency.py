@@ -0,0 +1,27 @@
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from sqlalchemy import DateTime, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql import func
+
+from app.db.database import Base
+from app.db.types import JSONBType
+
+
+class IdempotencyKey(Base):
+    """Outcome of a write sent with an Idempotency-Key header, replayed to retries until `expires_at`.
+
+    Keys are scoped to the caller ("role:actor id"). A row without `status_code` is a claim held by a request that is
+    still running; its `expires_at` is a short lease, so the claim of a request that died can be taken over."""
+
+    __tablename__ = "idempotency_keys"
+
+    scope: Mapped[str] = mapped_column(String(80), primary_key=True)
+    key: Mapped[str] = mapped_column(String(255), primary_key=True)
+    request_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    status_code: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    response_body: Mapped[Optional[Dict[str, Any]]] = mapped_column(JSONBType, nullable=True)
+    response_headers: Mapped[Optional[Dict[str, str]]] = mapped_column(JSONBType, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, index=True)
@@ -0,0 +1,41 @@
+import enum
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import DateTime, Index, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql import func
+
+from app.db.database import Base
+from app.db.types import GUID, JSONBType
+
+
+class ImportJobStatusEnum(str, enum.Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class ConsentImportJob(Base):
+    """Progress of one bulk consent import. Counters are committed together with each loaded batch, so they always
+    describe exactly what has landed; `errors` keeps the first rejected rows for the submitter to fix."""
+
+    __tablename__ = "consent_import_jobs"
+
+    id: Mapped[uuid.UUID] = mapped_column(GUID, primary_key=True, default=uuid.uuid4)
+    status: Mapped[ImportJobStatusEnum] = mapped_column(String(20), nullable=False, default=ImportJobStatusEnum.PENDING)
+    source_format: Mapped[str] = mapped_column(String(10), nullable=False)
+    submitted_by: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    total_rows: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    imported_rows: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    rejected_rows: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    errors: Mapped[Optional[List[Dict[str, Any]]]] = mapped_column(JSONBType, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    started_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index("idx_consent_import_job_status", "status", "created_at"),
+    )
@@ -0,0 +1,38 @@
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from sqlalchemy import Boolean, DateTime, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql import func
+
+from app.db.database import Base
+from app.db.types import GUID, JSONBType
+
+
+class PolicyDefinition(Base):
+    __tablename__ = "policy_definitions"
+
+    id: Mapped[uuid.UUID] = mapped_column(GUID, primary_key=True, default=uuid.uuid4)
+    version: Mapped[int] = mapped_column(Integer, nullable=False, unique=True, index=True)
+    definition: Mapped[Dict[str, Any]] = mapped_column(JSONBType, nullable=False)
+    is_active: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False, index=True)
+    created_by: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+    published_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True), nullable=True, index=True
+    )
+
+
+class PolicySnapshot(Base):
+    """Deduplicated policy snapshot, keyed by the SHA-256 of its canonical JSON."""
+
+    __tablename__ = "policy_snapshots"
+
+    content_hash: Mapped[str] = mapped_column(String(64), primary_key=True)
+    snapshot: Mapped[Dict[str, Any]] = mapped_column(JSONBType, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
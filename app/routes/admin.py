@@ -1,16 +1,25 @@
 import uuid
+from datetime import datetime
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, Query, status
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy import desc, text
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
+from app.config import settings
 from app.db.database import get_db
 from app.models.admin import Admin
-from app.models.audit import AuditLog
+from app.models.audit import AuditLog, DecisionRollup
 from app.models.consent import PurposeEnum, RegionEnum
 from app.schemas.auth import AdminCreateRequest, AdminCreateResponse
-from app.schemas.consent import AuditLogResponse
-from app.utils.security import AuthenticatedActor, get_optional_actor, hash_password, require_admin
+from app.schemas.consent import AuditLogResponse, DecisionRollupResponse
+from app.services import api_key_service, decision_rollup_service
+from app.services.audit_cold_archive import query_audit_archive
+from app.services.audit_writer import audit_writer
+from app.services.password_hasher import password_hasher
+from app.services.region_service import get_resolver, reload_geoip_database
+from app.utils.errors import handle_service_error
+from app.utils.security import AuthenticatedActor, auth_cache_stats, get_optional_actor, require_admin
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
@@ -45,28 +54,98 @@ def list_audit_logs(
     return logs
 
 
+@router.get(
+    "/audit/rollups",
+    response_model=List[DecisionRollupResponse],
+    description="List per-minute decision counters recorded in rollup audit mode, newest first. Read-only: in-process counters reach this table through the scheduled flush (every 60s), so the latest minute may not be listed yet. Admin JWT token required."
+)
+def list_decision_rollups(
+    purpose: Optional[PurposeEnum] = Query(None),
+    region: Optional[RegionEnum] = Query(None),
+    tenant_id: Optional[str] = Query(None),
+    since: Optional[datetime] = Query(None),
+    until: Optional[datetime] = Query(None),
+    limit: int = Query(1000, ge=1, le=10000),
+    db: Session = Depends(get_db),
+    actor: AuthenticatedActor = Depends(require_admin),
+):
+    query = db.query(DecisionRollup)
+    if purpose:
+        query = query.filter(DecisionRollup.purpose == purpose.value)
+    if region:
+        query = query.filter(DecisionRollup.region == region.value)
+    if tenant_id is not None:
+        query = query.filter(DecisionRollup.tenant_id == tenant_id)
+    if since:
+        query = query.filter(DecisionRollup.bucket_start >= since)
+    if until:
+        query = query.filter(DecisionRollup.bucket_start < until)
+    rollups = query.order_by(desc(DecisionRollup.bucket_start)).limit(limit).all()
+    return [DecisionRollupResponse(bucket_start=r.bucket_start, tenant_id=r.tenant_id or None, region=r.region, purpose=r.purpose, allowed=r.allowed, reason=r.reason, count=r.count) for r in rollups]
+
+
+@router.get(
+    "/audit/archive",
+    description="Search audit rows that were archived out of Postgres (Parquet files under AUDIT_ARCHIVE_DIR) by event_time range and user_id, oldest first. Only months and row groups whose statistics can match are read; stats reports how many were scanned. Admin JWT token required."
+)
+def search_audit_archive(
+    start: Optional[datetime] = Query(None),
+    end: Optional[datetime] = Query(None),
+    user_id: Optional[uuid.UUID] = Query(None),
+    limit: int = Query(1000, ge=1, le=10000),
+    actor: AuthenticatedActor = Depends(require_admin),
+):
+    try:
+        return query_audit_archive(settings.AUDIT_ARCHIVE_DIR, start=start, end=end, user_id=user_id, limit=limit)
+    except ValueError as exc:
+        handle_service_error(exc)
+
+
 @router.post(
     "/admins",
     response_model=AdminCreateResponse,
     status_code=status.HTTP_201_CREATED,
     description="Create a new admin user. Admin JWT token required - only existing admins can create new admins. If no admins exist, this endpoint allows creating the first admin without authentication (bootstrap mode)."
 )
-def create_admin(
+async def create_admin(
     admin_data: AdminCreateRequest,
     db: Session = Depends(get_db),
     actor: Optional[AuthenticatedActor] = Depends(get_optional_actor),
 ):
-    admin_count = db.query(Admin).count()
+    admin_count, email_taken = await run_in_threadpool(lambda: (db.query(Admin).count(), db.query(Admin.id).filter(Admin.email == admin_data.email).first() is not None))
     if admin_count > 0 and (not actor or actor.role != "admin"):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="admin_required")
-    if db.query(Admin).filter(Admin.email == admin_data.email).first():
+    if email_taken:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="admin_email_already_exists")
-    new_admin = Admin(email=admin_data.email, password_hash=hash_password(admin_data.password))
+    new_admin = Admin(email=admin_data.email, password_hash=await password_hasher.hash_async(admin_data.password))
+
+    def _save() -> AdminCreateResponse:
+        try:
+            db.add(new_admin)
+            db.commit()
+            db.refresh(new_admin)
+            return AdminCreateResponse(id=new_admin.id, email=new_admin.email, created_at=new_admin.created_at.isoformat())
+        except IntegrityError:
+            db.rollback()
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="admin_email_already_exists")
+
+    return await run_in_threadpool(_save)
+
+
+@router.get(
+    "/metrics",
+    description="In-process runtime metrics (audit writer queue depth and flush latency, auth cache hit rates, password pool queue wait and hash time). Admin JWT token required."
+)
+def get_metrics(actor: AuthenticatedActor = Depends(require_admin)):
+    return {"audit_writer": audit_writer.stats(), "decision_rollups": {"mode": "rollup" if decision_rollup_service.rollup_enabled() else "full", "pending_count": decision_rollup_service.pending_count()}, "auth_cache": {**auth_cache_stats(), "api_keys": api_key_service.cache_stats()}, "password_pool": password_hasher.stats(), "region_resolver": get_resolver().stats()}
+
+
+@router.post(
+    "/geoip/reload",
+    description="Reload the GeoIP database from GEOIP_DB_PATH without restarting. The new file is validated before it is swapped in; on failure the current database keeps serving. The region cache starts empty after a swap. Admin JWT token required."
+)
+def reload_geoip(actor: AuthenticatedActor = Depends(require_admin)):
     try:
-        db.add(new_admin)
-        db.commit()
-        db.refresh(new_admin)
-        return AdminCreateResponse(id=new_admin.id, email=new_admin.email, created_at=new_admin.created_at.isoformat())
-    except IntegrityError:
-        db.rollback()
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="admin_email_already_exists")
+        return reload_geoip_database()
+    except ValueError as exc:
+        handle_service_error(exc)
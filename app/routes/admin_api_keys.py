@@ -0,0 +1,57 @@
+from typing import List
+from uuid import UUID
+from fastapi import APIRouter, Depends, status
+from sqlalchemy.orm import Session
+from app.db.database import get_db
+from app.schemas.auth import ApiKeyCreateRequest, ApiKeyCreateResponse, ApiKeyResponse
+from app.services import api_key_service
+from app.utils.errors import handle_service_error
+from app.utils.security import AuthenticatedActor, require_admin
+
+router = APIRouter(prefix="/admin/api-keys", tags=["admin"])
+
+
+@router.post(
+    "",
+    response_model=ApiKeyCreateResponse,
+    status_code=status.HTTP_201_CREATED,
+    description="Create an API key for a machine client, sent as the X-API-Key header. Scopes are the first path segments the key may call (e.g. 'decision'). Keys without a user_id act as a service across users and may only hold the 'decision' and 'region' scopes; admin routes never accept API keys. The plaintext key is returned only once. Admin JWT token required."
+)
+def create_api_key(
+    payload: ApiKeyCreateRequest,
+    db: Session = Depends(get_db),
+    actor: AuthenticatedActor = Depends(require_admin),
+):
+    try:
+        record, raw_key = api_key_service.create_api_key(db, payload.name, payload.scopes, user_id=payload.user_id, created_by=str(actor.id))
+        return ApiKeyCreateResponse(**ApiKeyResponse.model_validate(record).model_dump(), api_key=raw_key)
+    except ValueError as exc:
+        handle_service_error(exc)
+
+
+@router.get(
+    "",
+    response_model=List[ApiKeyResponse],
+    description="List API keys (without secrets), newest first. Admin JWT token required."
+)
+def list_api_keys(
+    db: Session = Depends(get_db),
+    actor: AuthenticatedActor = Depends(require_admin),
+):
+    return api_key_service.list_api_keys(db)
+
+
+@router.delete(
+    "/{key_id}",
+    response_model=ApiKeyResponse,
+    description="Revoke an API key. Other workers stop accepting it within API_KEY_REVOCATION_POLL_SECONDS. Admin JWT token required."
+)
+def revoke_api_key(
+    key_id: UUID,
+    db: Session = Depends(get_db),
+    actor: AuthenticatedActor = Depends(require_admin),
+):
+    try:
+        return api_key_service.revoke_api_key(db, key_id)
+    except ValueError as exc:
+        handle_service_error(exc)
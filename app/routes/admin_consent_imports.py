@@ -0,0 +1,73 @@
+import os
+import tempfile
+from typing import Literal
+from uuid import UUID
+from fastapi import APIRouter, BackgroundTasks, Depends, Query, Request, status
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from app.db.database import get_db
+from app.models.imports import ConsentImportJob
+from app.schemas.consent import ConsentImportJobResponse
+from app.services import consent_import_service
+from app.utils.errors import handle_service_error
+from app.utils.security import AuthenticatedActor, require_admin
+
+router = APIRouter(prefix="/admin/consent-imports", tags=["admin"])
+
+
+def _run_spooled_import(bind: Engine, job_id: UUID, path: str) -> None:
+    """Runs after the response on its own session; the request's session is closed by then."""
+    session = Session(bind=bind)
+    try:
+        with open(path, "rb") as stream:
+            consent_import_service.run_import(session, session.get(ConsentImportJob, job_id), stream, actor_type="admin")
+    finally:
+        session.close()
+        os.unlink(path)
+
+
+@router.post(
+    "",
+    response_model=ConsentImportJobResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    openapi_extra={"requestBody": {"content": {"text/csv": {"schema": {"type": "string"}}, "application/x-ndjson": {"schema": {"type": "string"}}}, "required": True}},
+    description="Bulk-import consent records from a CSV file (with a header row) or NDJSON. Each record has user_id or external_id, purpose and status, and optionally region, timestamp, expires_at and source. The body is spooled to disk and imported in the background; poll GET /admin/consent-imports/{job_id} for progress. Admin JWT token required."
+)
+async def create_consent_import(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    format: Literal["csv", "ndjson"] = Query("ndjson"),
+    db: Session = Depends(get_db),
+    actor: AuthenticatedActor = Depends(require_admin),
+):
+    # File and database I/O go to the threadpool so a large upload or a slow commit never blocks the event loop.
+    spool = await run_in_threadpool(tempfile.NamedTemporaryFile, prefix="consent-import-", delete=False)
+    try:
+        async for chunk in request.stream():
+            await run_in_threadpool(spool.write, chunk)
+    finally:
+        await run_in_threadpool(spool.close)
+    try:
+        job = await run_in_threadpool(consent_import_service.create_import_job, db, format, submitted_by=str(actor.id))
+    except ValueError as exc:
+        await run_in_threadpool(os.unlink, spool.name)
+        handle_service_error(exc)
+    background_tasks.add_task(_run_spooled_import, db.get_bind(), job.id, spool.name)
+    return job
+
+
+@router.get(
+    "/{job_id}",
+    response_model=ConsentImportJobResponse,
+    description="Progress and outcome of a bulk consent import: rows read, imported and rejected so far, and the first rejected rows with their error codes. Admin JWT token required."
+)
+def get_consent_import(
+    job_id: UUID,
+    db: Session = Depends(get_db),
+    actor: AuthenticatedActor = Depends(require_admin),
+):
+    try:
+        return consent_import_service.get_import_job(db, job_id)
+    except ValueError as exc:
+        handle_service_error(exc)
@@ -1,10 +1,11 @@
-from typing import List, Set
-from fastapi import APIRouter, Depends
+from typing import List
+from fastapi import APIRouter, Depends, status
 from sqlalchemy.orm import Session
 from app.db.database import get_db
-from app.models.audit import AuditLog
-from app.models.consent import ConsentHistory
-from app.schemas.policy import PolicySnapshotResponse
+from app.models.policy import PolicyDefinition, PolicySnapshot
+from app.schemas.policy import PolicySnapshotResponse, PolicyVersionCreate, PolicyVersionResponse
+from app.services import policy_engine
+from app.utils.errors import handle_service_error
 from app.utils.security import AuthenticatedActor, require_admin
 
 router = APIRouter(prefix="/admin/policies", tags=["admin"])
@@ -13,30 +14,67 @@ router = APIRouter(prefix="/admin/policies", tags=["admin"])
 @router.get(
     "/snapshots",
     response_model=List[PolicySnapshotResponse],
-    description="Get all policy snapshots. Admin JWT token required."
+    description="Get all distinct policy snapshots referenced by consent history and audit logs. Admin JWT token required."
 )
 def get_policy_snapshots(
     db: Session = Depends(get_db),
     actor: AuthenticatedActor = Depends(require_admin),
 ):
-    consent_query = db.query(ConsentHistory.policy_snapshot, ConsentHistory.region, ConsentHistory.tenant_id, ConsentHistory.timestamp).filter(ConsentHistory.policy_snapshot.isnot(None))
-    audit_query = db.query(AuditLog.policy_snapshot, AuditLog.tenant_id, AuditLog.event_time.label("timestamp")).filter(AuditLog.policy_snapshot.isnot(None))
-    
-    def _get_snapshot_key(snapshot) -> str:
-        return str(sorted(snapshot.items())) if isinstance(snapshot, dict) else str(snapshot)
-    
-    def _process_snapshot_row(row, source: str):
-        if not row.policy_snapshot:
-            return None, None
-        key = _get_snapshot_key(row.policy_snapshot)
-        region_val = row.region.value if hasattr(row, 'region') and row.region else (row.policy_snapshot.get("region") if isinstance(row.policy_snapshot, dict) else None)
-        return key, PolicySnapshotResponse(snapshot=row.policy_snapshot, region=region_val, tenant_id=row.tenant_id, timestamp=row.timestamp, source=source)
-    
-    seen_snapshots: Set[str] = set()
-    unique_snapshots: List[PolicySnapshotResponse] = []
-    for row in consent_query.all() + audit_query.all():
-        key, snapshot = _process_snapshot_row(row, "consent_history" if hasattr(row, 'region') else "audit_logs")
-        if key and snapshot and key not in seen_snapshots:
-            seen_snapshots.add(key)
-            unique_snapshots.append(snapshot)
-    return unique_snapshots
+    return [
+        PolicySnapshotResponse(snapshot=row.snapshot, region=row.snapshot.get("region"), tenant_id=None, timestamp=row.created_at, source="policy_snapshots")
+        for row in db.query(PolicySnapshot).order_by(PolicySnapshot.created_at).all()
+    ]
+
+
+@router.get(
+    "",
+    response_model=List[PolicyVersionResponse],
+    description="List all policy definition versions, newest first. Admin JWT token required."
+)
+def list_policy_versions(
+    db: Session = Depends(get_db),
+    actor: AuthenticatedActor = Depends(require_admin),
+):
+    return db.query(PolicyDefinition).order_by(PolicyDefinition.version.desc()).all()
+
+
+@router.get(
+    "/active",
+    description="Get the policy definition currently compiled into this worker. Version 0 is the built-in default. Admin JWT token required."
+)
+def get_active_policy_definition(actor: AuthenticatedActor = Depends(require_admin)):
+    policy = policy_engine.get_active_policy()
+    return {"version": policy.version, "definition": policy.definition, "reason_codes": policy.reasons}
+
+
+@router.post(
+    "",
+    response_model=PolicyVersionResponse,
+    status_code=status.HTTP_201_CREATED,
+    description="Create a new policy definition version (regions, sensitive purposes, denied statuses and reason codes per framework). The definition is compiled before it is stored; with publish=true (default) it becomes active immediately. Admin JWT token required."
+)
+def create_policy_version(
+    payload: PolicyVersionCreate,
+    db: Session = Depends(get_db),
+    actor: AuthenticatedActor = Depends(require_admin),
+):
+    try:
+        return policy_engine.create_policy_version(db, payload.definition.model_dump(), created_by=str(actor.id), publish=payload.publish)
+    except ValueError as exc:
+        handle_service_error(exc)
+
+
+@router.post(
+    "/{version}/publish",
+    response_model=PolicyVersionResponse,
+    description="Activate an existing policy definition version, e.g. to roll back. Admin JWT token required."
+)
+def publish_policy_version(
+    version: int,
+    db: Session = Depends(get_db),
+    actor: AuthenticatedActor = Depends(require_admin),
+):
+    try:
+        return policy_engine.publish_policy_version(db, version)
+    except ValueError as exc:
+        handle_service_error(exc)
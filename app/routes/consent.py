@@ -1,27 +1,74 @@
-from fastapi import APIRouter, Depends
+from datetime import datetime
+from typing import List, Optional
+from uuid import UUID
+from fastapi import APIRouter, Depends, Header, Query
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 from app.db.database import get_db
-from app.schemas.consent import ConsentResponse, CreateConsentRequest
-from app.services import consent_service
+from app.models.consent import PurposeEnum
+from app.schemas.consent import ConsentAsOfBulkRequest, ConsentAsOfBulkResponse, ConsentAsOfEntry, ConsentAsOfResponse, ConsentHistoryPage, ConsentResponse, CreateConsentRequest
+from app.services import consent_service, idempotency_service, user_service
 from app.utils.errors import handle_service_error
-from app.utils.security import AuthenticatedActor, get_current_actor, security_scheme, validate_user_action
+from app.utils.helpers import ensure_utc
+from app.utils.security import AuthenticatedActor, get_current_actor, require_admin, security_scheme, validate_user_action
 
 router = APIRouter(prefix="/consent", tags=["consent"])
 
 
-def _handle_consent(action, request: CreateConsentRequest, db: Session, actor: AuthenticatedActor):
+def _as_of_response(user_id: UUID, at: datetime, state: consent_service.AsOfState, purposes: List[PurposeEnum]) -> ConsentAsOfResponse:
+    consents = []
+    for purpose in purposes:
+        row = state.get(purpose)
+        consents.append(ConsentAsOfEntry(purpose=purpose, status=consent_service.status_as_of(row, at), consent_id=row.id, recorded_at=row.timestamp, expires_at=row.expires_at, valid_until=row.valid_until) if row else ConsentAsOfEntry(purpose=purpose))
+    return ConsentAsOfResponse(user_id=user_id, at=at, consents=consents)
+
+
+def _handle_consent(action, request: CreateConsentRequest, db: Session, actor: AuthenticatedActor, idempotency_key: Optional[str]):
     try:
         validate_user_action(actor, request.user_id)
-        return action(db=db, user_id=request.user_id, purpose=request.purpose, region=request.region, expires_at=request.get_expires_at(), actor=actor)
+        write = lambda: action(db=db, user_id=request.user_id, purpose=request.purpose, region=request.region, expires_at=request.get_expires_at(), actor=actor)
+        if not idempotency_key:
+            return write()
+        fingerprint = idempotency_service.request_fingerprint(action.__name__, request.model_dump(mode="json"))
+        (status_code, body, headers), replayed = idempotency_service.run_idempotent(db, idempotency_service.idempotency_scope(actor), idempotency_key, fingerprint, lambda: (201, ConsentResponse.model_validate(write()).model_dump(mode="json"), {}))
+        return JSONResponse(body, status_code=status_code, headers={**headers, **({"Idempotent-Replayed": "true"} if replayed else {})})
+    except ValueError as exc:
+        handle_service_error(exc)
+
+
+@router.post("/grant", response_model=ConsentResponse, status_code=201, description="Grant consent for a purpose. Granting what is already in force returns the current record without writing a new one. Send an Idempotency-Key header to have retries replay the first response. User JWT token required - users can only grant consent for themselves.", dependencies=[Depends(security_scheme)])
+def grant_consent(request: CreateConsentRequest, idempotency_key: Optional[str] = Header(None, max_length=255), db: Session = Depends(get_db), actor: AuthenticatedActor = Depends(get_current_actor)):
+    return _handle_consent(consent_service.grant_consent, request, db, actor, idempotency_key)
+
+
+@router.post("/revoke", response_model=ConsentResponse, status_code=201, description="Revoke consent for a purpose. Revoking what is already revoked returns the current record without writing a new one. Send an Idempotency-Key header to have retries replay the first response. User JWT token required - users can only revoke consent for themselves.", dependencies=[Depends(security_scheme)])
+def revoke_consent(request: CreateConsentRequest, idempotency_key: Optional[str] = Header(None, max_length=255), db: Session = Depends(get_db), actor: AuthenticatedActor = Depends(get_current_actor)):
+    return _handle_consent(consent_service.revoke_consent, request, db, actor, idempotency_key)
+
+
+@router.get("/history/{user_id}", response_model=ConsentHistoryPage, description="Consent history, newest first, one page at a time. Pass next_cursor back as cursor to get the following page; it is null on the last page. User JWT token required - users can only view their own history.")
+def read_history(user_id: UUID, limit: int = Query(consent_service.HISTORY_PAGE_SIZE, ge=1, le=consent_service.MAX_HISTORY_PAGE_SIZE), cursor: Optional[str] = Query(None), db: Session = Depends(get_db), actor: AuthenticatedActor = Depends(get_current_actor)):
+    try:
+        validate_user_action(actor, user_id)
+        user_service.get_user(db, user_id)
+        items, next_cursor = consent_service.get_history_page(db, user_id, limit=limit, cursor=cursor)
+        return ConsentHistoryPage(items=[ConsentResponse.model_validate(row) for row in items], next_cursor=next_cursor)
     except ValueError as exc:
         handle_service_error(exc)
 
 
-@router.post("/grant", response_model=ConsentResponse, status_code=201, description="Grant consent for a purpose. User JWT token required - users can only grant consent for themselves.", dependencies=[Depends(security_scheme)])
-def grant_consent(request: CreateConsentRequest, db: Session = Depends(get_db), actor: AuthenticatedActor = Depends(get_current_actor)):
-    return _handle_consent(consent_service.grant_consent, request, db, actor)
+@router.get("/as-of", response_model=ConsentAsOfResponse, description="Consent state per purpose as it stood at the instant `at` (status null when nothing had been recorded yet). Restrict with one or more `purpose` parameters. User JWT token required - users can only view their own consent.")
+def read_consent_as_of(user_id: UUID = Query(...), at: datetime = Query(...), purpose: Optional[List[PurposeEnum]] = Query(None), db: Session = Depends(get_db), actor: AuthenticatedActor = Depends(get_current_actor)):
+    try:
+        validate_user_action(actor, user_id)
+        purposes, at = purpose or list(PurposeEnum), ensure_utc(at)
+        return _as_of_response(user_id, at, consent_service.get_consent_as_of(db, user_id, at, purposes), purposes)
+    except ValueError as exc:
+        handle_service_error(exc)
 
 
-@router.post("/revoke", response_model=ConsentResponse, status_code=201, description="Revoke consent for a purpose. User JWT token required - users can only revoke consent for themselves.", dependencies=[Depends(security_scheme)])
-def revoke_consent(request: CreateConsentRequest, db: Session = Depends(get_db), actor: AuthenticatedActor = Depends(get_current_actor)):
-    return _handle_consent(consent_service.revoke_consent, request, db, actor)
+@router.post("/as-of/bulk", response_model=ConsentAsOfBulkResponse, description="Point-in-time consent state for many users at once. Admin token required.")
+def read_consents_as_of(payload: ConsentAsOfBulkRequest, db: Session = Depends(get_db), actor: AuthenticatedActor = Depends(require_admin)):
+    purposes, at = payload.purposes or list(PurposeEnum), ensure_utc(payload.at)
+    states = consent_service.get_consents_as_of(db, list(dict.fromkeys(payload.user_ids)), at, purposes)
+    return ConsentAsOfBulkResponse(at=at, results=[_as_of_response(user_id, at, state, purposes) for user_id, state in states.items()], missing_user_ids=[user_id for user_id in dict.fromkeys(payload.user_ids) if user_id not in states])
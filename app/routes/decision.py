@@ -1,13 +1,20 @@
+import json
+from functools import cache
+from datetime import datetime
+from typing import Iterator, List, Literal, Optional, Union
 from uuid import UUID
-from fastapi import APIRouter, Depends, Query, Request
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import Session
 from app.db.database import get_db
 from app.models.consent import PurposeEnum
-from app.schemas.decision import DecisionResponse
-from app.services.decision_service import decide
+from app.schemas.decision import DecisionAllCompactResponse, DecisionAllResponse, DecisionAsOfResponse, DecisionBatchRequest, DecisionResponse, DecisionTokenResponse
+from app.services.decision_service import DecisionTarget, FallbackRegion, decide, decide_all, decide_as_of, encode_decisions_compact, get_decision_etag, iter_decide_batch
+from app.services.decision_token_service import get_jwks, issue_decision_token
 from app.services.region_service import detect_region_from_ip
 from app.utils.errors import handle_service_error
-from app.utils.helpers import extract_client_ip
+from app.utils.helpers import etag_matches, extract_client_ip
 from app.utils.security import AuthenticatedActor, get_current_actor, validate_user_action
 
 router = APIRouter(tags=["decision"])
@@ -16,11 +23,103 @@ router = APIRouter(tags=["decision"])
 @router.get(
     "/decision",
     response_model=DecisionResponse,
-    description="Get consent decision for a user and purpose. User JWT token required - users can only check decisions for themselves."
+    responses={304: {"description": "Decision unchanged since the ETag sent in If-None-Match"}},
+    description="Get consent decision for a user and purpose. Returns an ETag covering the consent state, policy version and evaluated region; a matching If-None-Match gets 304 Not Modified without re-evaluating. 304s are not audited: the audit trail already holds the decision the ETag was issued with. User JWT token required - users can only check decisions for themselves."
 )
-def get_decision(request: Request, user_id: UUID = Query(...), purpose: PurposeEnum = Query(...), db: Session = Depends(get_db), actor: AuthenticatedActor = Depends(get_current_actor)):
+def get_decision(request: Request, response: Response, user_id: UUID = Query(...), purpose: PurposeEnum = Query(...), if_none_match: Optional[str] = Header(None), db: Session = Depends(get_db), actor: AuthenticatedActor = Depends(get_current_actor)):
     try:
         validate_user_action(actor, user_id)
-        return decide(db, user_id, purpose, fallback_region=detect_region_from_ip(extract_client_ip(request)), actor=actor)
+        fallback_region = cache(lambda: detect_region_from_ip(extract_client_ip(request)))
+        etag = get_decision_etag(db, user_id, fallback_region=fallback_region)
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+        response.headers["ETag"] = etag
+        return decide(db, user_id, purpose, fallback_region=fallback_region, actor=actor)
     except ValueError as exc:
         handle_service_error(exc)
+
+
+@router.get(
+    "/decision/all",
+    response_model=Union[DecisionAllResponse, DecisionAllCompactResponse],
+    responses={304: {"description": "Decisions unchanged since the ETag sent in If-None-Match"}},
+    description="Get consent decisions for every purpose of a user in one call. ETag and 304 handling (unaudited) as for /decision. format=compact returns a bitmask of allowed purposes (bit i = purposes[i]) plus reason codes indexing into reasons. User JWT token required - users can only check decisions for themselves."
+)
+def get_all_decisions(request: Request, response: Response, user_id: UUID = Query(...), format: Literal["full", "compact"] = Query("full"), if_none_match: Optional[str] = Header(None), db: Session = Depends(get_db), actor: AuthenticatedActor = Depends(get_current_actor)):
+    try:
+        validate_user_action(actor, user_id)
+        fallback_region = cache(lambda: detect_region_from_ip(extract_client_ip(request)))
+        etag = get_decision_etag(db, user_id, fallback_region=fallback_region)
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+        response.headers["ETag"] = etag
+        result = decide_all(db, user_id, fallback_region=fallback_region, actor=actor)
+    except ValueError as exc:
+        handle_service_error(exc)
+    if format == "compact":
+        return DecisionAllCompactResponse(user_id=result["user_id"], region=result["region"], policy_version=result["policy_snapshot"]["policy_version"], **encode_decisions_compact(result["decisions"]))
+    return DecisionAllResponse(user_id=result["user_id"], region=result["region"], policy_snapshot=result["policy_snapshot"], decisions=[{"purpose": purpose, "allowed": allowed, "reason": reason} for purpose, (allowed, reason) in result["decisions"].items()])
+
+
+@router.get(
+    "/decision/as-of",
+    response_model=DecisionAsOfResponse,
+    description="Replay consent decisions as of a past instant: the consent in force at `at`, evaluated by the policy version published at that time. Nothing is audited. Restrict with one or more `purpose` parameters. User JWT token required - users can only check decisions for themselves."
+)
+def get_decisions_as_of(user_id: UUID = Query(...), at: datetime = Query(...), purpose: Optional[List[PurposeEnum]] = Query(None), db: Session = Depends(get_db), actor: AuthenticatedActor = Depends(get_current_actor)):
+    try:
+        validate_user_action(actor, user_id)
+        result = decide_as_of(db, user_id, at, purpose)
+    except ValueError as exc:
+        handle_service_error(exc)
+    return DecisionAsOfResponse(user_id=result["user_id"], at=result["at"], policy_version=result["policy_version"], decisions=[{"purpose": purpose, "region": region, "allowed": allowed, "reason": reason} for purpose, (region, allowed, reason) in result["decisions"].items()])
+
+
+@router.get(
+    "/decision/token",
+    response_model=DecisionTokenResponse,
+    description="Get a short-lived signed token (JWT) carrying the user's decision for every purpose and the policy version, for offline verification at the edge against /.well-known/jwks.json. User JWT token required - users can only request tokens for themselves."
+)
+def get_decision_token(request: Request, user_id: UUID = Query(...), db: Session = Depends(get_db), actor: AuthenticatedActor = Depends(get_current_actor)):
+    try:
+        validate_user_action(actor, user_id)
+        return issue_decision_token(db, user_id, fallback_region=lambda: detect_region_from_ip(extract_client_ip(request)), actor=actor)
+    except ValueError as exc:
+        handle_service_error(exc)
+
+
+@router.get(
+    "/.well-known/jwks.json",
+    description="Public keys for verifying decision tokens. Empty when tokens are HS256-signed with a shared secret. No authentication required."
+)
+def get_decision_token_jwks():
+    return get_jwks()
+
+
+def _serialize_batch_result(result: dict) -> str:
+    return json.dumps({key: (value.value if hasattr(value, "value") else str(value) if isinstance(value, UUID) else value) for key, value in result.items()}) + "\n"
+
+
+def _stream_batch(bind: Engine, targets: List[DecisionTarget], fallback_region: FallbackRegion, actor: AuthenticatedActor) -> Iterator[str]:
+    """Runs while the response is sent, on its own session; the request's session is closed by then."""
+    session = Session(bind=bind)
+    try:
+        for result in iter_decide_batch(session, targets, fallback_region=fallback_region, actor=actor):
+            yield _serialize_batch_result(result)
+    finally:
+        session.close()
+
+
+@router.post(
+    "/decision/batch",
+    description="Evaluate consent decisions for many (user_id or external_id, purpose) pairs in one request. Results are streamed as newline-delimited JSON in request order, one chunk of users at a time; users without a stored region are evaluated in the region of the caller's IP. Admin JWT token required for other users or external IDs - users can only check decisions for themselves."
+)
+def post_decision_batch(request: Request, payload: DecisionBatchRequest, db: Session = Depends(get_db), actor: AuthenticatedActor = Depends(get_current_actor)):
+    for item in payload.items:
+        if item.external_id is not None and actor.role not in ("admin", "service"):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="admin_required")
+        if item.user_id is not None:
+            validate_user_action(actor, item.user_id)
+    targets = [(item.user_id, item.external_id, item.purpose) for item in payload.items]
+    client_ip = extract_client_ip(request)
+    return StreamingResponse(_stream_batch(db.get_bind(), targets, lambda: detect_region_from_ip(client_ip), actor), media_type="application/x-ndjson")
@@ -1,10 +1,14 @@
+from typing import Optional
 from uuid import UUID
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Header, Response, status
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 from app.db.database import get_db
 from app.schemas.preferences import PreferencesResponse, PreferencesUpdateRequest
-from app.services.preferences_service import get_latest_preferences, update_preferences
+from app.services import idempotency_service
+from app.services.preferences_service import get_consent_etag, get_latest_preferences, parse_etag_version, update_preferences
 from app.utils.errors import handle_service_error
+from app.utils.helpers import etag_matches
 from app.utils.security import AuthenticatedActor, get_current_actor, validate_user_action
 
 router = APIRouter(prefix="/consent", tags=["preferences"])
@@ -13,12 +17,17 @@ router = APIRouter(prefix="/consent", tags=["preferences"])
 @router.get(
     "/preferences/{user_id}",
     response_model=PreferencesResponse,
-    description="Get user preferences. User JWT token required - users can only view their own preferences."
+    responses={304: {"description": "Preferences unchanged since the ETag sent in If-None-Match"}},
+    description="Get user preferences. Returns an ETag; send it back in If-None-Match to get 304 Not Modified while nothing changed. User JWT token required - users can only view their own preferences."
 )
-def read_preferences(user_id: UUID, db: Session = Depends(get_db), actor: AuthenticatedActor = Depends(get_current_actor)):
+def read_preferences(user_id: UUID, response: Response, if_none_match: Optional[str] = Header(None), db: Session = Depends(get_db), actor: AuthenticatedActor = Depends(get_current_actor)):
     try:
         validate_user_action(actor, user_id)
+        etag = get_consent_etag(db, user_id)
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
         region, preferences = get_latest_preferences(db, user_id)
+        response.headers["ETag"] = etag
         return PreferencesResponse(user_id=user_id, region=region, preferences=preferences)
     except ValueError as exc:
         handle_service_error(exc)
@@ -28,13 +37,28 @@ def read_preferences(user_id: UUID, db: Session = Depends(get_db), actor: Authen
     "/preferences/update",
     response_model=PreferencesResponse,
     status_code=200,
-    description="Update user preferences. User JWT token required - users can only update their own preferences."
+    responses={412: {"description": "If-Match did not match the current consent version"}},
+    description="Update user preferences. Purposes whose status would not change are skipped; when nothing changes no history is written and the ETag stays the same. Send the ETag from a previous read in If-Match to apply the update only if nothing changed since (412 otherwise). Send an Idempotency-Key header to have retries replay the first response. User JWT token required - users can only update their own preferences."
 )
-def post_update_preferences(request: PreferencesUpdateRequest, db: Session = Depends(get_db), actor: AuthenticatedActor = Depends(get_current_actor)):
+def post_update_preferences(request: PreferencesUpdateRequest, response: Response, if_match: Optional[str] = Header(None), idempotency_key: Optional[str] = Header(None, max_length=255), db: Session = Depends(get_db), actor: AuthenticatedActor = Depends(get_current_actor)):
     try:
         validate_user_action(actor, request.user_id)
-        region, preferences = update_preferences(db, request.user_id, request.updates, actor=actor)
-        return PreferencesResponse(user_id=request.user_id, region=region, preferences=preferences)
+        expected_version = None
+        if if_match and if_match.strip() != "*":
+            expected_version = parse_etag_version(if_match)
+            if expected_version is None:
+                raise ValueError("version_conflict")
+
+        def write() -> idempotency_service.StoredResponse:
+            region, preferences = update_preferences(db, request.user_id, request.updates, actor=actor, expected_version=expected_version)
+            return 200, PreferencesResponse(user_id=request.user_id, region=region, preferences=preferences).model_dump(mode="json"), {"ETag": get_consent_etag(db, request.user_id)}
+
+        if not idempotency_key:
+            _, body, headers = write()
+            response.headers.update(headers)
+            return body
+        fingerprint = idempotency_service.request_fingerprint("update_preferences", request.model_dump(mode="json"), if_match)
+        (status_code, body, headers), replayed = idempotency_service.run_idempotent(db, idempotency_service.idempotency_scope(actor), idempotency_key, fingerprint, write)
+        return JSONResponse(body, status_code=status_code, headers={**headers, **({"Idempotent-Replayed": "true"} if replayed else {})})
     except ValueError as exc:
         handle_service_error(exc)
-
@@ -1,10 +1,13 @@
+import json
 from typing import Optional
 from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from app.models.consent import RegionEnum
-from app.services.region_service import detect_region_from_ip
+from app.services.region_service import detect_region_from_ip, parse_ip_list, resolve_regions
+from app.utils.errors import handle_service_error
 from app.utils.helpers import extract_client_ip
-from app.utils.security import AuthenticatedActor, get_current_actor
+from app.utils.security import AuthenticatedActor, get_current_actor, require_admin_or_service
 
 router = APIRouter(prefix="/region", tags=["region"])
 
@@ -37,3 +40,16 @@ def get_region(request: Request, ip: Optional[str] = Query(None), actor: Authent
     input_ip = ip or extract_client_ip(request) or "127.0.0.1"
     detected_region = detect_region_from_ip(input_ip)
     return RegionResponse(ip=input_ip, region=_REGION_NAME_MAP.get(detected_region, "Rest"), detected=detected_region != RegionEnum.ROW)
+
+
+@router.post(
+    "/batch",
+    openapi_extra={"requestBody": {"content": {"application/json": {"schema": {"type": "array", "items": {"type": "string"}}}, "text/plain": {"schema": {"type": "string"}}}, "required": True}},
+    description="Resolve many IPs to compliance regions. Body is a JSON array of IPs or newline-delimited text; results stream back as newline-delimited JSON in input order. Private and invalid addresses resolve to ROW with detected=false. Admin JWT token or an API key with the 'region' scope required."
+)
+async def post_region_batch(request: Request, actor: AuthenticatedActor = Depends(require_admin_or_service)):
+    try:
+        ips = parse_ip_list(await request.body())
+    except (ValueError, UnicodeDecodeError):
+        handle_service_error(ValueError("invalid_ip_list"))
+    return StreamingResponse((json.dumps({"ip": ip, "region": region.value, "detected": detected}) + "\n" for ip, region, detected in resolve_regions(ips)), media_type="application/x-ndjson")
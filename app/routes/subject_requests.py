@@ -1,6 +1,9 @@
 from datetime import timedelta
+from typing import Any, Dict, Iterator
 from uuid import UUID
 from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import Session
 from app.db.database import get_db
 from app.models.consent import RequestTypeEnum, SubjectRequest
@@ -36,6 +39,15 @@ def _verify_token(token: str, request: SubjectRequest, expected_type: RequestTyp
         raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=f"Token mismatch: token is for '{data.get('request_type')}' but endpoint requires '{expected_type.value}'. Use /subject-requests/{data.get('request_type')}/{request.id}")
 
 
+def _stream_export(bind: Engine, request_id: UUID, head: Dict[str, Any], actor: AuthenticatedActor) -> Iterator[str]:
+    """Runs while the response is sent, on its own session; the request's session is closed by then."""
+    session = Session(bind=bind)
+    try:
+        yield from subject_request_service.stream_export(session, session.get(SubjectRequest, request_id), head, actor=actor)
+    finally:
+        session.close()
+
+
 @router.post(
     "",
     response_model=SubjectRequestOut,
@@ -63,15 +75,20 @@ def create_subject_request(payload: SubjectRequestIn, db: Session = Depends(get_
 
 @router.get(
     "/export/{request_id}",
-    response_model=DataExportResponse,
-    description="Get export data for a completed request. User JWT token required - users can only access their own export data."
+    response_class=StreamingResponse,
+    responses={200: {"model": DataExportResponse, "content": {"application/json": {}}}},
+    description="Get export data for a completed request. The document is streamed as it is read, so exports of long histories start immediately and use bounded memory. User JWT token required - users can only access their own export data."
 )
 def get_export(request_id: UUID, token: str = Query(...), db: Session = Depends(get_db), actor: AuthenticatedActor = Depends(get_current_actor)):
     request = _get_request(request_id, db)
     validate_user_action(actor, request.user_id)
     _validate_request_type(request, RequestTypeEnum.EXPORT, f"/subject-requests/access/{request_id} for access requests")
     _verify_token(token, request, RequestTypeEnum.EXPORT)
-    return subject_request_service.process_export_request(db, request, actor=actor)
+    try:
+        head = subject_request_service.process_export_request(db, request)
+    except ValueError as exc:
+        handle_service_error(exc)
+    return StreamingResponse(_stream_export(db.get_bind(), request.id, head, actor), media_type="application/json")
 
 
 @router.get(
@@ -2,9 +2,11 @@ from uuid import UUID
 from typing import Optional
 from fastapi import APIRouter, Depends, Request
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from app.db.database import get_db
 from app.schemas.user import UserCreate, UserCreateResponse, UserResponse
 from app.services import user_service
+from app.services.password_hasher import password_hasher
 from app.services.region_service import detect_region_from_ip
 from app.utils.errors import handle_service_error
 from app.utils.helpers import extract_client_ip
@@ -19,11 +21,12 @@ router = APIRouter(prefix="/users", tags=["users"])
     status_code=201,
     description="Create a new user. Returns an API key that should be stored securely - it is shown only once. Admin or User JWT token, or no auth (self-registration) allowed."
 )
-def create_user(user: UserCreate, request: Request, db: Session = Depends(get_db), actor: Optional[Actor] = Depends(get_optional_actor)):
+async def create_user(user: UserCreate, request: Request, db: Session = Depends(get_db), actor: Optional[Actor] = Depends(get_optional_actor)):
     try:
         if user.region is None:
             user.region = detect_region_from_ip(extract_client_ip(request))
-        created_user = user_service.create_user(db=db, email=user.email, region=user.region, password=user.password)
+        password_hash = await password_hasher.hash_async(user.password) if user.password else None
+        created_user = await run_in_threadpool(user_service.create_user, db=db, email=user.email, region=user.region, password_hash=password_hash)
         return UserCreateResponse(id=created_user.id, email=created_user.email, region=created_user.region, api_key=created_user.api_key, created_at=created_user.created_at, updated_at=created_user.updated_at)
     except ValueError as exc:
         handle_service_error(exc)
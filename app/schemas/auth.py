@@ -1,4 +1,6 @@
-from pydantic import BaseModel, EmailStr
+from datetime import datetime
+from typing import List, Optional
+from pydantic import BaseModel, ConfigDict, EmailStr, Field
 from uuid import UUID
 
 
@@ -29,3 +31,26 @@ class AdminCreateResponse(BaseModel):
     email: str
     created_at: str
 
+
+
+class ApiKeyCreateRequest(BaseModel):
+    name: str = Field(..., min_length=1, max_length=255)
+    scopes: List[str] = Field(..., min_length=1, description="First path segments the key may call, e.g. ['decision']")
+    user_id: Optional[UUID] = Field(None, description="Bind the key to one user; unbound keys act as a service across users within their scopes")
+
+
+class ApiKeyResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: UUID
+    prefix: str
+    name: str
+    scopes: List[str]
+    user_id: Optional[UUID] = None
+    created_by: Optional[str] = None
+    created_at: datetime
+    revoked_at: Optional[datetime] = None
+
+
+class ApiKeyCreateResponse(ApiKeyResponse):
+    api_key: str = Field(..., description="Plaintext key; shown only once")
@@ -1,5 +1,5 @@
 from datetime import datetime, timedelta
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 from uuid import UUID
 from pydantic import BaseModel, ConfigDict, Field, model_validator
 from app.models.consent import PurposeEnum, RegionEnum, StatusEnum
@@ -41,6 +41,38 @@ class ConsentResponse(BaseModel):
     policy_snapshot: Optional[Dict[str, Any]] = None
 
 
+class ConsentHistoryPage(BaseModel):
+    items: List[ConsentResponse]
+    next_cursor: Optional[str] = None
+
+
+class ConsentAsOfEntry(BaseModel):
+    purpose: PurposeEnum
+    status: Optional[StatusEnum] = None
+    consent_id: Optional[UUID] = None
+    recorded_at: Optional[datetime] = None
+    expires_at: Optional[datetime] = None
+    valid_until: Optional[datetime] = None
+
+
+class ConsentAsOfResponse(BaseModel):
+    user_id: UUID
+    at: datetime
+    consents: List[ConsentAsOfEntry]
+
+
+class ConsentAsOfBulkRequest(BaseModel):
+    user_ids: List[UUID] = Field(..., min_length=1, max_length=10000)
+    at: datetime
+    purposes: Optional[List[PurposeEnum]] = None
+
+
+class ConsentAsOfBulkResponse(BaseModel):
+    at: datetime
+    results: List[ConsentAsOfResponse]
+    missing_user_ids: List[UUID] = []
+
+
 class AuditLogResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
@@ -61,3 +93,29 @@ class AuditLogResponse(BaseModel):
         return data
 
 
+class DecisionRollupResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    bucket_start: datetime
+    tenant_id: Optional[str] = None
+    region: str
+    purpose: str
+    allowed: bool
+    reason: str
+    count: int
+
+
+class ConsentImportJobResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: UUID
+    status: str
+    source_format: str
+    submitted_by: Optional[str] = None
+    total_rows: int
+    imported_rows: int
+    rejected_rows: int
+    errors: Optional[List[Dict[str, Any]]] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
@@ -1,6 +1,7 @@
-from typing import Any, Dict
+from datetime import datetime
+from typing import Any, Dict, List, Optional
 from uuid import UUID
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, model_validator
 from app.models.consent import PurposeEnum, RegionEnum
 
 
@@ -12,3 +13,62 @@ class DecisionResponse(BaseModel):
     reason: str
     policy_snapshot: Dict[str, Any]
 
+
+class PurposeDecision(BaseModel):
+    purpose: PurposeEnum
+    allowed: bool
+    reason: str
+
+
+class DecisionAllResponse(BaseModel):
+    user_id: UUID
+    region: RegionEnum
+    decisions: List[PurposeDecision]
+    policy_snapshot: Dict[str, Any]
+
+
+class AsOfDecision(BaseModel):
+    purpose: PurposeEnum
+    region: RegionEnum
+    allowed: bool
+    reason: str
+
+
+class DecisionAsOfResponse(BaseModel):
+    user_id: UUID
+    at: datetime
+    policy_version: int
+    decisions: List[AsOfDecision]
+
+
+class DecisionAllCompactResponse(BaseModel):
+    user_id: UUID
+    region: RegionEnum
+    purposes: List[PurposeEnum]
+    allowed_mask: int
+    reason_codes: List[int]
+    reasons: List[str]
+    policy_version: int
+
+
+class DecisionTokenResponse(BaseModel):
+    token: str
+    token_type: str
+    algorithm: str
+    expires_in: int
+
+
+class DecisionBatchItem(BaseModel):
+    user_id: Optional[UUID] = None
+    external_id: Optional[str] = None
+    purpose: PurposeEnum
+
+    @model_validator(mode="after")
+    def validate_identifier(self):
+        if (self.user_id is None) == (self.external_id is None):
+            raise ValueError("Provide exactly one of 'user_id' or 'external_id' for each batch item.")
+        return self
+
+
+class DecisionBatchRequest(BaseModel):
+    items: List[DecisionBatchItem] = Field(..., min_length=1, max_length=10000)
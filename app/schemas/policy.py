@@ -1,6 +1,7 @@
 from datetime import datetime
-from typing import Any, Dict, Optional
-from pydantic import BaseModel
+from typing import Any, Dict, List, Literal, Optional
+from pydantic import BaseModel, ConfigDict, Field, model_validator
+from app.models.consent import PurposeEnum, RegionEnum, StatusEnum
 
 
 class PolicySnapshotResponse(BaseModel):
@@ -9,3 +10,54 @@ class PolicySnapshotResponse(BaseModel):
     tenant_id: Optional[str] = None
     timestamp: Optional[datetime] = None
     source: str
+
+
+class PolicyReasons(BaseModel):
+    granted: str
+    requires_grant: str
+    denied: str = Field(..., description="Reason for an explicit denial; '{status}' is replaced with the consent status.")
+    default_allow: str
+
+
+class PolicyFramework(BaseModel):
+    regions: List[RegionEnum] = Field(default_factory=list)
+    requires_explicit: bool
+    default: Literal["allow", "deny"] = Field(..., description="Reported in policy snapshots.")
+    reasons: PolicyReasons
+
+
+class PolicyDefinition(BaseModel):
+    model_config = ConfigDict(use_enum_values=True)
+
+    frameworks: Dict[str, PolicyFramework] = Field(..., min_length=1)
+    fallback_framework: str = Field(..., description="Framework applied to regions not listed by any framework.")
+    sensitive_purposes: List[PurposeEnum]
+    denied_statuses: List[StatusEnum]
+
+    @model_validator(mode="after")
+    def validate_frameworks(self):
+        if self.fallback_framework not in self.frameworks:
+            raise ValueError(f"fallback_framework '{self.fallback_framework}' is not a defined framework")
+        seen: Dict[str, str] = {}
+        for name, framework in self.frameworks.items():
+            for region in framework.regions:
+                if region in seen:
+                    raise ValueError(f"Region '{region}' is assigned to both '{seen[region]}' and '{name}'")
+                seen[region] = name
+        return self
+
+
+class PolicyVersionCreate(BaseModel):
+    definition: PolicyDefinition
+    publish: bool = True
+
+
+class PolicyVersionResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    version: int
+    definition: Dict[str, Any]
+    is_active: bool
+    created_by: Optional[str] = None
+    created_at: datetime
+    published_at: Optional[datetime] = None
@@ -0,0 +1,130 @@
+import hashlib
+import hmac
+import logging
+import secrets
+from datetime import datetime, timedelta
+from typing import List, Optional, Sequence, Tuple
+from uuid import UUID
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.db.database import SessionLocal
+from app.models.api_key import ApiKey
+from app.models.consent import User
+from app.services import user_service
+from app.utils.cache import TTLCache
+from app.utils.helpers import get_utc_now
+from app.utils.security import Actor
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "cps"
+# Scopes are the first path segment of the routes a key may call, e.g. "decision" covers /decision, /decision/all, /decision/batch.
+# Admin routes are never reachable with a key: admin work needs an admin JWT.
+API_KEY_SCOPES = ("decision", "consent", "region", "users", "subject-requests")
+# Keys not bound to a user act as a "service" for any user, so they are limited to read-only lookups.
+SERVICE_KEY_SCOPES = ("decision", "region")
+
+# prefix -> (key hash, actor); revocations are propagated by refresh_revocations.
+_key_cache = TTLCache(maxsize=settings.API_KEY_CACHE_SIZE, ttl_seconds=settings.API_KEY_CACHE_TTL_SECONDS)
+_last_revocation_check: datetime = get_utc_now()
+
+
+def _hash_key(raw_key: str) -> str:
+    return hashlib.sha256(raw_key.encode("utf-8")).hexdigest()
+
+
+def _split_key(raw_key: str) -> Optional[Tuple[str, str]]:
+    parts = raw_key.strip().split("_", 2)
+    if len(parts) != 3 or parts[0] != KEY_PREFIX or not parts[1] or not parts[2]:
+        return None
+    return parts[1], parts[2]
+
+
+def required_scope(path: str) -> str:
+    return path.strip("/").split("/", 1)[0]
+
+
+def create_api_key(db: Session, name: str, scopes: Sequence[str], *, user_id: Optional[UUID] = None, created_by: Optional[str] = None) -> Tuple[ApiKey, str]:
+    """Create a key and return it with its plaintext, which is never stored or shown again."""
+    unknown = sorted(set(scopes) - set(API_KEY_SCOPES))
+    if unknown or not scopes or (user_id is None and not set(scopes) <= set(SERVICE_KEY_SCOPES)):
+        raise ValueError("invalid_api_key_scopes")
+    if user_id is not None:
+        user_service.get_user(db, user_id)
+    prefix = secrets.token_hex(6)
+    raw_key = f"{KEY_PREFIX}_{prefix}_{secrets.token_urlsafe(32)}"
+    record = ApiKey(prefix=prefix, key_hash=_hash_key(raw_key), name=name, scopes=sorted(set(scopes)), user_id=user_id, created_by=created_by)
+    db.add(record)
+    db.commit()
+    db.refresh(record)
+    return record, raw_key
+
+
+def list_api_keys(db: Session) -> List[ApiKey]:
+    return db.query(ApiKey).order_by(ApiKey.created_at.desc()).all()
+
+
+def revoke_api_key(db: Session, key_id: UUID) -> ApiKey:
+    record = db.query(ApiKey).filter(ApiKey.id == key_id).first()
+    if record is None:
+        raise ValueError("api_key_not_found")
+    if record.revoked_at is None:
+        record.revoked_at = get_utc_now()
+        db.commit()
+        db.refresh(record)
+    _key_cache.pop(record.prefix)
+    return record
+
+
+def revoke_user_keys(db: Session, user_id: UUID) -> None:
+    """Revoke every key bound to a user; the caller commits."""
+    records = db.query(ApiKey).filter(ApiKey.user_id == user_id, ApiKey.revoked_at.is_(None)).all()
+    now = get_utc_now()
+    for record in records:
+        record.revoked_at = now
+        _key_cache.pop(record.prefix)
+
+
+def authenticate(db: Session, raw_key: str) -> Optional[Actor]:
+    """Resolve an X-API-Key value to an Actor. Cached keys cost one hash and no queries."""
+    parts = _split_key(raw_key)
+    if parts is None:
+        return None
+    prefix, key_hash = parts[0], _hash_key(raw_key)
+    cached = _key_cache.get(prefix)
+    if cached is not None:
+        return cached[1] if hmac.compare_digest(cached[0], key_hash) else None
+    row = db.query(ApiKey.id, ApiKey.key_hash, ApiKey.scopes, ApiKey.user_id, User.deleted_at).outerjoin(User, User.id == ApiKey.user_id).filter(ApiKey.prefix == prefix, ApiKey.revoked_at.is_(None)).first()
+    if row is None or row.deleted_at is not None or not hmac.compare_digest(row.key_hash, key_hash):
+        return None
+    actor = Actor(id=row.user_id, role="user", scopes=frozenset(row.scopes)) if row.user_id else Actor(id=row.id, role="service", scopes=frozenset(row.scopes))
+    _key_cache.set(prefix, (row.key_hash, actor))
+    return actor
+
+
+def refresh_revocations(db: Optional[Session] = None) -> int:
+    """Scheduler hook: evict keys revoked by other workers since the last check."""
+    global _last_revocation_check
+    session = db or SessionLocal()
+    try:
+        checked_at = get_utc_now()
+        since = _last_revocation_check - timedelta(seconds=5)
+        prefixes = [prefix for (prefix,) in session.query(ApiKey.prefix).filter(ApiKey.revoked_at >= since)]
+        for prefix in prefixes:
+            _key_cache.pop(prefix)
+        _last_revocation_check = checked_at
+        return len(prefixes)
+    except Exception:
+        logger.exception("Failed to refresh API key revocations")
+        return 0
+    finally:
+        if db is None:
+            session.close()
+
+
+def cache_stats() -> dict:
+    return _key_cache.stats()
+
+
+def clear_cache() -> None:
+    _key_cache.clear()
@@ -0,0 +1,143 @@
+import hashlib
+import json
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from sqlalchemy import FromClause, func, select
+from sqlalchemy.orm import Session
+from app.db import partitions
+from app.models.audit import AuditLog
+from app.utils.helpers import ensure_utc, get_utc_now
+
+_AUDIT_TABLE = AuditLog.__table__
+_STRING_COLUMNS = ("id", "tenant_id", "subject_id", "user_id", "actor_type", "actor_id", "event_type", "action", "details", "policy_snapshot_id")
+_TIME_COLUMNS = ("event_time", "created_at")
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.compute
+        import pyarrow.parquet
+    except ImportError as exc:
+        raise ValueError("parquet_unavailable") from exc
+    return pyarrow
+
+
+def _schema(pa):
+    return pa.schema([*((name, pa.string()) for name in _STRING_COLUMNS), *((name, pa.timestamp("us", tz="UTC")) for name in _TIME_COLUMNS)])
+
+
+def _column_value(name: str, value: Any) -> Any:
+    if value is None:
+        return None
+    if name == "details":
+        return json.dumps(value, separators=(",", ":"))
+    if name in _TIME_COLUMNS:
+        return ensure_utc(value)
+    return str(value) if isinstance(value, uuid.UUID) else value
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for block in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def write_parquet_archive(db: Session, lower: datetime, upper: datetime, path: Path, *, row_group_size: int = 50000, source: Optional[FromClause] = None) -> Dict[str, Any]:
+    """Stream audit rows with lower <= event_time < upper into a zstd-compressed Parquet file and return its manifest.
+
+    Rows are sorted by (user_id, event_time), so each row group covers a narrow user_id range and its footer
+    statistics let query_audit_archive skip it. The file is renamed into place only after its footer row count matches
+    the database count for the range. `source` reads from another table with audit_logs' columns (a detached partition).
+    """
+    pa = _pyarrow()
+    schema = _schema(pa)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partial = path.with_name(path.name + ".partial")
+    audit = _AUDIT_TABLE if source is None else source
+    window = (audit.c.event_time >= lower, audit.c.event_time < upper)
+    written = 0
+    with pa.parquet.ParquetWriter(partial, schema, compression="zstd", write_statistics=True) as writer:
+        batch: List[Dict[str, Any]] = []
+        for row in db.execute(select(audit).where(*window).order_by(audit.c.user_id, audit.c.event_time, audit.c.id).execution_options(yield_per=row_group_size)).mappings():
+            batch.append({name: _column_value(name, row[name]) for name in schema.names})
+            if len(batch) == row_group_size:
+                writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+                written, batch = written + len(batch), []
+        if batch:
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+            written += len(batch)
+    expected = db.execute(select(func.count()).select_from(audit).where(*window)).scalar()
+    if not written == pa.parquet.ParquetFile(partial).metadata.num_rows == expected:
+        partial.unlink()
+        raise ValueError(f"audit_archive_verification_failed: wrote {written}, expected {expected}")
+    partial.replace(path)
+    manifest = {"file": path.name, "format": "parquet", "rows": written, "sha256": file_sha256(path), "lower": lower.isoformat(), "upper": upper.isoformat(), "archived_at": get_utc_now().isoformat()}
+    path.with_name(path.name + ".manifest.json").write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    return manifest
+
+
+def verify_parquet_archive(path: Path) -> bool:
+    manifest = json.loads(path.with_name(path.name + ".manifest.json").read_text(encoding="utf-8"))
+    return file_sha256(path) == manifest["sha256"] and _pyarrow().parquet.ParquetFile(path).metadata.num_rows == manifest["rows"]
+
+
+def _overlaps(statistics, low: Any, high: Any) -> bool:
+    """Whether a row group's [min, max] can hold values in [low, high); no statistics means it has to be read."""
+    if statistics is None or not statistics.has_min_max:
+        return True
+    minimum, maximum = (ensure_utc(value) if isinstance(value, datetime) else value for value in (statistics.min, statistics.max))
+    return (high is None or minimum < high) and (low is None or maximum >= low)
+
+
+def query_audit_archive(directory: str, *, start: Optional[datetime] = None, end: Optional[datetime] = None, user_id: Optional[uuid.UUID] = None, limit: int = 1000) -> Dict[str, Any]:
+    """Search archived audit files for start <= event_time < end (and one user_id), oldest month first.
+
+    Files are pruned by the month in their name before they are opened, row groups by the event_time and user_id
+    min/max statistics in the footer, and only the surviving row groups are read.
+    """
+    pa = _pyarrow()
+    start, end = ensure_utc(start), ensure_utc(end)
+    user_key = str(user_id) if user_id else None
+    stats = {"files_total": 0, "files_scanned": 0, "row_groups_total": 0, "row_groups_scanned": 0}
+    items: List[Dict[str, Any]] = []
+    candidates = []
+    for path in Path(directory).glob("audit_logs_p*.parquet"):
+        bounds = partitions.parse_partition_name("audit_logs", path.stem)
+        if bounds:
+            stats["files_total"] += 1
+            if (end is None or bounds[1] < end) and (start is None or bounds[2] > start):
+                candidates.append((bounds[1], path))
+    for _, path in sorted(candidates):
+        if len(items) >= limit:
+            break
+        parquet_file = pa.parquet.ParquetFile(path)
+        names = parquet_file.schema_arrow.names
+        stats["files_scanned"] += 1
+        matches = []
+        for index in range(parquet_file.num_row_groups):
+            stats["row_groups_total"] += 1
+            row_group = parquet_file.metadata.row_group(index)
+            if not _overlaps(row_group.column(names.index("event_time")).statistics, start, end):
+                continue
+            if user_key and not _overlaps(row_group.column(names.index("user_id")).statistics, user_key, user_key + "\0"):
+                continue
+            stats["row_groups_scanned"] += 1
+            table = parquet_file.read_row_group(index)
+            mask = pa.compute.is_valid(table["id"])
+            if start:
+                mask = pa.compute.and_(mask, pa.compute.greater_equal(table["event_time"], pa.scalar(start, type=pa.timestamp("us", tz="UTC"))))
+            if end:
+                mask = pa.compute.and_(mask, pa.compute.less(table["event_time"], pa.scalar(end, type=pa.timestamp("us", tz="UTC"))))
+            if user_key:
+                mask = pa.compute.and_(mask, pa.compute.equal(table["user_id"], user_key))
+            matches.extend(table.filter(mask).to_pylist())
+        matches.sort(key=lambda item: (item["event_time"], item["id"]))
+        items.extend(matches[:limit - len(items)])
+    for item in items:
+        item["details"] = json.loads(item["details"]) if item["details"] else {}
+    return {"items": items, "stats": stats}
@@ -0,0 +1,204 @@
+import json
+import logging
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.db.database import SessionLocal
+from app.models.audit import AuditLog
+from app.utils.helpers import get_utc_now
+
+logger = logging.getLogger(__name__)
+
+AuditRow = Dict[str, Any]
+_UUID_FIELDS = ("id", "user_id", "subject_id")
+_DATETIME_FIELDS = ("created_at", "event_time")
+_WAKE = object()
+_OPTIONAL_FIELDS = ("tenant_id", "subject_id", "user_id", "actor_type", "actor_id", "event_type", "policy_snapshot_id")
+
+
+def _normalize_row(row: AuditRow) -> AuditRow:
+    """Give every row the same key set so a batch can go through a single executemany INSERT."""
+    created_at = row.get("created_at") or get_utc_now()
+    return {"id": uuid.uuid4(), **{field: None for field in _OPTIONAL_FIELDS}, "details": {}, **row, "created_at": created_at, "event_time": row.get("event_time") or created_at}
+
+
+def _encode_row(row: AuditRow) -> str:
+    return json.dumps({key: str(value) if isinstance(value, uuid.UUID) else value.isoformat() if isinstance(value, datetime) else value for key, value in row.items()})
+
+
+def _decode_row(line: str) -> AuditRow:
+    row = json.loads(line)
+    for field in _UUID_FIELDS:
+        if row.get(field):
+            row[field] = uuid.UUID(row[field])
+    for field in _DATETIME_FIELDS:
+        if row.get(field):
+            row[field] = datetime.fromisoformat(row[field])
+    return row
+
+
+class AuditWriter:
+    """Bounded in-process queue of audit rows, bulk-inserted by a background flusher thread.
+
+    Rows are appended to an optional spool file before they are queued; the spool is truncated once
+    everything queued has been committed and replayed (skipping already-inserted ids) on the next start.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session] = SessionLocal, *, max_queue_size: int = 10000, flush_interval_ms: int = 200, batch_size: int = 500, spool_path: Optional[str] = None):
+        self._session_factory = session_factory
+        self._queue: "queue.Queue[AuditRow]" = queue.Queue(maxsize=max_queue_size)
+        self._flush_interval = flush_interval_ms / 1000
+        self._batch_size = batch_size
+        self._spool_path = Path(spool_path) if spool_path else None
+        self._spool_file = None
+        self._submit_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._retry: List[AuditRow] = []
+        self._stats: Dict[str, Any] = {"submitted": 0, "flushed": 0, "rejected": 0, "flush_failures": 0, "last_flush_rows": 0, "last_flush_ms": None, "max_flush_ms": None, "last_flush_at": None}
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        if self._spool_path:
+            self._replay_spool()
+            self._spool_path.parent.mkdir(parents=True, exist_ok=True)
+            self._spool_file = self._spool_path.open("a", encoding="utf-8")
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        try:
+            self._queue.put_nowait(_WAKE)
+        except queue.Full:
+            pass
+        self._thread.join()
+        self._thread = None
+        self.flush()
+        if self._spool_file:
+            self._spool_file.close()
+            self._spool_file = None
+
+    def submit(self, rows: Sequence[AuditRow]) -> bool:
+        """Queue rows for the flusher. Returns False (and queues nothing) when not running or the queue is full."""
+        if not self.running or self._stop.is_set():
+            return False
+        rows = [_normalize_row(row) for row in rows]
+        with self._submit_lock:
+            if self._queue.maxsize - self._queue.qsize() < len(rows):
+                self._stats["rejected"] += len(rows)
+                return False
+            if self._spool_file:
+                self._spool_file.write("".join(_encode_row(row) + "\n" for row in rows))
+                self._spool_file.flush()
+            for row in rows:
+                self._queue.put_nowait(row)
+            self._stats["submitted"] += len(rows)
+        return True
+
+    def flush(self) -> int:
+        """Synchronously write everything currently queued. Used on shutdown."""
+        flushed = 0
+        while True:
+            batch = self._drain(timeout=0)
+            if not batch:
+                return flushed
+            if not self._write(batch):
+                return flushed
+            flushed += len(batch)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"running": self.running, "queue_depth": self._queue.qsize() + len(self._retry), "queue_capacity": self._queue.maxsize, "spool_path": str(self._spool_path) if self._spool_path else None, **self._stats}
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            batch = self._drain(timeout=self._flush_interval)
+            if batch and not self._write(batch):
+                self._stop.wait(self._flush_interval)
+
+    def _drain(self, timeout: float) -> List[AuditRow]:
+        batch, self._retry = self._retry[:self._batch_size], self._retry[self._batch_size:]
+        deadline = time.monotonic() + timeout
+        while len(batch) < self._batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                row = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if row is _WAKE:
+                break
+            batch.append(row)
+        return batch
+
+    def _write(self, batch: List[AuditRow]) -> bool:
+        started = time.perf_counter()
+        with self._flush_lock:
+            session = self._session_factory()
+            try:
+                session.execute(insert(AuditLog), batch)
+                session.commit()
+            except Exception:
+                session.rollback()
+                self._retry = batch + self._retry
+                self._stats["flush_failures"] += 1
+                logger.exception("Audit writer failed to flush %d rows; will retry", len(batch))
+                return False
+            finally:
+                session.close()
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self._stats.update(flushed=self._stats["flushed"] + len(batch), last_flush_rows=len(batch), last_flush_ms=round(elapsed_ms, 3), max_flush_ms=round(max(elapsed_ms, self._stats["max_flush_ms"] or 0), 3), last_flush_at=get_utc_now().isoformat())
+        self._truncate_spool_if_drained()
+        return True
+
+    def _truncate_spool_if_drained(self) -> None:
+        if not self._spool_file:
+            return
+        with self._submit_lock:
+            if self._queue.empty() and not self._retry:
+                self._spool_file.seek(0)
+                self._spool_file.truncate()
+
+    def _replay_spool(self) -> None:
+        if not self._spool_path.exists():
+            return
+        rows = [_decode_row(line) for line in self._spool_path.read_text(encoding="utf-8").splitlines() if line.strip()]
+        if rows:
+            session = self._session_factory()
+            try:
+                existing = set()
+                for start in range(0, len(rows), 1000):
+                    existing.update(row_id for (row_id,) in session.query(AuditLog.id).filter(AuditLog.id.in_([row["id"] for row in rows[start:start + 1000]])))
+                missing = [row for row in rows if row["id"] not in existing]
+                if missing:
+                    session.execute(insert(AuditLog), missing)
+                session.commit()
+                logger.info("Audit writer replayed %d spooled rows (%d already persisted)", len(missing), len(rows) - len(missing))
+            finally:
+                session.close()
+        self._spool_path.write_text("", encoding="utf-8")
+
+
+audit_writer = AuditWriter(max_queue_size=settings.AUDIT_WRITER_QUEUE_SIZE, flush_interval_ms=settings.AUDIT_WRITER_FLUSH_INTERVAL_MS, batch_size=settings.AUDIT_WRITER_BATCH_SIZE, spool_path=settings.AUDIT_WRITER_SPOOL_PATH)
+
+
+def write_audit_rows(db: Session, rows: Sequence[AuditRow]) -> None:
+    """Hand rows to the background writer when it is running; otherwise insert and commit them on `db`."""
+    if rows and not audit_writer.submit(rows):
+        db.execute(insert(AuditLog), [_normalize_row(row) for row in rows])
+        db.commit()
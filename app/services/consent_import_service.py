@@ -0,0 +1,236 @@
+import csv
+import enum
+import io
+import json
+import logging
+import uuid
+from datetime import datetime, timedelta
+from itertools import islice
+from typing import IO, Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+from uuid import UUID
+from sqlalchemy import Row, insert, text
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.db import partitions
+from app.db.dialects import is_postgresql, upsert_insert
+from app.models.audit import AuditLog
+from app.models.consent import ConsentCurrent, ConsentHistory, PurposeEnum, RegionEnum, StatusEnum, User
+from app.models.imports import ConsentImportJob, ImportJobStatusEnum
+from app.services.policy_snapshot_service import intern_snapshot
+from app.services.preferences_service import bump_consent_versions
+from app.utils.helpers import build_policy_snapshot, ensure_utc, get_utc_now
+
+logger = logging.getLogger(__name__)
+
+IMPORT_FORMATS = ("csv", "ndjson")
+MAX_RECORDED_ERRORS = 100
+
+ImportRecord = Tuple[int, Optional[Dict[str, Any]]]
+ProgressCallback = Callable[[ConsentImportJob], None]
+
+_PURPOSES = {purpose.value: purpose for purpose in PurposeEnum}
+_STATUSES = {status.value: status for status in StatusEnum}
+_REGIONS = {region.value: region for region in RegionEnum}
+_LOOKUP_CHUNK_SIZE = 1000
+_HISTORY_COLUMNS = ("id", "tenant_id", "user_id", "purpose", "status", "region", "valid_from", "timestamp", "expires_at", "policy_snapshot_id", "source")
+_STAGED_COLUMNS = (*_HISTORY_COLUMNS, "audit_id")
+_FUTURE_SKEW = timedelta(days=1)  # Tolerated clock drift for source systems stamping records slightly ahead of us
+
+
+def create_import_job(db: Session, source_format: str, submitted_by: Optional[str] = None) -> ConsentImportJob:
+    if source_format not in IMPORT_FORMATS:
+        raise ValueError("invalid_import_format")
+    job = ConsentImportJob(id=uuid.uuid4(), status=ImportJobStatusEnum.PENDING, source_format=source_format, submitted_by=submitted_by, total_rows=0, imported_rows=0, rejected_rows=0)
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def get_import_job(db: Session, job_id: UUID) -> ConsentImportJob:
+    # The job is advanced by another session, so never answer from this session's identity map.
+    job = db.get(ConsentImportJob, job_id, populate_existing=True)
+    if job is None:
+        raise ValueError("import_job_not_found")
+    return job
+
+
+def iter_import_records(stream: IO[bytes], source_format: str) -> Iterator[ImportRecord]:
+    """(record number, fields) for every record in `stream`; fields is None for an NDJSON line that is not a JSON object."""
+    reader = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    if source_format == "csv":
+        yield from enumerate(csv.DictReader(reader), start=1)
+        return
+    number = 0
+    for line in reader:
+        if not line.strip():
+            continue
+        number += 1
+        try:
+            fields = json.loads(line)
+        except ValueError:
+            fields = None
+        yield number, fields if isinstance(fields, dict) else None
+
+
+def _user_key(value: Any) -> Optional[UUID]:
+    try:
+        return UUID(str(value))
+    except ValueError:
+        return None
+
+
+def _parse_time(value: Any) -> Optional[datetime]:
+    return ensure_utc(datetime.fromisoformat(str(value))) if value not in (None, "") else None
+
+
+def _lookup_users(db: Session, records: Sequence[ImportRecord]) -> Tuple[Dict[UUID, Row], Dict[str, Row]]:
+    """Live users referenced by a batch, keyed by id and by external_id, fetched 1000 keys per query."""
+    user_ids = sorted({key for _, fields in records if fields and fields.get("user_id") for key in [_user_key(fields["user_id"])] if key}, key=str)
+    external_ids = sorted({str(fields["external_id"]) for _, fields in records if fields and not fields.get("user_id") and fields.get("external_id")})
+    found: Tuple[Dict[UUID, Row], Dict[str, Row]] = ({}, {})
+    for column, keys, index in ((User.id, user_ids, found[0]), (User.external_id, external_ids, found[1])):
+        for start in range(0, len(keys), _LOOKUP_CHUNK_SIZE):
+            for user in db.query(User.id, User.external_id, User.region, User.tenant_id).filter(column.in_(keys[start:start + _LOOKUP_CHUNK_SIZE]), User.deleted_at.is_(None)):
+                index.setdefault(user.id if column is User.id else user.external_id, user)
+    return found
+
+
+def _prepare_row(db: Session, fields: Optional[Dict[str, Any]], users: Tuple[Dict[UUID, Row], Dict[str, Row]], snapshots: Dict[RegionEnum, Optional[str]], now: datetime) -> Dict[str, Any]:
+    if fields is None:
+        raise ValueError("invalid_record")
+    user = users[0].get(_user_key(fields["user_id"])) if fields.get("user_id") else users[1].get(str(fields.get("external_id") or ""))
+    if user is None:
+        raise ValueError("user_not_found")
+    purpose, status = _PURPOSES.get(str(fields.get("purpose"))), _STATUSES.get(str(fields.get("status")))
+    if purpose is None:
+        raise ValueError("invalid_purpose")
+    if status is None:
+        raise ValueError("invalid_status")
+    region = _REGIONS.get(str(fields["region"])) if fields.get("region") else user.region
+    if region is None:
+        raise ValueError("invalid_region")
+    try:
+        timestamp, expires_at = _parse_time(fields.get("timestamp")) or now, _parse_time(fields.get("expires_at"))
+    except ValueError:
+        raise ValueError("invalid_timestamp")
+    if not now - timedelta(days=settings.CONSENT_IMPORT_MAX_AGE_DAYS) <= timestamp <= now + _FUTURE_SKEW:
+        raise ValueError("timestamp_out_of_range")
+    if region not in snapshots:
+        snapshots[region] = intern_snapshot(db, build_policy_snapshot(region))
+    return {"id": uuid.uuid4(), "tenant_id": user.tenant_id, "user_id": user.id, "purpose": purpose, "status": status, "region": region, "valid_from": timestamp, "timestamp": timestamp, "expires_at": expires_at, "policy_snapshot_id": snapshots[region], "source": str(fields.get("source") or "import")[:50], "audit_id": uuid.uuid4()}
+
+
+def _prepare_batch(db: Session, records: Sequence[ImportRecord], snapshots: Dict[RegionEnum, Optional[str]]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Rows ready to load and the rejections ({row, error}) for one batch of records."""
+    users = _lookup_users(db, records)
+    now = get_utc_now()
+    rows: List[Dict[str, Any]] = []
+    rejected: List[Dict[str, Any]] = []
+    for number, fields in records:
+        try:
+            rows.append(_prepare_row(db, fields, users, snapshots, now))
+        except ValueError as exc:
+            rejected.append({"row": number, "error": str(exc)})
+    return rows, rejected
+
+
+def _copy_value(value: Any) -> Any:
+    if isinstance(value, enum.Enum):
+        return value.value
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _staging_csv(rows: Sequence[Dict[str, Any]]) -> io.StringIO:
+    """The batch as COPY ... WITH (FORMAT csv) input in _STAGED_COLUMNS order; None becomes an unquoted empty field (NULL)."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([_copy_value(row[column]) for column in _STAGED_COLUMNS])
+    buffer.seek(0)
+    return buffer
+
+
+def _load_with_copy(db: Session, rows: Sequence[Dict[str, Any]], audit_fields: Dict[str, Any]) -> None:
+    """COPY the batch into a transaction-scoped staging table, then merge it with one INSERT ... SELECT per target."""
+    buffer = _staging_csv(rows)
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.execute("CREATE TEMP TABLE consent_import_staging (LIKE consent_history INCLUDING DEFAULTS, audit_id uuid NOT NULL) ON COMMIT DROP")
+        cursor.copy_expert(f"COPY consent_import_staging ({', '.join(_STAGED_COLUMNS)}) FROM STDIN WITH (FORMAT csv)", buffer)
+    finally:
+        cursor.close()
+    columns = ", ".join(_HISTORY_COLUMNS)
+    db.execute(text(f"INSERT INTO consent_history ({columns}) SELECT {columns} FROM consent_import_staging"))
+    db.execute(text(
+        "INSERT INTO audit_logs (id, tenant_id, subject_id, user_id, actor_type, actor_id, action, details, policy_snapshot_id, event_time, created_at) "
+        "SELECT audit_id, tenant_id, user_id, NULL, :actor_type, :actor_id, :action, jsonb_build_object('purpose', purpose, 'status', status, 'region', region, 'import_job_id', CAST(:import_job_id AS text)), policy_snapshot_id, :now, :now "
+        "FROM consent_import_staging"
+    ), audit_fields)
+
+
+def _load_with_executemany(db: Session, rows: Sequence[Dict[str, Any]], audit_fields: Dict[str, Any]) -> None:
+    db.execute(insert(ConsentHistory.__table__), [{column: row[column] for column in _HISTORY_COLUMNS} for row in rows])
+    db.execute(insert(AuditLog.__table__), [{"id": row["audit_id"], "tenant_id": row["tenant_id"], "subject_id": row["user_id"], "user_id": None, "actor_type": audit_fields["actor_type"], "actor_id": audit_fields["actor_id"], "action": audit_fields["action"], "details": {"purpose": row["purpose"].value, "status": row["status"].value, "region": row["region"].value, "import_job_id": audit_fields["import_job_id"]}, "policy_snapshot_id": row["policy_snapshot_id"], "event_time": audit_fields["now"], "created_at": audit_fields["now"]} for row in rows])
+
+
+def _advance_current(db: Session, rows: Sequence[Dict[str, Any]]) -> None:
+    """Point consent_current at the newest imported row per (user, purpose), unless it already holds something newer."""
+    latest: Dict[Tuple[UUID, PurposeEnum], Dict[str, Any]] = {}
+    for row in rows:
+        key = (row["user_id"], row["purpose"])
+        if key not in latest or row["timestamp"] >= latest[key]["timestamp"]:
+            latest[key] = row
+    table = ConsentCurrent.__table__
+    statement = upsert_insert(db, table)
+    excluded = statement.excluded
+    statement = statement.on_conflict_do_update(index_elements=["user_id", "purpose"], set_={"status": excluded.status, "expires_at": excluded.expires_at, "consent_id": excluded.consent_id, "updated_at": excluded.updated_at, "version": table.c.version + 1}, where=table.c.updated_at <= excluded.updated_at)
+    db.execute(statement, [{"user_id": row["user_id"], "purpose": row["purpose"], "status": row["status"], "expires_at": row["expires_at"], "consent_id": row["id"], "version": 1, "updated_at": row["timestamp"]} for row in latest.values()])
+    bump_consent_versions(db, sorted({row["user_id"] for row in rows}, key=str))
+
+
+def _load_batch(db: Session, job: ConsentImportJob, rows: Sequence[Dict[str, Any]], actor_type: str) -> None:
+    if partitions.is_partitioned(db, "consent_history"):
+        timestamps = [row["timestamp"] for row in rows]
+        partitions.ensure_monthly_partitions(db, "consent_history", start=min(timestamps), end=partitions.add_months(partitions.month_start(max(timestamps)), 1))
+    audit_fields = {"actor_type": actor_type, "actor_id": job.submitted_by, "action": "CONSENT_IMPORTED", "import_job_id": str(job.id), "now": get_utc_now()}
+    (_load_with_copy if is_postgresql(db) else _load_with_executemany)(db, rows, audit_fields)
+    _advance_current(db, rows)
+
+
+def run_import(db: Session, job: ConsentImportJob, stream: IO[bytes], *, batch_size: Optional[int] = None, actor_type: str = "system", progress: Optional[ProgressCallback] = None) -> ConsentImportJob:
+    """Load every record in `stream` (CSV with a header row, or NDJSON) as consent history, one committed batch at a time.
+
+    Records carry user_id or external_id, purpose and status, and optionally region (default: the user's), timestamp
+    (default: now; older than CONSENT_IMPORT_MAX_AGE_DAYS or more than a day ahead is rejected as timestamp_out_of_range,
+    which also bounds the partitions a batch can create), expires_at and source. Each batch is validated against set
+    lookups and one user query per 1000 keys; on Postgres the valid rows are COPY'd into a staging table and merged into consent_history and audit_logs
+    with one INSERT ... SELECT each, elsewhere they go through executemany inserts. consent_current only moves
+    forward, so back-dated records become history without replacing newer state. Job counters are committed with
+    each batch and the first MAX_RECORDED_ERRORS rejections are kept on the job.
+    """
+    batch_size = batch_size or settings.CONSENT_IMPORT_BATCH_SIZE
+    job.status, job.started_at = ImportJobStatusEnum.RUNNING, get_utc_now()
+    db.commit()
+    snapshots: Dict[RegionEnum, Optional[str]] = {}
+    records = iter_import_records(stream, job.source_format)
+    try:
+        while batch := list(islice(records, batch_size)):
+            rows, rejected = _prepare_batch(db, batch, snapshots)
+            if rows:
+                _load_batch(db, job, rows, actor_type)
+            job.total_rows, job.imported_rows, job.rejected_rows = job.total_rows + len(batch), job.imported_rows + len(rows), job.rejected_rows + len(rejected)
+            if rejected and len(job.errors or []) < MAX_RECORDED_ERRORS:
+                job.errors = [*(job.errors or []), *rejected][:MAX_RECORDED_ERRORS]
+            db.commit()
+            if progress:
+                progress(job)
+        job.status = ImportJobStatusEnum.COMPLETED
+    except Exception as exc:
+        db.rollback()
+        logger.exception("Consent import %s failed after %d rows", job.id, job.total_rows)
+        job.status = ImportJobStatusEnum.FAILED
+        job.errors = [*(job.errors or []), {"row": None, "error": f"import_failed: {exc}"[:500]}]
+    job.finished_at = get_utc_now()
+    db.commit()
+    return job
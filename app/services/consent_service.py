@@ -1,21 +1,44 @@
+import base64
+import uuid
 from datetime import datetime
-from typing import List, Optional, Union
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
 from uuid import UUID
+from sqlalchemy import Row, Select, select, tuple_, union_all
 from sqlalchemy.orm import Session
 from app.models.audit import AuditLog
-from app.models.consent import ConsentHistory, PurposeEnum, RegionEnum, StatusEnum, User
+from app.models.consent import ConsentCurrent, ConsentHistory, ConsentHistoryArchive, PurposeEnum, RegionEnum, StatusEnum, User
+from app.models.policy import PolicySnapshot
 from app.services import user_service
-from app.utils.helpers import build_policy_snapshot, get_audit_log_kwargs, validate_region
+from app.services.policy_snapshot_service import intern_snapshot
+from app.services.preferences_service import bump_consent_version, is_unchanged, upsert_current_consent
+from app.utils.helpers import build_policy_snapshot, ensure_utc, get_audit_log_kwargs, get_utc_now, validate_region
 from app.utils.security import Actor
 
+HISTORY_PAGE_SIZE = 500
+MAX_HISTORY_PAGE_SIZE = 1000
+
+HistoryPage = Tuple[List[Row], Optional[str]]
+AsOfState = Dict[PurposeEnum, Row]
+
+_HISTORY_TABLES = (ConsentHistory.__table__, ConsentHistoryArchive.__table__)
+_RECORD_FIELDS = ("id", "user_id", "purpose", "status", "region", "timestamp", "expires_at", "valid_until", "policy_snapshot_id")
+
 
 def _create_consent(db: Session, user_id: UUID, purpose: PurposeEnum, region: RegionEnum, status: StatusEnum, action: str, expires_at: Optional[datetime] = None, actor: Optional[Union[Actor, User]] = None) -> ConsentHistory:
     user = user_service.get_user(db, user_id)
     region_value = validate_region(region)
-    snapshot = build_policy_snapshot(region_value)
-    consent = ConsentHistory(user_id=user.id, purpose=purpose, status=status, region=region_value, expires_at=expires_at, policy_snapshot=snapshot)
-    audit = AuditLog(action=action, details={"purpose": purpose.value, "region": region_value.value}, policy_snapshot=snapshot, **get_audit_log_kwargs(actor, user_id=user.id))
+    current = db.get(ConsentCurrent, (user.id, purpose))
+    if is_unchanged(current, status, expires_at, get_utc_now()) and current.consent_id:
+        # A repeated grant/revoke is answered with the record already in force instead of appending another one.
+        existing = db.get(ConsentHistory, current.consent_id)
+        if existing is not None:
+            return existing
+    snapshot_id = intern_snapshot(db, build_policy_snapshot(region_value))
+    consent = ConsentHistory(id=uuid.uuid4(), user_id=user.id, purpose=purpose, status=status, region=region_value, timestamp=get_utc_now(), expires_at=expires_at, policy_snapshot_id=snapshot_id)
+    audit = AuditLog(action=action, details={"purpose": purpose.value, "region": region_value.value}, policy_snapshot_id=snapshot_id, **get_audit_log_kwargs(actor, user_id=user.id))
     db.add_all([consent, audit])
+    upsert_current_consent(db, consent)
+    bump_consent_version(db, user.id)
     db.commit()
     db.refresh(consent)
     return consent
@@ -29,6 +52,98 @@ def revoke_consent(db: Session, user_id: UUID, purpose: PurposeEnum, region: Reg
     return _create_consent(db, user_id, purpose, region, StatusEnum.REVOKED, "CONSENT_REVOKED", expires_at, actor)
 
 
-def get_history(db: Session, user_id: UUID) -> List[ConsentHistory]:
+def encode_history_cursor(timestamp: datetime, consent_id: UUID) -> str:
+    return base64.urlsafe_b64encode(f"{ensure_utc(timestamp).isoformat()}|{consent_id}".encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_history_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    try:
+        timestamp, consent_id = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8").split("|")
+        return ensure_utc(datetime.fromisoformat(timestamp)), UUID(consent_id)
+    except ValueError as exc:
+        raise ValueError("invalid_cursor") from exc
+
+
+def _with_snapshot(source) -> Select:
+    return select(*[source.c[field] for field in _RECORD_FIELDS], PolicySnapshot.snapshot.label("policy_snapshot")).outerjoin(PolicySnapshot, PolicySnapshot.content_hash == source.c.policy_snapshot_id)
+
+
+def get_history_page(db: Session, user_id: UUID, *, limit: int = HISTORY_PAGE_SIZE, cursor: Optional[str] = None) -> HistoryPage:
+    """One page of a user's history, newest first, as plain rows (no ORM identities are kept in the session).
+
+    Keyset pagination on (timestamp, id): the hot table and the compaction archive are each read as one bounded range
+    of their (user_id, timestamp, id) index from the cursor position and merged, so every page costs the same no
+    matter how deep into the history it is. The returned cursor is None on the last page.
+    """
+    limit = max(1, min(limit, MAX_HISTORY_PAGE_SIZE))
+    position = decode_history_cursor(cursor) if cursor else None
+    branches = []
+    for table in _HISTORY_TABLES:
+        branch = select(*[table.c[field] for field in _RECORD_FIELDS]).where(table.c.user_id == user_id)
+        if position:
+            branch = branch.where(tuple_(table.c.timestamp, table.c.id) < tuple_(*position, types=[table.c.timestamp.type, table.c.id.type]))
+        branch = branch.order_by(table.c.timestamp.desc(), table.c.id.desc()).limit(limit + 1).subquery()
+        branches.append(select(*branch.c))
+    history = union_all(*branches).subquery("history")
+    rows = db.execute(_with_snapshot(history).order_by(history.c.timestamp.desc(), history.c.id.desc()).limit(limit + 1)).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_history_cursor(rows[-1].timestamp, rows[-1].id)
+
+
+def iter_history(db: Session, user_id: UUID, *, page_size: int = HISTORY_PAGE_SIZE) -> Iterator[Row]:
+    """Every history row for a user, newest first, fetched one keyset page at a time."""
     user_service.get_user(db, user_id)
-    return db.query(ConsentHistory).filter(ConsentHistory.user_id == user_id).order_by(ConsentHistory.timestamp.desc()).all()
+    cursor = None
+    while True:
+        rows, cursor = get_history_page(db, user_id, limit=page_size, cursor=cursor)
+        yield from rows
+        if cursor is None:
+            return
+
+
+def _latest_id_as_of(table, purpose: PurposeEnum, at: datetime):
+    return select(table.c.id).where(table.c.user_id == User.id, table.c.purpose == purpose, table.c.timestamp <= at).order_by(table.c.timestamp.desc(), table.c.id.desc()).limit(1).scalar_subquery()
+
+
+def get_consents_as_of(db: Session, user_ids: Sequence[UUID], at: datetime, purposes: Optional[Iterable[PurposeEnum]] = None) -> Dict[UUID, AsOfState]:
+    """The history row in force at `at` for every (user, purpose), keyed by user; unknown users are left out.
+
+    A row is in force from its `timestamp` until the next row for the same purpose. Each (user, purpose) is a single
+    LIMIT 1 probe per table (hot and archive) on the (user_id, purpose, timestamp, id) index instead of a replay of
+    the history; the candidates are then fetched by id and the later one wins.
+    """
+    at = ensure_utc(at)
+    purposes = list(purposes or PurposeEnum)
+    states: Dict[UUID, AsOfState] = {}
+    for start in range(0, len(user_ids), 1000):
+        probes = [_latest_id_as_of(table, purpose, at) for table in _HISTORY_TABLES for purpose in purposes]
+        candidates: Tuple[List[UUID], ...] = tuple([] for _ in _HISTORY_TABLES)
+        for user_id, *latest_ids in db.execute(select(User.id, *probes).where(User.id.in_(user_ids[start:start + 1000]))):
+            states[user_id] = {}
+            for index, consent_id in enumerate(latest_ids):
+                if consent_id:
+                    candidates[index // len(purposes)].append(consent_id)
+        for table, consent_ids in zip(_HISTORY_TABLES, candidates):
+            if consent_ids:
+                for row in db.execute(_with_snapshot(table).where(table.c.id.in_(consent_ids))):
+                    current = states[row.user_id].get(row.purpose)
+                    if current is None or (row.timestamp, row.id) > (current.timestamp, current.id):
+                        states[row.user_id][row.purpose] = row
+    return states
+
+
+def get_consent_as_of(db: Session, user_id: UUID, at: datetime, purposes: Optional[Iterable[PurposeEnum]] = None) -> AsOfState:
+    states = get_consents_as_of(db, [user_id], at, purposes)
+    if user_id not in states:
+        raise ValueError("user_not_found")
+    return states[user_id]
+
+
+def status_as_of(row: Optional[Row], at: datetime) -> Optional[StatusEnum]:
+    """Effective status of an as-of row: EXPIRED once its expires_at or valid_until had passed at `at`."""
+    if row is None:
+        return None
+    ends = [ensure_utc(value) for value in (row.expires_at, row.valid_until) if value is not None]
+    return StatusEnum.EXPIRED if any(end <= ensure_utc(at) for end in ends) else row.status
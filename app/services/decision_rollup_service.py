@@ -0,0 +1,72 @@
+import random
+import threading
+from collections import Counter
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, FrozenSet, Optional, Tuple, Union
+from uuid import UUID
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.db.database import SessionLocal
+from app.db.dialects import upsert_insert
+from app.models.audit import DecisionRollup
+
+RollupKey = Tuple[datetime, str, str, str, bool, str]
+
+_counts: "Counter[RollupKey]" = Counter()
+_lock = threading.Lock()
+
+
+def rollup_enabled() -> bool:
+    return settings.DECISION_AUDIT_MODE == "rollup"
+
+
+@lru_cache(maxsize=8)
+def _parse_watchlist(raw: str) -> FrozenSet[str]:
+    return frozenset(item.strip().lower() for item in raw.split(",") if item.strip())
+
+
+def keep_full_row(user_id: Union[UUID, str]) -> bool:
+    """Whether a decision is still written as a full audit row while rollups are enabled."""
+    return str(user_id) in _parse_watchlist(settings.DECISION_AUDIT_WATCHLIST) or random.random() < settings.DECISION_AUDIT_SAMPLE_RATE
+
+
+def record_decision(now: datetime, tenant_id: Optional[str], region: str, purpose: str, allowed: bool, reason: str) -> None:
+    key = (now.replace(second=0, microsecond=0), tenant_id or "", region, purpose, allowed, reason)
+    with _lock:
+        _counts[key] += 1
+
+
+def pending_count() -> int:
+    with _lock:
+        return sum(_counts.values())
+
+
+def flush_rollups(db: Session) -> int:
+    """Merge in-process counters into decision_rollups. Counters not yet flushed are lost if the process dies."""
+    global _counts
+    with _lock:
+        drained: Dict[RollupKey, int] = _counts
+        _counts = Counter()
+    if not drained:
+        return 0
+    table = DecisionRollup.__table__
+    try:
+        for (bucket_start, tenant_id, region, purpose, allowed, reason), count in drained.items():
+            statement = upsert_insert(db, table).values(bucket_start=bucket_start, tenant_id=tenant_id, region=region, purpose=purpose, allowed=allowed, reason=reason, count=count)
+            db.execute(statement.on_conflict_do_update(index_elements=["bucket_start", "tenant_id", "region", "purpose", "allowed", "reason"], set_={"count": table.c.count + count}))
+        db.commit()
+    except Exception:
+        db.rollback()
+        with _lock:
+            _counts.update(drained)
+        raise
+    return sum(drained.values())
+
+
+def run_rollup_flush() -> int:
+    db = SessionLocal()
+    try:
+        return flush_rollups(db)
+    finally:
+        db.close()
@@ -1,52 +1,186 @@
-from typing import Any, Dict, Optional, Union
+from datetime import datetime
+from functools import cache
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
 from uuid import UUID
+from sqlalchemy import and_
 from sqlalchemy.orm import Session
-from app.models.audit import AuditLog
-from app.models.consent import ConsentHistory, PurposeEnum, RegionEnum, StatusEnum, User
-from app.services.preferences_service import get_latest_preferences
-from app.utils.helpers import build_policy_snapshot, get_audit_log_kwargs, get_utc_now, validate_region
+from app.models.consent import ConsentCurrent, PurposeEnum, RegionEnum, StatusEnum, User
+from app.services import decision_rollup_service
+from app.services.audit_writer import write_audit_rows
+from app.services.consent_service import get_consent_as_of, status_as_of
+from app.services.policy_engine import CompiledPolicy, get_active_policy, policy_as_of
+from app.services.policy_snapshot_service import intern_snapshot
+from app.services.preferences_service import consent_etag_state
+from app.utils.helpers import build_policy_snapshot, ensure_utc, get_audit_log_kwargs, get_utc_now, validate_region
 from app.utils.security import Actor
 
-_GDPR_REGIONS = {RegionEnum.EU, RegionEnum.INDIA, RegionEnum.UK, RegionEnum.IN}
-_LGDP_REGIONS = {RegionEnum.BR}
-_SENSITIVE_KEYWORDS = {"analytics", "ads", "marketing", "location", "personalization", "email", "data_sharing"}
-_SENSITIVE_PURPOSES = frozenset(purpose for purpose in PurposeEnum if purpose.value in _SENSITIVE_KEYWORDS or purpose.name.lower() in _SENSITIVE_KEYWORDS)
+_BATCH_CHUNK_SIZE = 1000
+
+DecisionTarget = Tuple[Optional[UUID], Optional[str], PurposeEnum]
+FallbackRegion = Union[RegionEnum, Callable[[], RegionEnum], None]
 
 
 def _policy_allows(region: RegionEnum, purpose: PurposeEnum, current_status: Optional[StatusEnum]) -> tuple[bool, str]:
-    is_sensitive = purpose in _SENSITIVE_PURPOSES
-    denied_statuses = (StatusEnum.REVOKED, StatusEnum.DENIED)
-    if region in _GDPR_REGIONS:
-        return (True, "gdpr_granted") if is_sensitive and current_status == StatusEnum.GRANTED else (False, "gdpr_requires_grant") if is_sensitive else (False, f"gdpr_{current_status.value}") if current_status in denied_statuses else (True, "gdpr_default_allow")
-    if region in _LGDP_REGIONS:
-        return (True, "lgpd_granted") if is_sensitive and current_status == StatusEnum.GRANTED else (False, "lgpd_requires_grant") if is_sensitive else (False, f"lgpd_{current_status.value}") if current_status in denied_statuses else (True, "lgpd_default_allow")
-    if region == RegionEnum.US:
-        return (False, f"ccpa_{current_status.value}") if current_status in denied_statuses else (True, "ccpa_default_allow")
-    return (False, f"global_{current_status.value}") if current_status in denied_statuses else (True, "row_default_allow")
+    return get_active_policy().evaluate(region, purpose, current_status)
+
+
+def _evaluate(region: RegionEnum, purpose: PurposeEnum, current_status: Optional[StatusEnum], expires_at: Optional[datetime], now: datetime, policy: Optional[CompiledPolicy] = None) -> tuple[bool, str]:
+    expires_at = ensure_utc(expires_at)
+    if expires_at and expires_at < now:
+        return False, "consent_expired"
+    return policy.evaluate(region, purpose, current_status) if policy else _policy_allows(region, purpose, current_status)
+
+
+def _load_decision_state(db: Session, user_id: UUID, purpose: PurposeEnum) -> Tuple[RegionEnum, Optional[str], Optional[StatusEnum], Optional[datetime]]:
+    state = db.query(User.region, User.tenant_id, ConsentCurrent.status, ConsentCurrent.expires_at).outerjoin(ConsentCurrent, and_(ConsentCurrent.user_id == User.id, ConsentCurrent.purpose == purpose)).filter(User.id == user_id).first()
+    if state is None:
+        raise ValueError("user_not_found")
+    return state.region, state.tenant_id, state.status, state.expires_at
+
+
+def _resolve_region(stored_region: Optional[RegionEnum], fallback_region: FallbackRegion) -> RegionEnum:
+    """The stored region wins; a callable fallback (e.g. IP detection) is only evaluated when there is none."""
+    if stored_region:
+        return validate_region(stored_region)
+    fallback = fallback_region() if callable(fallback_region) else fallback_region
+    return validate_region(fallback or RegionEnum.ROW)
 
 
-def _has_explicit_preference(db: Session, user_id: UUID, purpose: PurposeEnum) -> bool:
-    return db.query(ConsentHistory.id).filter(ConsentHistory.user_id == user_id, ConsentHistory.purpose == purpose).first() is not None
+def get_decision_etag(db: Session, user_id: UUID, *, fallback_region: FallbackRegion = None) -> str:
+    """The consent ETag plus the region decisions are evaluated in, so a region change (or, for a user without a stored
+    region, a caller whose IP maps elsewhere) never gets a 304 for decisions made under another region's rules."""
+    value, region = consent_etag_state(db, user_id)
+    return f'"{value}.{_resolve_region(region, fallback_region).value}"'
 
 
-def _check_consent_expiry(db: Session, user_id: UUID, purpose: PurposeEnum) -> bool:
-    latest = db.query(ConsentHistory).filter(ConsentHistory.user_id == user_id, ConsentHistory.purpose == purpose).order_by(ConsentHistory.timestamp.desc()).first()
-    return bool(latest and latest.expires_at and latest.expires_at < get_utc_now())
+def _decision_audit_row(user_id: UUID, purpose: PurposeEnum, region: RegionEnum, allowed: bool, reason: str, now: datetime, policy_snapshot_id: Optional[str], audit_kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    return {"action": "decision", "details": {"user_id": str(user_id), "purpose": purpose.value, "region": region.value, "allowed": allowed, "reason": reason}, "created_at": now, "policy_snapshot_id": policy_snapshot_id, **audit_kwargs}
 
 
-def decide(db: Session, user_id: UUID, purpose: PurposeEnum, *, fallback_region: Optional[RegionEnum] = None, actor: Optional[Union[Actor, User]] = None) -> Dict[str, Any]:
-    stored_region, preferences = get_latest_preferences(db, user_id)
-    region = validate_region(stored_region or fallback_region or RegionEnum.ROW)
+def _record_decision_audit(db: Session, rows: List[Dict[str, Any]], tenants: Dict[UUID, Optional[str]]) -> None:
+    if decision_rollup_service.rollup_enabled():
+        for row in rows:
+            details = row["details"]
+            decision_rollup_service.record_decision(row["created_at"], tenants.get(UUID(details["user_id"])), details["region"], details["purpose"], details["allowed"], details["reason"])
+        rows = [row for row in rows if decision_rollup_service.keep_full_row(row["details"]["user_id"])]
+    write_audit_rows(db, rows)
+
+
+def decide(db: Session, user_id: UUID, purpose: PurposeEnum, *, fallback_region: FallbackRegion = None, actor: Optional[Union[Actor, User]] = None) -> Dict[str, Any]:
+    stored_region, tenant_id, current_status, expires_at = _load_decision_state(db, user_id, purpose)
+    region = _resolve_region(stored_region, fallback_region)
     now = get_utc_now()
-    if _check_consent_expiry(db, user_id, purpose):
-        allowed, reason = False, "consent_expired"
-    else:
-        current_status = preferences.get(purpose, StatusEnum.REVOKED)
-        has_history = _has_explicit_preference(db, user_id, purpose)
-        allowed, reason = _policy_allows(region, purpose, current_status if has_history else None)
+    allowed, reason = _evaluate(region, purpose, current_status, expires_at, now)
     policy_snapshot = build_policy_snapshot(region)
     audit_kwargs = get_audit_log_kwargs(actor, user_id=user_id)
-    db.add(AuditLog(action="decision", details={"user_id": str(user_id), "purpose": purpose.value, "region": region.value, "allowed": allowed, "reason": reason}, created_at=now, policy_snapshot=policy_snapshot, **audit_kwargs))
-    db.commit()
+    _record_decision_audit(db, [_decision_audit_row(user_id, purpose, region, allowed, reason, now, intern_snapshot(db, policy_snapshot), audit_kwargs)], {user_id: tenant_id})
     return {"user_id": user_id, "purpose": purpose, "region": region, "allowed": allowed, "reason": reason, "policy_snapshot": policy_snapshot}
 
+
+def decide_all(db: Session, user_id: UUID, *, fallback_region: FallbackRegion = None, actor: Optional[Union[Actor, User]] = None) -> Dict[str, Any]:
+    """Evaluate every purpose for one user from a single state fetch and record one audit entry."""
+    regions, tenants, latest = _load_batch_state(db, [user_id])
+    if user_id not in regions:
+        raise ValueError("user_not_found")
+    region = _resolve_region(regions[user_id], fallback_region)
+    now = get_utc_now()
+    decisions = {purpose: _evaluate(region, purpose, *latest.get((user_id, purpose), (None, None)), now) for purpose in PurposeEnum}
+    policy_snapshot = build_policy_snapshot(region)
+    audit_row = {"action": "decision.all", "details": {"user_id": str(user_id), "region": region.value, "decisions": {purpose.value: {"allowed": allowed, "reason": reason} for purpose, (allowed, reason) in decisions.items()}}, "created_at": now, "policy_snapshot_id": intern_snapshot(db, policy_snapshot), **get_audit_log_kwargs(actor, user_id=user_id)}
+    if decision_rollup_service.rollup_enabled():
+        for purpose, (allowed, reason) in decisions.items():
+            decision_rollup_service.record_decision(now, tenants.get(user_id), region.value, purpose.value, allowed, reason)
+        if not decision_rollup_service.keep_full_row(user_id):
+            audit_row = None
+    write_audit_rows(db, [audit_row] if audit_row else [])
+    return {"user_id": user_id, "region": region, "decisions": decisions, "policy_snapshot": policy_snapshot}
+
+
+def decide_as_of(db: Session, user_id: UUID, at: datetime, purposes: Optional[Sequence[PurposeEnum]] = None) -> Dict[str, Any]:
+    """Decisions as they would have been made at `at`: the consent in force then, evaluated by the policy version
+    published then. Users carry no region history, so the region comes from the consent record when there is one."""
+    at = ensure_utc(at)
+    purposes = list(purposes or PurposeEnum)
+    state = get_consent_as_of(db, user_id, at, purposes)
+    stored_region = db.query(User.region).filter(User.id == user_id).scalar()
+    policy = policy_as_of(db, at)
+    decisions: Dict[PurposeEnum, Tuple[RegionEnum, bool, str]] = {}
+    for purpose in purposes:
+        row = state.get(purpose)
+        region = validate_region(row.region if row else stored_region or RegionEnum.ROW)
+        decisions[purpose] = (region, *_evaluate(region, purpose, status_as_of(row, at), row.expires_at if row else None, at, policy))
+    return {"user_id": user_id, "at": at, "policy_version": policy.version, "decisions": decisions}
+
+
+def encode_decisions_compact(decisions: Dict[PurposeEnum, Tuple[bool, str]]) -> Dict[str, Any]:
+    """Bit i of allowed_mask is set when purposes[i] is allowed; reason_codes[i] indexes into reasons."""
+    reasons: List[str] = []
+    reason_codes: List[int] = []
+    allowed_mask = 0
+    for bit, purpose in enumerate(PurposeEnum):
+        allowed, reason = decisions[purpose]
+        allowed_mask |= int(allowed) << bit
+        if reason not in reasons:
+            reasons.append(reason)
+        reason_codes.append(reasons.index(reason))
+    return {"purposes": [purpose.value for purpose in PurposeEnum], "allowed_mask": allowed_mask, "reason_codes": reason_codes, "reasons": reasons}
+
+
+def _chunks(values: Sequence, size: int = _BATCH_CHUNK_SIZE) -> Iterable[Sequence]:
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def _resolve_external_ids(db: Session, external_ids: Sequence[str]) -> Dict[str, UUID]:
+    resolved: Dict[str, UUID] = {}
+    for chunk in _chunks(external_ids):
+        for user_id, external_id in db.query(User.id, User.external_id).filter(User.external_id.in_(chunk), User.deleted_at.is_(None)):
+            resolved.setdefault(external_id, user_id)
+    return resolved
+
+
+def _load_batch_state(db: Session, user_ids: Sequence[UUID]) -> Tuple[Dict[UUID, RegionEnum], Dict[UUID, Optional[str]], Dict[Tuple[UUID, PurposeEnum], Tuple[StatusEnum, Optional[datetime]]]]:
+    regions: Dict[UUID, RegionEnum] = {}
+    tenants: Dict[UUID, Optional[str]] = {}
+    latest: Dict[Tuple[UUID, PurposeEnum], Tuple[StatusEnum, Optional[datetime]]] = {}
+    for chunk in _chunks(user_ids):
+        for user_id, region, tenant_id, purpose, status, expires_at in db.query(User.id, User.region, User.tenant_id, ConsentCurrent.purpose, ConsentCurrent.status, ConsentCurrent.expires_at).outerjoin(ConsentCurrent, ConsentCurrent.user_id == User.id).filter(User.id.in_(chunk), User.deleted_at.is_(None)):
+            regions[user_id], tenants[user_id] = region, tenant_id
+            if purpose is not None:
+                latest[(user_id, purpose)] = (status, expires_at)
+    return regions, tenants, latest
+
+
+def iter_decide_batch(db: Session, targets: Sequence[DecisionTarget], *, fallback_region: FallbackRegion = None, actor: Optional[Union[Actor, User]] = None) -> Iterator[Dict[str, Any]]:
+    """Decisions for `targets` in request order, produced _BATCH_CHUNK_SIZE targets at a time.
+
+    Each chunk resolves its users with one query per table, records its audit rows and is yielded before the next one
+    is loaded, so a streamed response starts early and memory stays bounded by the chunk. Users without a stored
+    region get `fallback_region`, evaluated at most once, as single decisions do.
+    """
+    fallback_region = cache(fallback_region) if callable(fallback_region) else fallback_region
+    snapshot_ids: Dict[RegionEnum, Optional[str]] = {}
+    for chunk in _chunks(targets, _BATCH_CHUNK_SIZE):
+        external_map = _resolve_external_ids(db, sorted({external_id for _, external_id, _ in chunk if external_id}))
+        resolved = [(user_id or external_map.get(external_id), external_id, purpose) for user_id, external_id, purpose in chunk]
+        regions, tenants, latest = _load_batch_state(db, sorted({user_id for user_id, _, _ in resolved if user_id}, key=str))
+        now = get_utc_now()
+        results: List[Dict[str, Any]] = []
+        audit_rows: List[Dict[str, Any]] = []
+        for user_id, external_id, purpose in resolved:
+            if user_id is None or user_id not in regions:
+                results.append({"user_id": user_id, "external_id": external_id, "purpose": purpose, "error": "user_not_found"})
+                continue
+            region = _resolve_region(regions[user_id], fallback_region)
+            status, expires_at = latest.get((user_id, purpose), (None, None))
+            allowed, reason = _evaluate(region, purpose, status, expires_at, now)
+            if region not in snapshot_ids:
+                snapshot_ids[region] = intern_snapshot(db, build_policy_snapshot(region))
+            audit_rows.append(_decision_audit_row(user_id, purpose, region, allowed, reason, now, snapshot_ids[region], get_audit_log_kwargs(actor, user_id=user_id)))
+            results.append({"user_id": user_id, "external_id": external_id, "purpose": purpose, "region": region, "allowed": allowed, "reason": reason})
+        _record_decision_audit(db, audit_rows, tenants)
+        yield from results
+
+
+def decide_batch(db: Session, targets: Sequence[DecisionTarget], *, fallback_region: FallbackRegion = None, actor: Optional[Union[Actor, User]] = None) -> List[Dict[str, Any]]:
+    return list(iter_decide_batch(db, targets, fallback_region=fallback_region, actor=actor))
@@ -0,0 +1,87 @@
+import hashlib
+import hmac
+from datetime import timedelta
+from functools import lru_cache
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Union
+from uuid import UUID
+import jwt
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.consent import PurposeEnum, RegionEnum, User
+from app.services.decision_service import FallbackRegion, decide_all, encode_decisions_compact
+from app.services.preferences_service import get_consent_etag, parse_etag_version
+from app.utils.security import Actor, encode_jwt
+
+TOKEN_TYPE = "consent_decisions"
+ISSUER = "consent-service"
+
+
+class _SigningKeys(NamedTuple):
+    algorithm: str
+    key_id: str
+    signing_key: Any
+    verifying_key: Any
+    jwk: Optional[Dict[str, Any]]
+
+
+@lru_cache(maxsize=4)
+def _load_signing_keys(private_key: Optional[str], algorithm: str, key_id: str, secret: Optional[str]) -> _SigningKeys:
+    if private_key:
+        if not jwt.algorithms.has_crypto:
+            raise RuntimeError("DECISION_TOKEN_PRIVATE_KEY requires the 'cryptography' package (pip install 'PyJWT[crypto]')")
+        algo = jwt.get_algorithm_by_name(algorithm)
+        signing_key = algo.prepare_key(private_key.replace("\\n", "\n"))
+        verifying_key = signing_key.public_key()
+        return _SigningKeys(algorithm, key_id, signing_key, verifying_key, {**algo.to_jwk(verifying_key, as_dict=True), "kid": key_id, "alg": algorithm, "use": "sig"})
+    key = secret or hmac.new(settings.SECRET_KEY.encode("utf-8"), b"decision-token", hashlib.sha256).hexdigest()
+    return _SigningKeys("HS256", key_id, key, key, None)
+
+
+def _signing_keys() -> _SigningKeys:
+    return _load_signing_keys(settings.DECISION_TOKEN_PRIVATE_KEY, settings.DECISION_TOKEN_ALGORITHM, settings.DECISION_TOKEN_KEY_ID, settings.DECISION_TOKEN_SECRET)
+
+
+def get_jwks() -> Dict[str, List[Dict[str, Any]]]:
+    """Public verification keys. Empty when tokens are HMAC-signed, since the shared secret is never published."""
+    keys = _signing_keys()
+    return {"keys": [keys.jwk] if keys.jwk else []}
+
+
+def issue_decision_token(db: Session, user_id: UUID, *, fallback_region: FallbackRegion = None, actor: Optional[Union[Actor, User]] = None) -> Dict[str, Any]:
+    """Evaluate every purpose for the user and sign the result as a short-lived token edge nodes can verify offline."""
+    result = decide_all(db, user_id, fallback_region=fallback_region, actor=actor)
+    keys = _signing_keys()
+    ttl = timedelta(seconds=settings.DECISION_TOKEN_TTL_SECONDS)
+    claims = {"iss": ISSUER, "sub": str(user_id), "typ": TOKEN_TYPE, "region": result["region"].value, "pv": result["policy_snapshot"]["policy_version"], "cv": parse_etag_version(get_consent_etag(db, user_id)), "dec": encode_decisions_compact(result["decisions"])}
+    token = encode_jwt(claims, ttl, key=keys.signing_key, algorithm=keys.algorithm, headers={"kid": keys.key_id})
+    return {"token": token, "token_type": TOKEN_TYPE, "algorithm": keys.algorithm, "expires_in": settings.DECISION_TOKEN_TTL_SECONDS}
+
+
+def verify_decision_token(token: str, *, jwks: Optional[Dict[str, Any]] = None, key: Any = None, algorithms: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+    """Verify a decision token and expand its decision vector.
+
+    Edge nodes pass the document from /.well-known/jwks.json (asymmetric signing) or the shared `key` (HS256);
+    inside the service both can be omitted. The accepted algorithms never come from the token header: `algorithms`
+    defaults to DECISION_TOKEN_ALGORITHM for JWKS keys, which must declare their `alg`, and to HS256 for a shared key.
+    Raises ValueError("invalid_decision_token") on any failure.
+    """
+    try:
+        header = jwt.get_unverified_header(token)
+        if jwks is not None:
+            jwk = next((item for item in jwks.get("keys", []) if item.get("kid") == header.get("kid")), None)
+            if jwk is None or jwk.get("alg") not in (algorithms or [settings.DECISION_TOKEN_ALGORITHM]):
+                raise ValueError("invalid_decision_token")
+            verifying_key, algorithms = jwt.PyJWK(jwk).key, [jwk["alg"]]
+        elif key is not None:
+            verifying_key, algorithms = key, list(algorithms or ["HS256"])
+        else:
+            keys = _signing_keys()
+            verifying_key, algorithms = keys.verifying_key, [keys.algorithm]
+        claims = jwt.decode(token, verifying_key, algorithms=algorithms, issuer=ISSUER, options={"require": ["exp", "sub"]})
+    except jwt.PyJWTError as exc:
+        raise ValueError("invalid_decision_token") from exc
+    if claims.get("typ") != TOKEN_TYPE:
+        raise ValueError("invalid_decision_token")
+    encoded = claims["dec"]
+    decisions = {PurposeEnum(purpose): {"allowed": bool(encoded["allowed_mask"] >> bit & 1), "reason": encoded["reasons"][encoded["reason_codes"][bit]]} for bit, purpose in enumerate(encoded["purposes"])}
+    return {"user_id": UUID(claims["sub"]), "region": RegionEnum(claims["region"]), "policy_version": claims["pv"], "consent_version": claims.get("cv"), "expires_at": claims["exp"], "decisions": decisions}
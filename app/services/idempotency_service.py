@@ -0,0 +1,80 @@
+import hashlib
+import json
+from datetime import timedelta
+from typing import Any, Callable, Dict, Optional, Tuple
+from sqlalchemy import delete, update
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.db.database import SessionLocal
+from app.db.dialects import upsert_insert
+from app.models.idempotency import IdempotencyKey
+from app.utils.helpers import get_utc_now
+from app.utils.security import Actor
+
+StoredResponse = Tuple[int, Dict[str, Any], Dict[str, str]]
+
+_TABLE = IdempotencyKey.__table__
+
+
+def idempotency_scope(actor: Actor) -> str:
+    return f"{actor.role}:{actor.id}"
+
+
+def request_fingerprint(*parts: Any) -> str:
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str).encode("utf-8")).hexdigest()
+
+
+def _claim(db: Session, scope: str, key: str, request_hash: str) -> Optional[StoredResponse]:
+    """Take the key for this request, or return the response stored for it.
+
+    A claim only holds the key for IDEMPOTENCY_LEASE_SECONDS until its response is stored, so a claim left behind by a
+    crashed request lapses like an expired response and is taken over by the next retry."""
+    now = get_utc_now()
+    claim = {"request_hash": request_hash, "status_code": None, "response_body": None, "response_headers": None, "created_at": now, "expires_at": now + timedelta(seconds=settings.IDEMPOTENCY_LEASE_SECONDS)}
+    statement = upsert_insert(db, _TABLE).values(scope=scope, key=key, **claim)
+    claimed = db.execute(statement.on_conflict_do_update(index_elements=["scope", "key"], set_=claim, where=_TABLE.c.expires_at <= now)).rowcount
+    db.commit()
+    if claimed:
+        return None
+    record = db.get(IdempotencyKey, (scope, key), populate_existing=True)
+    if record.request_hash != request_hash:
+        raise ValueError("idempotency_key_reused")
+    if record.status_code is None:
+        raise ValueError("idempotency_key_in_progress")
+    return record.status_code, record.response_body, record.response_headers or {}
+
+
+def run_idempotent(db: Session, scope: str, key: str, request_hash: str, operation: Callable[[], StoredResponse]) -> Tuple[StoredResponse, bool]:
+    """Run `operation` at most once per (scope, key) within IDEMPOTENCY_KEY_TTL_SECONDS and return (response, replayed).
+
+    Retries with the same key and request get the stored response; the same key on a different request is rejected.
+    A failed operation releases the key so the client can retry it.
+    """
+    stored = _claim(db, scope, key, request_hash)
+    if stored is not None:
+        return stored, True
+    where = (_TABLE.c.scope == scope, _TABLE.c.key == key)
+    try:
+        status_code, body, headers = operation()
+    except Exception:
+        db.rollback()
+        db.execute(delete(_TABLE).where(*where))
+        db.commit()
+        raise
+    db.execute(update(_TABLE).where(*where).values(status_code=status_code, response_body=body, response_headers=headers, expires_at=get_utc_now() + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL_SECONDS)))
+    db.commit()
+    return (status_code, body, headers), False
+
+
+def purge_expired_keys(db: Session) -> int:
+    deleted = db.execute(delete(_TABLE).where(_TABLE.c.expires_at <= get_utc_now())).rowcount
+    db.commit()
+    return deleted
+
+
+def run_key_purge() -> int:
+    db = SessionLocal()
+    try:
+        return purge_expired_keys(db)
+    finally:
+        db.close()
@@ -0,0 +1,157 @@
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+from starlette.concurrency import run_in_threadpool
+from app.config import settings
+from app.utils import security
+
+logger = logging.getLogger(__name__)
+
+
+class PasswordPoolBusy(Exception):
+    """Raised when the password pool cannot admit more work; surfaced as 503 with Retry-After."""
+
+    def __init__(self, retry_after: int):
+        super().__init__("password_pool_busy")
+        self.retry_after = retry_after
+
+
+def _timed(func: Callable[..., Any], *args: Any) -> Tuple[Any, float]:
+    started = time.perf_counter()
+    result = func(*args)
+    return result, (time.perf_counter() - started) * 1000
+
+
+def _hash_in_worker(password: str) -> Tuple[str, float]:
+    return _timed(security.hash_password, password)
+
+
+def _verify_in_worker(password: str, hashed: str) -> Tuple[bool, float]:
+    return _timed(security.verify_password, password, hashed)
+
+
+class PasswordHasher:
+    """Runs bcrypt in a dedicated process pool so login storms cannot starve the request threadpool.
+
+    At most `workers + queue_size` calls are admitted at once; a caller that cannot be admitted within
+    `admission_timeout_ms` gets PasswordPoolBusy. Request handlers use the async methods, which queue on an
+    asyncio.Semaphore and wait for the worker on the event loop instead of holding an anyio threadpool thread. When
+    the pool is not started, work runs inline (on a threadpool thread for the async methods).
+    """
+
+    def __init__(self, *, workers: int = 2, queue_size: int = 32, admission_timeout_ms: int = 100, retry_after_seconds: int = 1):
+        self._workers = workers
+        self._capacity = workers + queue_size
+        self._admission = threading.BoundedSemaphore(self._capacity)
+        self._admission_timeout = admission_timeout_ms / 1000
+        self._async_gate: Optional[Tuple[asyncio.AbstractEventLoop, asyncio.Semaphore]] = None
+        self._retry_after = retry_after_seconds
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Any] = {"completed": 0, "rejected": 0, "in_flight": 0, "queue_wait_ms_total": 0.0, "queue_wait_ms_max": 0.0, "hash_ms_total": 0.0, "hash_ms_max": 0.0}
+
+    @property
+    def running(self) -> bool:
+        return self._executor is not None
+
+    def start(self) -> None:
+        if self._executor is None and self._workers > 0:
+            self._executor = ProcessPoolExecutor(max_workers=self._workers)
+
+    def stop(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def hash(self, password: str) -> str:
+        return self._run(_hash_in_worker, password)
+
+    def verify(self, password: str, hashed: str) -> bool:
+        return self._run(_verify_in_worker, password, hashed)
+
+    async def hash_async(self, password: str) -> str:
+        return await self._run_async(_hash_in_worker, password)
+
+    async def verify_async(self, password: str, hashed: str) -> bool:
+        return await self._run_async(_verify_in_worker, password, hashed)
+
+    def _reject(self) -> PasswordPoolBusy:
+        with self._lock:
+            self._stats["rejected"] += 1
+        return PasswordPoolBusy(self._retry_after)
+
+    def _begin(self) -> float:
+        with self._lock:
+            self._stats["in_flight"] += 1
+        return time.perf_counter()
+
+    def _end(self) -> None:
+        self._admission.release()
+        with self._lock:
+            self._stats["in_flight"] -= 1
+
+    def _record(self, started: float, hash_ms: float) -> None:
+        wait_ms = max((time.perf_counter() - started) * 1000 - hash_ms, 0.0)
+        with self._lock:
+            self._stats["completed"] += 1
+            self._stats["queue_wait_ms_total"] += wait_ms
+            self._stats["queue_wait_ms_max"] = max(self._stats["queue_wait_ms_max"], wait_ms)
+            self._stats["hash_ms_total"] += hash_ms
+            self._stats["hash_ms_max"] = max(self._stats["hash_ms_max"], hash_ms)
+
+    def _run(self, func: Callable[..., Tuple[Any, float]], *args: Any) -> Any:
+        if not self._admission.acquire(timeout=self._admission_timeout):
+            raise self._reject()
+        started = self._begin()
+        try:
+            executor = self._executor
+            result, hash_ms = executor.submit(func, *args).result() if executor else func(*args)
+        finally:
+            self._end()
+        self._record(started, hash_ms)
+        return result
+
+    def _gate(self) -> asyncio.Semaphore:
+        """Admission queue for async callers; an asyncio.Semaphore belongs to one event loop, so it follows the running one."""
+        loop = asyncio.get_running_loop()
+        if self._async_gate is None or self._async_gate[0] is not loop:
+            self._async_gate = (loop, asyncio.Semaphore(self._capacity))
+        return self._async_gate[1]
+
+    async def _admit_async(self, gate: asyncio.Semaphore) -> None:
+        try:
+            async with asyncio.timeout(self._admission_timeout):
+                await gate.acquire()
+        except TimeoutError:
+            raise self._reject() from None
+
+    async def _run_async(self, func: Callable[..., Tuple[Any, float]], *args: Any) -> Any:
+        gate = self._gate()
+        await self._admit_async(gate)
+        try:
+            # Slots held by synchronous callers are not visible to the gate; never block the loop waiting for them.
+            if not self._admission.acquire(blocking=False):
+                raise self._reject()
+            started = self._begin()
+            try:
+                executor = self._executor
+                result, hash_ms = await (asyncio.get_running_loop().run_in_executor(executor, func, *args) if executor else run_in_threadpool(func, *args))
+            finally:
+                self._end()
+        finally:
+            gate.release()
+        self._record(started, hash_ms)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        completed = stats.pop("completed")
+        wait_total, hash_total = stats.pop("queue_wait_ms_total"), stats.pop("hash_ms_total")
+        return {"running": self.running, "workers": self._workers, "capacity": self._capacity, "completed": completed, **stats, "queue_wait_ms_avg": round(wait_total / completed, 3) if completed else None, "hash_ms_avg": round(hash_total / completed, 3) if completed else None}
+
+
+password_hasher = PasswordHasher(workers=settings.PASSWORD_POOL_WORKERS, queue_size=settings.PASSWORD_POOL_QUEUE_SIZE, admission_timeout_ms=settings.PASSWORD_POOL_ADMISSION_TIMEOUT_MS, retry_after_seconds=settings.PASSWORD_POOL_RETRY_AFTER_SECONDS)
@@ -0,0 +1,191 @@
+import logging
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from pydantic import ValidationError
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.db.database import SessionLocal
+from app.models.consent import PurposeEnum, RegionEnum, StatusEnum
+from app.models.policy import PolicyDefinition as PolicyDefinitionRecord
+from app.schemas.policy import PolicyDefinition
+from app.utils.helpers import get_utc_now
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POLICY_DEFINITION: Dict[str, Any] = {
+    "frameworks": {
+        "gdpr": {"regions": ["EU", "INDIA", "UK", "IN"], "requires_explicit": True, "default": "deny", "reasons": {"granted": "gdpr_granted", "requires_grant": "gdpr_requires_grant", "denied": "gdpr_{status}", "default_allow": "gdpr_default_allow"}},
+        "lgpd": {"regions": ["BR"], "requires_explicit": True, "default": "deny", "reasons": {"granted": "lgpd_granted", "requires_grant": "lgpd_requires_grant", "denied": "lgpd_{status}", "default_allow": "lgpd_default_allow"}},
+        "ccpa": {"regions": ["US"], "requires_explicit": False, "default": "allow", "reasons": {"granted": "ccpa_granted", "requires_grant": "ccpa_requires_grant", "denied": "ccpa_{status}", "default_allow": "ccpa_default_allow"}},
+        "global": {"regions": [], "requires_explicit": False, "default": "allow", "reasons": {"granted": "global_granted", "requires_grant": "global_requires_grant", "denied": "global_{status}", "default_allow": "row_default_allow"}},
+    },
+    "fallback_framework": "global",
+    "sensitive_purposes": [purpose.value for purpose in PurposeEnum],
+    "denied_statuses": [StatusEnum.REVOKED.value, StatusEnum.DENIED.value],
+}
+
+_REGIONS = list(RegionEnum)
+_PURPOSES = list(PurposeEnum)
+_STATUS_SLOTS: List[Optional[StatusEnum]] = [*StatusEnum, None]
+_REGION_ORD = {region: index for index, region in enumerate(_REGIONS)}
+_PURPOSE_ORD = {purpose: index for index, purpose in enumerate(_PURPOSES)}
+_STATUS_ORD = {status: index for index, status in enumerate(_STATUS_SLOTS)}
+
+
+class CompiledPolicy:
+    """A policy definition flattened into a dense (region, purpose, status) -> (allowed, reason code) table."""
+
+    def __init__(self, version: int, definition: Dict[str, Any], table: List[Tuple[bool, int]], reasons: List[str], snapshots: Dict[RegionEnum, Dict[str, Any]]):
+        self.version = version
+        self.definition = definition
+        self.reasons = reasons
+        self._table = table
+        self._snapshots = snapshots
+
+    def _index(self, region: RegionEnum, purpose: PurposeEnum, status: Optional[StatusEnum]) -> int:
+        return (_REGION_ORD[region] * len(_PURPOSES) + _PURPOSE_ORD[purpose]) * len(_STATUS_SLOTS) + _STATUS_ORD[status]
+
+    def evaluate_code(self, region: RegionEnum, purpose: PurposeEnum, status: Optional[StatusEnum]) -> Tuple[bool, int]:
+        return self._table[self._index(region, purpose, status)]
+
+    def evaluate(self, region: RegionEnum, purpose: PurposeEnum, status: Optional[StatusEnum]) -> Tuple[bool, str]:
+        allowed, reason_code = self._table[self._index(region, purpose, status)]
+        return allowed, self.reasons[reason_code]
+
+    def snapshot(self, region: RegionEnum) -> Dict[str, Any]:
+        return dict(self._snapshots[region])
+
+
+def _rule(framework: Dict[str, Any], sensitive: bool, status: Optional[StatusEnum], denied_statuses: frozenset) -> Tuple[bool, str]:
+    reasons = framework["reasons"]
+    if framework["requires_explicit"] and sensitive:
+        return (True, reasons["granted"]) if status == StatusEnum.GRANTED else (False, reasons["requires_grant"])
+    if status in denied_statuses:
+        return False, reasons["denied"].replace("{status}", status.value)
+    return True, reasons["default_allow"]
+
+
+def compile_policy(definition: Dict[str, Any], version: int) -> CompiledPolicy:
+    try:
+        normalized = PolicyDefinition.model_validate(definition).model_dump()
+    except ValidationError as exc:
+        raise ValueError(f"invalid_policy_definition: {exc.errors()[0].get('msg', 'invalid definition')}") from exc
+    region_framework = {RegionEnum(region): name for name, framework in normalized["frameworks"].items() for region in framework["regions"]}
+    sensitive = frozenset(PurposeEnum(purpose) for purpose in normalized["sensitive_purposes"])
+    denied_statuses = frozenset(StatusEnum(status) for status in normalized["denied_statuses"])
+    reasons: List[str] = []
+    reason_codes: Dict[str, int] = {}
+    table: List[Tuple[bool, int]] = []
+    snapshots: Dict[RegionEnum, Dict[str, Any]] = {}
+    for region in _REGIONS:
+        name = region_framework.get(region, normalized["fallback_framework"])
+        framework = normalized["frameworks"][name]
+        snapshots[region] = {"region": region.value, "policy": name, "requires_explicit": framework["requires_explicit"], "default": framework["default"], "policy_version": version}
+        for purpose in _PURPOSES:
+            for status in _STATUS_SLOTS:
+                allowed, reason = _rule(framework, purpose in sensitive, status, denied_statuses)
+                table.append((allowed, reason_codes.setdefault(reason, len(reasons))))
+                if reason_codes[reason] == len(reasons):
+                    reasons.append(reason)
+    return CompiledPolicy(version, normalized, table, reasons, snapshots)
+
+
+_DEFAULT_POLICY = compile_policy(DEFAULT_POLICY_DEFINITION, version=0)
+_active_policy: CompiledPolicy = _DEFAULT_POLICY
+_swap_lock = threading.Lock()
+_compiled_versions: Dict[int, CompiledPolicy] = {}
+
+
+def get_active_policy() -> CompiledPolicy:
+    return _active_policy
+
+
+def activate_policy(policy: CompiledPolicy) -> None:
+    """Atomically replace the in-process policy table; in-flight evaluations finish on the table they already hold."""
+    global _active_policy
+    with _swap_lock:
+        _active_policy = policy
+
+
+def reset_active_policy() -> None:
+    activate_policy(_DEFAULT_POLICY)
+    _compiled_versions.clear()
+
+
+def load_active_policy(db: Session) -> CompiledPolicy:
+    record = db.query(PolicyDefinitionRecord).filter(PolicyDefinitionRecord.is_active.is_(True)).order_by(PolicyDefinitionRecord.version.desc()).first()
+    if record is None:
+        policy = _DEFAULT_POLICY
+    elif record.version == _active_policy.version:
+        return _active_policy
+    else:
+        policy = compile_policy(record.definition, record.version)
+    activate_policy(policy)
+    return policy
+
+
+def policy_as_of(db: Session, at: datetime) -> CompiledPolicy:
+    """The policy that was live at `at`: the last version published at or before it, or the built-in default.
+
+    Only the latest publish time of a version is kept, so a version re-published by a rollback answers for its
+    newest window; earlier windows resolve to whichever version was published before them.
+    """
+    record = db.query(PolicyDefinitionRecord).filter(PolicyDefinitionRecord.published_at.isnot(None), PolicyDefinitionRecord.published_at <= at).order_by(PolicyDefinitionRecord.published_at.desc()).first()
+    if record is None:
+        return _DEFAULT_POLICY
+    if record.version == _active_policy.version:
+        return _active_policy
+    if record.version not in _compiled_versions:
+        _compiled_versions[record.version] = compile_policy(record.definition, record.version)
+    return _compiled_versions[record.version]
+
+
+def refresh_active_policy() -> None:
+    """Scheduler hook: pick up versions published by other workers."""
+    db = SessionLocal()
+    try:
+        load_active_policy(db)
+    except Exception:
+        logger.exception("Failed to refresh active policy definition")
+    finally:
+        db.close()
+
+
+_CREATE_ATTEMPTS = 5
+
+
+def create_policy_version(db: Session, definition: Dict[str, Any], *, created_by: Optional[str] = None, publish: bool = True) -> PolicyDefinitionRecord:
+    """Store `definition` as the next version. Two concurrent creates can read the same latest version; the one whose
+    insert hits the unique version index rolls back and takes the next number."""
+    compiled = compile_policy(definition, 0)
+    for _ in range(_CREATE_ATTEMPTS):
+        latest = db.query(PolicyDefinitionRecord.version).order_by(PolicyDefinitionRecord.version.desc()).first()
+        version = (latest.version if latest else 0) + 1
+        record = PolicyDefinitionRecord(version=version, definition=compiled.definition, created_by=created_by)
+        db.add(record)
+        try:
+            db.flush()
+        except IntegrityError:
+            db.rollback()
+            continue
+        return publish_policy_version(db, version) if publish else _commit(db, record)
+    raise ValueError("policy_version_conflict")
+
+
+def publish_policy_version(db: Session, version: int) -> PolicyDefinitionRecord:
+    record = db.query(PolicyDefinitionRecord).filter(PolicyDefinitionRecord.version == version).first()
+    if record is None:
+        raise ValueError("policy_version_not_found")
+    compiled = compile_policy(record.definition, record.version)
+    db.query(PolicyDefinitionRecord).filter(PolicyDefinitionRecord.is_active.is_(True), PolicyDefinitionRecord.version != version).update({PolicyDefinitionRecord.is_active: False}, synchronize_session=False)
+    record.is_active, record.published_at = True, get_utc_now()
+    _commit(db, record)
+    activate_policy(compiled)
+    return record
+
+
+def _commit(db: Session, record: PolicyDefinitionRecord) -> PolicyDefinitionRecord:
+    db.commit()
+    db.refresh(record)
+    return record
@@ -0,0 +1,40 @@
+import hashlib
+import json
+import threading
+from typing import Any, Dict, Optional, Set
+from sqlalchemy.orm import Session
+from app.db.dialects import upsert_insert
+from app.models.policy import PolicySnapshot
+
+_known_hashes: Set[str] = set()
+_lock = threading.Lock()
+
+
+def snapshot_hash(snapshot: Dict[str, Any]) -> str:
+    return hashlib.sha256(json.dumps(snapshot, sort_keys=True, separators=(",", ":")).encode("utf-8")).hexdigest()
+
+
+def intern_snapshot(db: Session, snapshot: Optional[Dict[str, Any]]) -> Optional[str]:
+    """Return the content hash for `snapshot`, storing it in policy_snapshots on first sight.
+
+    A newly stored snapshot is committed straight away, on a session of its own, so rows referencing it can be
+    written by other sessions (e.g. the background audit writer) while the caller's transaction stays untouched;
+    call this before staging the rows that reference it.
+    """
+    if not snapshot:
+        return None
+    content_hash = snapshot_hash(snapshot)
+    if content_hash in _known_hashes:
+        return content_hash
+    if db.query(PolicySnapshot.content_hash).filter(PolicySnapshot.content_hash == content_hash).first() is None:
+        with Session(bind=db.get_bind()) as session:
+            session.execute(upsert_insert(session, PolicySnapshot.__table__).values(content_hash=content_hash, snapshot=snapshot).on_conflict_do_nothing(index_elements=["content_hash"]))
+            session.commit()
+    with _lock:
+        _known_hashes.add(content_hash)
+    return content_hash
+
+
+def clear_cache() -> None:
+    with _lock:
+        _known_hashes.clear()
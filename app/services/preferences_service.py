@@ -1,43 +1,105 @@
-from datetime import timezone
-from typing import Dict, Optional, Tuple, Union
+import uuid
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple, Union
 from uuid import UUID
+from sqlalchemy import and_, func, select, update
 from sqlalchemy.orm import Session
+from app.db.dialects import upsert_insert
 from app.models.audit import AuditLog
-from app.models.consent import ConsentHistory, PurposeEnum, RegionEnum, StatusEnum, User
+from app.models.consent import ConsentCurrent, ConsentHistory, PurposeEnum, RegionEnum, StatusEnum, User
 from app.services import user_service
-from app.utils.helpers import build_policy_snapshot, get_audit_log_kwargs, get_utc_now, validate_region
+from app.services.policy_snapshot_service import intern_snapshot
+from app.services.policy_engine import get_active_policy
+from app.utils.helpers import build_policy_snapshot, ensure_utc, get_audit_log_kwargs, get_utc_now, validate_region
 from app.utils.security import Actor
 
 PreferencesMap = Dict[PurposeEnum, StatusEnum]
 
 
+def upsert_current_consent(db: Session, consent: ConsentHistory) -> None:
+    values = {"status": consent.status, "expires_at": consent.expires_at, "consent_id": consent.id, "updated_at": consent.timestamp}
+    statement = upsert_insert(db, ConsentCurrent.__table__).values(user_id=consent.user_id, purpose=consent.purpose, version=1, **values)
+    db.execute(statement.on_conflict_do_update(index_elements=["user_id", "purpose"], set_={**values, "version": ConsentCurrent.__table__.c.version + 1}))
+
+
+def is_unchanged(current: Optional[ConsentCurrent], status: StatusEnum, expires_at: Optional[datetime], now: datetime) -> bool:
+    """Whether writing (status, expires_at) would leave the purpose's current state as it is; a lapsed entry always changes."""
+    if current is None or current.status != status or ensure_utc(current.expires_at) != ensure_utc(expires_at):
+        return False
+    return current.expires_at is None or ensure_utc(current.expires_at) > now
+
+
+def bump_consent_version(db: Session, user_id: UUID, expected_version: Optional[int] = None) -> None:
+    """Advance the user's consent version; with `expected_version` the bump only applies if nobody else got there first."""
+    statement = update(User).where(User.id == user_id).values(consent_version=User.consent_version + 1).execution_options(synchronize_session=False)
+    if expected_version is not None:
+        statement = statement.where(User.consent_version == expected_version)
+    if db.execute(statement).rowcount == 0:
+        raise ValueError("version_conflict" if expected_version is not None else "user_not_found")
+
+
+def bump_consent_versions(db: Session, user_ids: Iterable[UUID]) -> None:
+    user_ids = list(user_ids)
+    for start in range(0, len(user_ids), 1000):
+        db.execute(update(User).where(User.id.in_(user_ids[start:start + 1000])).values(consent_version=User.consent_version + 1).execution_options(synchronize_session=False))
+
+
+def consent_etag_state(db: Session, user_id: UUID) -> Tuple[str, Optional[RegionEnum]]:
+    """Unquoted consent ETag value and the user's stored region, from one primary-key lookup."""
+    expired = select(func.count()).select_from(ConsentCurrent).where(and_(ConsentCurrent.user_id == User.id, ConsentCurrent.expires_at <= get_utc_now())).scalar_subquery()
+    row = db.execute(select(User.consent_version, expired, User.region).where(User.id == user_id)).first()
+    if row is None:
+        raise ValueError("user_not_found")
+    return f"{row[0]}.{row[1]}.{get_active_policy().version}", row[2]
+
+
+def get_consent_etag(db: Session, user_id: UUID) -> str:
+    """ETag for everything derived from a user's consent state: the consent version, how many current entries have
+    lapsed (expiry changes reads without a write) and the active policy version. One primary-key lookup."""
+    return f'"{consent_etag_state(db, user_id)[0]}"'
+
+
+def parse_etag_version(etag: str) -> Optional[int]:
+    """Consent version carried by an ETag from get_consent_etag, or None if it is not one of ours."""
+    value = etag.strip().removeprefix("W/").strip('"')
+    head = value.split(".", 1)[0]
+    return int(head) if head.isdigit() else None
+
+
 def get_latest_preferences(db: Session, user_id: UUID) -> Tuple[RegionEnum, PreferencesMap]:
-    user = user_service.get_user(db, user_id)
+    rows = db.query(User.region, ConsentCurrent.purpose, ConsentCurrent.status, ConsentCurrent.expires_at).outerjoin(ConsentCurrent, ConsentCurrent.user_id == User.id).filter(User.id == user_id).all()
+    if not rows:
+        raise ValueError("user_not_found")
     preferences = {purpose: StatusEnum.REVOKED for purpose in PurposeEnum}
-    seen = set()
     now = get_utc_now()
-    for record in db.query(ConsentHistory).filter(ConsentHistory.user_id == user_id).order_by(ConsentHistory.timestamp.desc()).all():
-        if record.purpose in seen:
+    for _, purpose, status, expires_at in rows:
+        if purpose is None:
             continue
-        expires_at = record.expires_at.replace(tzinfo=timezone.utc) if record.expires_at and not record.expires_at.tzinfo else record.expires_at
-        preferences[record.purpose] = StatusEnum.REVOKED if expires_at and expires_at < now else record.status
-        seen.add(record.purpose)
-        if len(seen) == len(PurposeEnum):
-            break
-    return user.region, preferences
+        expires_at = ensure_utc(expires_at)
+        preferences[purpose] = StatusEnum.REVOKED if expires_at and expires_at < now else status
+    return rows[0].region, preferences
 
 
-def update_preferences(db: Session, user_id: UUID, updates: Dict[PurposeEnum, StatusEnum], actor: Optional[Union[Actor, User]] = None) -> Tuple[RegionEnum, PreferencesMap]:
+def update_preferences(db: Session, user_id: UUID, updates: Dict[PurposeEnum, StatusEnum], actor: Optional[Union[Actor, User]] = None, expected_version: Optional[int] = None) -> Tuple[RegionEnum, PreferencesMap]:
     if not updates:
         raise ValueError("no_updates")
     user = user_service.get_user(db, user_id)
     region = validate_region(user.region)
-    snapshot = build_policy_snapshot(region)
     now = get_utc_now()
-    new_entries = [ConsentHistory(user_id=user.id, purpose=purpose, status=status, region=region, timestamp=now, policy_snapshot=snapshot) for purpose, status in updates.items()]
+    current = {row.purpose: row for row in db.query(ConsentCurrent).filter(ConsentCurrent.user_id == user.id, ConsentCurrent.purpose.in_(list(updates)))}
+    updates = {purpose: status for purpose, status in updates.items() if not is_unchanged(current.get(purpose), status, None, now)}
+    if not updates:
+        # Nothing would change: no history rows, no audit entry, and the consent version (and ETag) stays put.
+        if expected_version is not None and user.consent_version != expected_version:
+            raise ValueError("version_conflict")
+        return get_latest_preferences(db, user.id)
+    snapshot_id = intern_snapshot(db, build_policy_snapshot(region))
+    bump_consent_version(db, user.id, expected_version)
+    new_entries = [ConsentHistory(id=uuid.uuid4(), user_id=user.id, purpose=purpose, status=status, region=region, timestamp=now, policy_snapshot_id=snapshot_id) for purpose, status in updates.items()]
     audit_kwargs = get_audit_log_kwargs(actor, user_id=user.id)
     db.add_all(new_entries)
-    db.add(AuditLog(action="preferences.updated", details={"user_id": str(user.id), "region": region.value, "updates": {p.value: s.value for p, s in updates.items()}}, created_at=now, policy_snapshot=snapshot, **audit_kwargs))
+    for entry in new_entries:
+        upsert_current_consent(db, entry)
+    db.add(AuditLog(action="preferences.updated", details={"user_id": str(user.id), "region": region.value, "updates": {p.value: s.value for p, s in updates.items()}}, created_at=now, policy_snapshot_id=snapshot_id, **audit_kwargs))
     db.commit()
     return get_latest_preferences(db, user.id)
-
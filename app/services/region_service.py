@@ -1,35 +1,227 @@
+import ipaddress
+import logging
+import threading
+from datetime import datetime, timezone
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, FrozenSet, Iterable, Iterator, Optional, Tuple, Union
 
 from app.config import settings
 from app.models.consent import RegionEnum
 
 try:
-    from geoip2.database import Reader
+    import maxminddb
 except ImportError:
-    Reader = None
+    maxminddb = None
 
+logger = logging.getLogger(__name__)
 
-GEOIP_DB_PATH = Path(__file__).resolve().parent.parent / "geoip" / "GeoLite2-Country.mmdb"
-_MAXMIND_READY = bool(settings.MAXMIND_ACCOUNT_ID and settings.MAXMIND_LICENSE_KEY)
-_GEOIP_READER: Optional["Reader"] = None
+GEOIP_DB_PATH = Path(settings.GEOIP_DB_PATH) if settings.GEOIP_DB_PATH else Path(__file__).resolve().parent.parent / "geoip" / "GeoLite2-Country.mmdb"
+_MAXMIND_READY = bool(settings.GEOIP_DB_PATH or (settings.MAXMIND_ACCOUNT_ID and settings.MAXMIND_LICENSE_KEY))
 
-if _MAXMIND_READY and Reader is not None:
+_NON_PUBLIC_NETWORKS = (
+    "0.0.0.0/8", "10.0.0.0/8", "100.64.0.0/10", "127.0.0.0/8", "169.254.0.0/16", "172.16.0.0/12", "192.0.0.0/24", "192.0.2.0/24",
+    "192.168.0.0/16", "198.18.0.0/15", "198.51.100.0/24", "203.0.113.0/24", "224.0.0.0/4", "240.0.0.0/4",
+    "::/128", "::1/128", "64:ff9b:1::/48", "100::/64", "2001:db8::/32", "fc00::/7", "fe80::/10", "ff00::/8",
+)
+
+
+class _NetworkSet:
+    """Private/reserved CIDR blocks indexed by prefix length: a lookup is one shift and set probe per distinct length."""
+
+    def __init__(self, networks: Iterable[str]):
+        self._buckets: Dict[int, Dict[int, FrozenSet[int]]] = {}
+        grouped: Dict[int, Dict[int, set]] = {4: {}, 6: {}}
+        for network in map(ipaddress.ip_network, networks):
+            grouped[network.version].setdefault(network.prefixlen, set()).add(int(network.network_address) >> (network.max_prefixlen - network.prefixlen))
+        for version, by_length in grouped.items():
+            self._buckets[version] = {length: frozenset(prefixes) for length, prefixes in sorted(by_length.items())}
+
+    def contains(self, address: Union[ipaddress.IPv4Address, ipaddress.IPv6Address]) -> bool:
+        if address.version == 6 and address.ipv4_mapped is not None:
+            address = address.ipv4_mapped
+        value, bits = int(address), address.max_prefixlen
+        return any(value >> (bits - length) in prefixes for length, prefixes in self._buckets[address.version].items())
+
+
+_NON_PUBLIC = _NetworkSet(_NON_PUBLIC_NETWORKS)
+_MISSING = object()
+_BATCH_DEDUP_LIMIT = 500000
+
+
+def _open_reader(db_path: Path) -> Any:
+    """Open the MMDB memory-mapped, through the C extension when it is available."""
     try:
-        if GEOIP_DB_PATH.exists():
-            _GEOIP_READER = Reader(str(GEOIP_DB_PATH))
-    except Exception:
-        _GEOIP_READER = None
+        return maxminddb.open_database(str(db_path), maxminddb.MODE_MMAP_EXT)
+    except (ImportError, ValueError):
+        return maxminddb.open_database(str(db_path), maxminddb.MODE_MMAP)
+
+
+def _file_signature(path: Optional[Path]) -> Optional[Tuple[int, int]]:
+    try:
+        stat = path.stat() if path is not None else None
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size) if stat else None
+
+
+class RegionResolver:
+    """Memory-mapped GeoIP reader (pages shared across pre-forked workers) with a bounded LRU of ip -> region.
+
+    Instances are immutable once built; reloading swaps in a new resolver (and with it an empty LRU).
+    """
+
+    def __init__(self, db_path: Optional[Path] = None, cache_size: int = 65536, *, reader: Any = None):
+        self.db_path = db_path
+        self.signature = _file_signature(db_path)
+        self.loaded_at = datetime.now(timezone.utc)
+        self._reader = reader if reader is not None else _open_reader(db_path) if db_path is not None and maxminddb is not None else None
+        self.lookup = lru_cache(maxsize=cache_size)(self._lookup_uncached)
+
+    def validate(self) -> None:
+        """Reject files that are not a country-capable MaxMind database before they are swapped in."""
+        if self._reader is None:
+            raise ValueError("invalid_geoip_database")
+        database_type = getattr(self._reader.metadata(), "database_type", "") or ""
+        if "Country" not in database_type and "City" not in database_type:
+            raise ValueError("invalid_geoip_database")
+        self._reader.get("8.8.8.8")
+
+    @property
+    def available(self) -> bool:
+        return self._reader is not None
+
+    def _lookup_uncached(self, ip: str) -> Optional[RegionEnum]:
+        if self._reader is None:
+            return None
+        try:
+            address = ipaddress.ip_address(ip)
+        except ValueError:
+            return None
+        if _NON_PUBLIC.contains(address):
+            return None
+        try:
+            record = self._reader.get(address) or {}
+        except Exception:
+            return None
+        # Only where the address is used counts; registered_country is where its block is registered (e.g. a US cloud
+        # provider for an EU customer) and would put the user under the wrong jurisdiction.
+        iso_code = ((record.get("country") or {}).get("iso_code") or "").upper()
+        return _map_iso_to_region(iso_code) if iso_code else None
+
+    def resolve_many(self, ips: Iterable[str]) -> Iterator[Tuple[str, Optional[RegionEnum]]]:
+        """Resolve a stream of IPs, deduplicating within the batch independently of the LRU size."""
+        seen: Dict[str, Optional[RegionEnum]] = {}
+        for ip in ips:
+            ip = ip.strip()
+            if not ip:
+                continue
+            region = seen.get(ip, _MISSING)
+            if region is _MISSING:
+                if len(seen) >= _BATCH_DEDUP_LIMIT:
+                    seen.clear()
+                region = seen[ip] = self._lookup_uncached(ip)
+            yield ip, region
+
+    def close(self) -> None:
+        if self._reader is not None:
+            self._reader.close()
+
+    def stats(self) -> Dict[str, Optional[Union[int, str, bool]]]:
+        info = self.lookup.cache_info()
+        metadata = self._reader.metadata() if self._reader is not None else None
+        return {"available": self.available, "db_path": str(self.db_path) if self.db_path else None, "database_type": getattr(metadata, "database_type", None), "build_epoch": getattr(metadata, "build_epoch", None), "loaded_at": self.loaded_at.isoformat(), "cache_hits": info.hits, "cache_misses": info.misses, "cache_size": info.currsize, "cache_maxsize": info.maxsize}
+
+
+def _open_default_resolver() -> RegionResolver:
+    if _MAXMIND_READY and maxminddb is not None and GEOIP_DB_PATH.exists():
+        try:
+            return RegionResolver(GEOIP_DB_PATH, settings.REGION_CACHE_SIZE)
+        except Exception:
+            logger.exception("Failed to open GeoIP database at %s", GEOIP_DB_PATH)
+    return RegionResolver(None, settings.REGION_CACHE_SIZE)
+
+
+_resolver = _open_default_resolver()
+_public_ip: Optional[str] = settings.PUBLIC_IP
+
+
+_reload_lock = threading.Lock()
+_rejected_signature: Optional[Tuple[int, int]] = None
+
+
+def get_resolver() -> RegionResolver:
+    return _resolver
+
+
+def reload_geoip_database() -> Dict[str, Any]:
+    """Open and validate GEOIP_DB_PATH, then swap it in. Lookups already holding the old resolver finish on it;
+    its reader is released once they drop their references. Raises ValueError and keeps serving on failure."""
+    global _resolver, _rejected_signature
+    with _reload_lock:
+        if maxminddb is None or not GEOIP_DB_PATH.exists():
+            raise ValueError("geoip_database_not_found")
+        try:
+            candidate = RegionResolver(GEOIP_DB_PATH, settings.REGION_CACHE_SIZE)
+            candidate.validate()
+        except Exception as exc:
+            _rejected_signature = _file_signature(GEOIP_DB_PATH)
+            logger.warning("Rejected GeoIP database at %s: %s", GEOIP_DB_PATH, exc)
+            raise ValueError("invalid_geoip_database") from exc
+        _resolver = candidate
+    logger.info("Loaded GeoIP database %s (build %s)", GEOIP_DB_PATH, candidate.stats()["build_epoch"])
+    return candidate.stats()
+
+
+def check_geoip_reload() -> bool:
+    """Scheduler hook: reload when the database file changed. Replace the file by rename so it is never read half-written."""
+    signature = _file_signature(GEOIP_DB_PATH)
+    if signature is None or signature == _resolver.signature or signature == _rejected_signature:
+        return False
+    try:
+        reload_geoip_database()
+    except ValueError:
+        return False
+    return True
 
 
 EU_COUNTRIES = frozenset({"AT", "BE", "BG", "CH", "CY", "CZ", "DE", "DK", "EE", "ES", "FI", "FR", "GR", "HR", "HU", "IE", "IT", "LT", "LU", "LV", "MT", "NL", "NO", "PL", "PT", "RO", "SE", "SI", "SK"})
 
 
+def parse_ip_list(payload: Union[bytes, str]) -> Iterable[str]:
+    """Accept a JSON array of IPs or newline-delimited text."""
+    text = payload.decode("utf-8") if isinstance(payload, bytes) else payload
+    if text.lstrip().startswith(("[", "{")):
+        import json
+        items = json.loads(text)
+        if not isinstance(items, list) or not all(isinstance(item, str) for item in items):
+            raise ValueError("invalid_ip_list")
+        return items
+    return text.splitlines()
+
+
+def resolve_regions(ips: Iterable[str]) -> Iterator[Tuple[str, RegionEnum, bool]]:
+    """Batch lookups for log enrichment: no public-IP fallback, so local addresses resolve to ROW."""
+    for ip, region in _resolver.resolve_many(ips):
+        yield ip, region or RegionEnum.ROW, region is not None
+
+
+def init_public_ip() -> Optional[str]:
+    """Startup hook: fix the address used for local clients. Never called while handling a request."""
+    global _public_ip
+    if settings.PUBLIC_IP:
+        _public_ip = settings.PUBLIC_IP
+    elif settings.RESOLVE_PUBLIC_IP_ON_STARTUP:
+        _public_ip = _get_public_ip()
+        logger.info("Resolved public IP for local clients: %s", _public_ip)
+    return _public_ip
+
+
 def detect_region_from_ip(ip: Optional[str]) -> RegionEnum:
+    """Pure in-process lookup; local addresses fall back to the startup-time public IP, if any."""
     normalized_ip = (ip or "").strip()
     if _is_local_ip(normalized_ip):
-        public_ip = _get_public_ip()
-        normalized_ip = public_ip if public_ip and not _is_local_ip(public_ip) else ""
+        normalized_ip = _public_ip if _public_ip and not _is_local_ip(_public_ip) else ""
     if not normalized_ip:
         return RegionEnum.ROW
     result = _detect_with_maxmind(normalized_ip)
@@ -37,13 +229,7 @@ def detect_region_from_ip(ip: Optional[str]) -> RegionEnum:
 
 
 def _detect_with_maxmind(ip: str) -> Optional[RegionEnum]:
-    if not ip or _GEOIP_READER is None:
-        return None
-    try:
-        iso_code = (_GEOIP_READER.country(ip).country.iso_code or "").upper()
-        return _map_iso_to_region(iso_code) if iso_code else None
-    except Exception:
-        return None
+    return _resolver.lookup(ip) if ip else None
 
 
 def _map_iso_to_region(iso_code: Optional[str]) -> RegionEnum:
@@ -65,10 +251,13 @@ def _map_iso_to_region(iso_code: Optional[str]) -> RegionEnum:
 
 
 def _is_local_ip(ip: str) -> bool:
-    if not ip:
+    """True for empty/localhost and private, loopback, link-local or otherwise reserved addresses."""
+    if not ip or ip.lower() == "localhost":
         return True
-    normalized = ip.lower()
-    return normalized.startswith(("127.", "localhost", "192.168.", "10.", "172.16.")) or normalized == "::1"
+    try:
+        return _NON_PUBLIC.contains(ipaddress.ip_address(ip))
+    except ValueError:
+        return False
 
 
 def _get_public_ip() -> Optional[str]:
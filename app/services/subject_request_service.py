@@ -1,17 +1,24 @@
 import hashlib
-from typing import Dict, Optional, Union
+import json
+from typing import Any, Dict, Iterator, Optional, Union
 from uuid import UUID
+from sqlalchemy import Row, or_, select, tuple_
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from app.models.audit import AuditLog, EventTypeEnum
-from app.models.consent import ConsentHistory, RegionEnum, RequestStatusEnum, RequestTypeEnum, SubjectRequest, User
+from app.models.consent import ConsentCurrent, ConsentHistory, ConsentHistoryArchive, RegionEnum, RequestStatusEnum, RequestTypeEnum, SubjectRequest, User
+from app.models.idempotency import IdempotencyKey
+from app.models.policy import PolicySnapshot
 from app.schemas.consent import ConsentResponse
-from app.schemas.subject_requests import DataAccessResponse, DataExportResponse
-from app.services import consent_service, preferences_service, user_service
+from app.schemas.subject_requests import DataAccessResponse
+from app.services import api_key_service, consent_service, preferences_service, user_service
 from app.utils.helpers import get_audit_log_kwargs, get_utc_now, validate_region
-from app.utils.security import Actor
+from app.utils.security import Actor, invalidate_actor
 
 SUPPORTED_TYPES = {RequestTypeEnum.EXPORT, RequestTypeEnum.DELETE, RequestTypeEnum.ACCESS}
+EXPORT_PAGE_SIZE = 500
+
+_AUDIT_TABLE = AuditLog.__table__
 
 
 def create_request(db: Session, user_id: UUID, request_type: RequestTypeEnum, actor: Optional[Union[Actor, User]] = None) -> SubjectRequest:
@@ -35,22 +42,57 @@ def _mark_request_completed(db: Session, request: SubjectRequest, action: str, a
         db.commit()
 
 
-def process_export_request(db: Session, request: SubjectRequest, actor: Optional[Union[Actor, User]] = None) -> DataExportResponse:
+def _collect_snapshot(item, seen: set, payload: list) -> None:
+    if item.policy_snapshot_id and item.policy_snapshot_id not in seen:
+        seen.add(item.policy_snapshot_id)
+        payload.append(item.policy_snapshot)
+
+
+def iter_subject_audit_logs(db: Session, user_id: UUID, *, page_size: int = EXPORT_PAGE_SIZE) -> Iterator[Row]:
+    """Every audit row about a user, newest first, as plain rows fetched one keyset page on (event_time, id) at a time."""
+    table = _AUDIT_TABLE
+    query = select(table.c.id, table.c.event_type, table.c.action, table.c.event_time, table.c.details, table.c.policy_snapshot_id, PolicySnapshot.snapshot.label("policy_snapshot")).outerjoin(PolicySnapshot, PolicySnapshot.content_hash == table.c.policy_snapshot_id)
+    query = query.where(or_(table.c.subject_id == user_id, table.c.user_id == user_id)).order_by(table.c.event_time.desc(), table.c.id.desc()).limit(page_size)
+    position = None
+    while True:
+        rows = db.execute(query.where(tuple_(table.c.event_time, table.c.id) < tuple_(*position, types=[table.c.event_time.type, table.c.id.type])) if position else query).all()
+        yield from rows
+        if len(rows) < page_size:
+            return
+        position = (rows[-1].event_time, rows[-1].id)
+
+
+def process_export_request(db: Session, request: SubjectRequest) -> Dict[str, Any]:
+    """Validate an export request and load the document head (user, region, preferences); raises ValueError.
+
+    Everything that can fail with a client error happens here, before a streamed response commits to a 200;
+    stream_export then produces the rest of the document.
+    """
     if request.request_type != RequestTypeEnum.EXPORT:
         raise ValueError("unsupported_request_type")
     region, preferences = preferences_service.get_latest_preferences(db, request.user_id)
-    history_records = consent_service.get_history(db, request.user_id)
-    audit_logs = db.query(AuditLog).filter((AuditLog.subject_id == request.user_id) | (AuditLog.user_id == request.user_id)).order_by(AuditLog.event_time.desc()).all()
+    return {"user_id": str(request.user_id), "region": region.value, "preferences": {p.value: s.value for p, s in preferences.items()}}
+
+
+def stream_export(db: Session, request: SubjectRequest, head: Dict[str, Any], actor: Optional[Union[Actor, User]] = None, *, page_size: int = EXPORT_PAGE_SIZE) -> Iterator[str]:
+    """The export document (the DataExportResponse shape) as JSON text chunks, produced while it is consumed.
+
+    History and audit rows are read a keyset page at a time and written out as they arrive, so memory stays bounded by
+    one page no matter how long the subject's history is; only the distinct policy snapshots are kept until the end.
+    The request is marked completed once the whole document has been produced.
+    """
     seen_snapshots, policy_snapshots_payload = set(), []
-    for item in history_records + audit_logs:
-        if item.policy_snapshot:
-            key = str(sorted(item.policy_snapshot.items())) if isinstance(item.policy_snapshot, dict) else str(item.policy_snapshot)
-            if key not in seen_snapshots:
-                seen_snapshots.add(key)
-                policy_snapshots_payload.append(item.policy_snapshot)
+    yield json.dumps(head)[:-1] + ', "history": ['
+    for index, row in enumerate(consent_service.iter_history(db, request.user_id, page_size=page_size)):
+        yield ("," if index else "") + ConsentResponse.model_validate(row).model_dump_json()
+        _collect_snapshot(row, seen_snapshots, policy_snapshots_payload)
+    yield '], "audit_logs": ['
+    for index, log in enumerate(iter_subject_audit_logs(db, request.user_id, page_size=page_size)):
+        yield ("," if index else "") + json.dumps({"id": str(log.id), "event_type": log.event_type, "action": log.action, "event_time": log.event_time.isoformat() if log.event_time else None, "details": log.details, "policy_snapshot": log.policy_snapshot}, default=str)
+        _collect_snapshot(log, seen_snapshots, policy_snapshots_payload)
+    yield '], "policy_snapshots": ' + json.dumps(policy_snapshots_payload, default=str) + "}"
     request.result_location = f"https://storage.service/exports/export_{request.user_id}_{get_utc_now().strftime('%Y%m%d_%H%M%S')}.json"
     _mark_request_completed(db, request, "subject.request.export.completed", actor)
-    return DataExportResponse(user_id=request.user_id, region=region, preferences={p.value: s.value for p, s in preferences.items()}, history=[ConsentResponse.model_validate(r) for r in history_records], audit_logs=[{"id": str(log.id), "event_type": log.event_type, "action": log.action, "event_time": log.event_time.isoformat() if log.event_time else None, "details": log.details, "policy_snapshot": log.policy_snapshot} for log in audit_logs], policy_snapshots=policy_snapshots_payload)
 
 
 def process_access_request(db: Session, request: SubjectRequest, actor: Optional[Union[Actor, User]] = None) -> DataAccessResponse:
@@ -77,11 +119,17 @@ def process_delete_request(db: Session, request: SubjectRequest) -> Dict[str, st
     if user.primary_identifier_value:
         user.primary_identifier_value = f"deleted-{pseudonym_suffix}"
     user.deleted_at = now
+    preferences_service.bump_consent_version(db, user.id)
+    api_key_service.revoke_user_keys(db, user.id)
+    db.query(ConsentCurrent).filter(ConsentCurrent.user_id == request.user_id).delete(synchronize_session=False)
     db.query(ConsentHistory).filter(ConsentHistory.user_id == request.user_id).delete(synchronize_session=False)
+    db.query(ConsentHistoryArchive).filter(ConsentHistoryArchive.user_id == request.user_id).delete(synchronize_session=False)
     db.query(SubjectRequest).filter(SubjectRequest.user_id == request.user_id, SubjectRequest.id != request.id).delete(synchronize_session=False)
+    db.query(IdempotencyKey).filter(IdempotencyKey.scope == f"user:{request.user_id}").delete(synchronize_session=False)
     db.add(AuditLog(tenant_id=user.tenant_id, subject_id=request.user_id, user_id=request.user_id, actor_type="system", event_type=EventTypeEnum.DELETION_COMPLETED.value, action="subject.request.deletion.completed", details={"user_id": str(request.user_id), "request_id": str(request.id), "pseudonymized": True}, event_time=now, created_at=now))
     request.status, request.completed_at = RequestStatusEnum.COMPLETED, now
     db.commit()
+    invalidate_actor(request.user_id)
     return {"status": "completed"}
 
 
@@ -91,6 +139,7 @@ def process_rectify_request(db: Session, user_id: UUID, *, new_region: RegionEnu
     user = user_service.get_user(db, user_id)
     now = get_utc_now()
     user.region = validate_region(new_region)
+    preferences_service.bump_consent_version(db, user.id)
     request = SubjectRequest(user_id=user.id, request_type=RequestTypeEnum.RECTIFY, status=RequestStatusEnum.COMPLETED, requested_at=now, completed_at=now)
     db.add_all([user, request, AuditLog(action="subject.rectify.completed", details={"user_id": str(user.id), "request_id": str(request.id), "changes": {"region": user.region.value}}, created_at=now, **get_audit_log_kwargs(actor, user_id=user.id))])
     db.commit()
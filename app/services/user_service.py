@@ -6,7 +6,7 @@ from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from app.models.consent import RegionEnum, User
 from app.utils.helpers import validate_region
-from app.utils.security import hash_password
+from app.services.password_hasher import password_hasher
 
 _email_adapter = TypeAdapter(EmailStr)
 
@@ -18,9 +18,10 @@ def validate_email(email: str) -> str:
         raise ValueError("invalid_email")
 
 
-def create_user(db: Session, email: str, region: Union[str, RegionEnum], password: Optional[str] = None) -> User:
+def create_user(db: Session, email: str, region: Union[str, RegionEnum], password: Optional[str] = None, *, password_hash: Optional[str] = None) -> User:
+    """Pass `password_hash` when the caller already hashed the password (request handlers use the async pool API)."""
     api_key = secrets.token_urlsafe(32)
-    password_hash = hash_password(password) if password else None
+    password_hash = password_hash or (password_hasher.hash(password) if password else None)
     user = User(
         email=validate_email(email),
         region=validate_region(region),
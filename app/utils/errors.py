@@ -8,6 +8,21 @@ _ERROR_MAP: dict[str, tuple[int, str]] = {
     "unsupported_request_type": (status.HTTP_422_UNPROCESSABLE_ENTITY, "Unsupported request type"),
     "rectify_missing_fields": (status.HTTP_422_UNPROCESSABLE_ENTITY, "Missing rectification fields"),
     "no_updates": (status.HTTP_422_UNPROCESSABLE_ENTITY, "No updates provided"),
+    "version_conflict": (status.HTTP_412_PRECONDITION_FAILED, "Consent state changed; re-read and retry"),
+    "invalid_cursor": (status.HTTP_422_UNPROCESSABLE_ENTITY, "Invalid pagination cursor"),
+    "invalid_decision_token": (status.HTTP_401_UNAUTHORIZED, "Invalid or expired decision token"),
+    "invalid_api_key_scopes": (status.HTTP_422_UNPROCESSABLE_ENTITY, "Unknown or empty API key scopes"),
+    "api_key_not_found": (status.HTTP_404_NOT_FOUND, "API key not found"),
+    "invalid_ip_list": (status.HTTP_422_UNPROCESSABLE_ENTITY, "Body must be a JSON array of IP strings or newline-delimited IPs"),
+    "geoip_database_not_found": (status.HTTP_404_NOT_FOUND, "GeoIP database file not found"),
+    "invalid_geoip_database": (status.HTTP_422_UNPROCESSABLE_ENTITY, "GeoIP database failed validation; previous database kept"),
+    "parquet_unavailable": (status.HTTP_503_SERVICE_UNAVAILABLE, "Parquet support (pyarrow) is not installed"),
+    "invalid_import_format": (status.HTTP_422_UNPROCESSABLE_ENTITY, "Import format must be csv or ndjson"),
+    "import_job_not_found": (status.HTTP_404_NOT_FOUND, "Import job not found"),
+    "idempotency_key_reused": (status.HTTP_422_UNPROCESSABLE_ENTITY, "Idempotency-Key was already used for a different request"),
+    "idempotency_key_in_progress": (status.HTTP_409_CONFLICT, "A request with this Idempotency-Key is still being processed"),
+    "policy_version_not_found": (status.HTTP_404_NOT_FOUND, "Policy version not found"),
+    "policy_version_conflict": (status.HTTP_409_CONFLICT, "Concurrent policy changes; retry"),
 }
 
 
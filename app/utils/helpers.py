@@ -1,7 +1,10 @@
+import ipaddress
 from datetime import datetime, timezone
-from typing import Dict, Optional, Union
+from functools import lru_cache
+from typing import Dict, Optional, Tuple, Union
 from uuid import UUID
 from fastapi import Request
+from app.config import settings
 from app.models.consent import RegionEnum
 from app.utils.security import Actor
 
@@ -10,6 +13,10 @@ def get_utc_now() -> datetime:
     return datetime.now(timezone.utc)
 
 
+def ensure_utc(value: Optional[datetime]) -> Optional[datetime]:
+    return value.replace(tzinfo=timezone.utc) if value is not None and value.tzinfo is None else value
+
+
 def validate_region(region: Union[str, RegionEnum]) -> RegionEnum:
     if isinstance(region, RegionEnum):
         return region
@@ -19,30 +26,47 @@ def validate_region(region: Union[str, RegionEnum]) -> RegionEnum:
         raise ValueError("invalid_region")
 
 
+@lru_cache(maxsize=4)
+def _trusted_proxy_networks(raw: str) -> Tuple[Union[ipaddress.IPv4Network, ipaddress.IPv6Network], ...]:
+    return tuple(ipaddress.ip_network(item.strip(), strict=False) for item in raw.split(",") if item.strip())
+
+
+def _is_trusted_proxy(ip: str, networks: Tuple[Union[ipaddress.IPv4Network, ipaddress.IPv6Network], ...]) -> bool:
+    try:
+        address = ipaddress.ip_address(ip)
+    except ValueError:
+        return False
+    return any(address in network for network in networks)
+
+
 def extract_client_ip(request: Request) -> str:
-    forwarded_for = request.headers.get("X-Forwarded-For")
-    if forwarded_for:
+    """Client address. With TRUSTED_PROXIES configured, CLIENT_IP_HEADER is only honoured when the peer is a trusted
+    proxy, and the client is the right-most entry that is not itself a trusted proxy. Without it, the left-most entry is used."""
+    peer = request.client.host if request.client and request.client.host else ""
+    forwarded_for = request.headers.get(settings.CLIENT_IP_HEADER)
+    networks = _trusted_proxy_networks(settings.TRUSTED_PROXIES)
+    if forwarded_for and not networks:
         first_ip = forwarded_for.split(",")[0].strip()
         if first_ip:
             return first_ip
-    if request.client and request.client.host:
-        return request.client.host
-    return ""
-
-
-def build_policy_snapshot(region: Union[str, RegionEnum]) -> Dict[str, Union[str, bool]]:
-    _GDPR_REGIONS = {RegionEnum.EU, RegionEnum.INDIA, RegionEnum.UK, RegionEnum.IN}
-    _LGDP_REGIONS = {RegionEnum.BR}
-    region_value = validate_region(region)
-    if region_value in _GDPR_REGIONS:
-        policy, requires_explicit, default = "gdpr", True, "deny"
-    elif region_value in _LGDP_REGIONS:
-        policy, requires_explicit, default = "lgpd", True, "deny"
-    elif region_value == RegionEnum.US:
-        policy, requires_explicit, default = "ccpa", False, "allow"
-    else:
-        policy, requires_explicit, default = "global", False, "allow"
-    return {"region": region_value.value, "policy": policy, "requires_explicit": requires_explicit, "default": default}
+    if forwarded_for and _is_trusted_proxy(peer, networks):
+        for hop in reversed([item.strip() for item in forwarded_for.split(",") if item.strip()]):
+            if not _is_trusted_proxy(hop, networks):
+                return hop
+    return peer
+
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match / If-Match header value against `etag`."""
+    if not header:
+        return False
+    candidates = [item.strip().removeprefix("W/") for item in header.split(",")]
+    return "*" in candidates or etag.removeprefix("W/") in candidates
+
+
+def build_policy_snapshot(region: Union[str, RegionEnum]) -> Dict[str, Union[str, bool, int]]:
+    from app.services.policy_engine import get_active_policy
+    return get_active_policy().snapshot(validate_region(region))
 
 
 def get_audit_log_kwargs(actor: Optional[Union["User", Actor]], user_id: Optional[UUID] = None) -> Dict[str, Optional[Union[str, UUID]]]:
@@ -50,7 +74,9 @@ def get_audit_log_kwargs(actor: Optional[Union["User", Actor]], user_id: Optiona
     if actor is None:
         return {"user_id": user_id, "actor_type": None}
     elif isinstance(actor, Actor):
-        return {"user_id": None if actor.role == "admin" else actor.id, "actor_type": "admin" if actor.role == "admin" else None}
+        if actor.role in ("admin", "service"):
+            return {"user_id": None, "actor_type": actor.role}
+        return {"user_id": actor.id, "actor_type": None}
     elif isinstance(actor, User):
         return {"user_id": actor.id, "actor_type": None}
     return {"user_id": user_id, "actor_type": None}
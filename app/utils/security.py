@@ -1,8 +1,10 @@
-from datetime import datetime, timedelta
-from typing import Optional
+import hashlib
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, FrozenSet, Optional
 from uuid import UUID
 from fastapi import Depends, HTTPException, Request, Security, status
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from fastapi.security import APIKeyHeader, HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from itsdangerous import URLSafeTimedSerializer
 import jwt
@@ -11,10 +13,15 @@ from app.config import settings
 from app.db.database import get_db
 from app.models.consent import User
 from app.models.admin import Admin
+from app.utils.cache import TTLCache
 
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# Verified token payloads keyed by token digest (kept until `exp`), and resolved actors keyed by (role, sub).
+_token_cache = TTLCache(maxsize=settings.AUTH_TOKEN_CACHE_SIZE)
+_actor_cache = TTLCache(maxsize=settings.AUTH_ACTOR_CACHE_SIZE, ttl_seconds=settings.AUTH_ACTOR_CACHE_TTL_SECONDS)
+
 
 def create_serializer() -> URLSafeTimedSerializer:
     return URLSafeTimedSerializer(settings.SECRET_KEY)
@@ -32,30 +39,56 @@ def verify_token(token: str, max_age: int = 3600) -> Optional[dict]:
 
 
 class Actor:
-    def __init__(self, id: UUID, role: str, user: Optional[User] = None, admin: Optional[Admin] = None):
+    def __init__(self, id: UUID, role: str, user: Optional[User] = None, admin: Optional[Admin] = None, scopes: Optional[FrozenSet[str]] = None):
         self.id = id
         self.role = role
         self.user = user
         self.admin = admin
-        self.actor_type = "user" if role == "user" else "admin"
+        self.scopes = scopes  # None for JWT actors; the API-key scopes otherwise
+        self.actor_type = role if role in ("user", "service") else "admin"
     def __repr__(self):
         return f"Actor(id={self.id}, role={self.role})"
 
 
 security_scheme = HTTPBearer(auto_error=False, scheme_name="HTTPBearer")
+api_key_scheme = APIKeyHeader(name="X-API-Key", auto_error=False, scheme_name="APIKey")
+
+
+def encode_jwt(claims: Dict[str, Any], expires_in: timedelta, *, key: Any = None, algorithm: Optional[str] = None, headers: Optional[Dict[str, Any]] = None) -> str:
+    now = datetime.now(timezone.utc)
+    return jwt.encode({**claims, "iat": now, "exp": now + expires_in}, key if key is not None else settings.SECRET_KEY, algorithm=algorithm or settings.ALGORITHM, headers=headers)
 
 
 def create_jwt_token(sub: UUID, role: str) -> str:
-    from datetime import timezone
-    expire = datetime.now(timezone.utc) + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    return jwt.encode({"sub": str(sub), "role": role, "exp": expire}, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    return encode_jwt({"sub": str(sub), "role": role}, timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES))
 
 
 def decode_jwt_token(token: str) -> Optional[dict]:
+    digest = hashlib.sha256(token.encode("utf-8")).digest()
+    payload = _token_cache.get(digest)
+    if payload is not None:
+        return payload
     try:
-        return jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
     except (jwt.ExpiredSignatureError, jwt.InvalidTokenError):
         return None
+    if isinstance(payload.get("exp"), (int, float)):
+        _token_cache.set(digest, payload, ttl_seconds=payload["exp"] - time.time())
+    return payload
+
+
+def invalidate_actor(actor_id: UUID, role: str = "user") -> None:
+    """Drop a cached actor, e.g. after the user is deleted. Other workers converge within AUTH_ACTOR_CACHE_TTL_SECONDS."""
+    _actor_cache.pop((role, actor_id))
+
+
+def clear_auth_caches() -> None:
+    _token_cache.clear()
+    _actor_cache.clear()
+
+
+def auth_cache_stats() -> dict:
+    return {"tokens": _token_cache.stats(), "actors": _actor_cache.stats()}
 
 
 def get_bearer_token(authorization: Optional[str] = None) -> Optional[str]:
@@ -110,27 +143,45 @@ def _extract_bearer_token(request: Request, credentials: Optional[HTTPAuthorizat
 
 
 def _load_actor_from_token(payload: dict, db: Session) -> Actor:
+    """Resolve the token subject. Cached actors carry no ORM instances since they outlive the request session."""
     sub = UUID(payload["sub"])
     role = payload.get("role", "user")
+    actor = _actor_cache.get((role, sub))
+    if actor is not None:
+        return actor
     if role == "admin":
-        admin = db.query(Admin).filter(Admin.id == sub).first()
-        if not admin:
+        if db.query(Admin.id).filter(Admin.id == sub).first() is None:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="admin_not_found")
-        return Actor(id=sub, role="admin", admin=admin)
     elif role == "user":
-        user = db.query(User).filter(User.id == sub).first()
-        if not user:
+        if db.query(User.id).filter(User.id == sub, User.deleted_at.is_(None)).first() is None:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="user_not_found")
-        return Actor(id=sub, role="user", user=user)
-    raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="invalid_token_role")
+    else:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="invalid_token_role")
+    actor = Actor(id=sub, role=role)
+    _actor_cache.set((role, sub), actor)
+    return actor
+
+
+def _actor_from_api_key(request: Request, api_key: str, db: Session) -> Actor:
+    from app.services import api_key_service
+    actor = api_key_service.authenticate(db, api_key)
+    if actor is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="invalid_api_key")
+    # The matched route's template, so neither path parameters nor a root_path mount change the scope.
+    if api_key_service.required_scope(getattr(request.scope.get("route"), "path_format", "")) not in actor.scopes:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="insufficient_scope")
+    return actor
 
 
 def get_current_actor(
     request: Request,
     credentials: Optional[HTTPAuthorizationCredentials] = Security(security_scheme),
+    api_key: Optional[str] = Security(api_key_scheme),
     db: Session = Depends(get_db)
 ) -> Actor:
     bearer_token = _extract_bearer_token(request, credentials)
+    if not bearer_token and api_key:
+        return _actor_from_api_key(request, api_key, db)
     if not bearer_token:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="missing_authorization_header")
     payload = decode_jwt_token(bearer_token)
@@ -145,8 +196,15 @@ def require_admin(actor: Actor = Depends(get_current_actor)) -> Actor:
     return actor
 
 
+def require_admin_or_service(actor: Actor = Depends(get_current_actor)) -> Actor:
+    """Admins, or service API keys (their scope was checked against the route when the key was resolved)."""
+    if actor.role not in ("admin", "service"):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="admin_required")
+    return actor
+
+
 def validate_user_action(actor: Actor, user_id: UUID) -> None:
-    if actor.role == "admin":
+    if actor.role in ("admin", "service"):
         return
     if actor.role == "user" and actor.id != user_id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="user_id_mismatch")
@@ -157,9 +215,15 @@ AuthenticatedActor = Actor
 def get_optional_actor(
     request: Request,
     credentials: Optional[HTTPAuthorizationCredentials] = Security(security_scheme),
+    api_key: Optional[str] = Security(api_key_scheme),
     db: Session = Depends(get_db)
 ) -> Optional[Actor]:
     bearer_token = _extract_bearer_token(request, credentials)
+    if not bearer_token and api_key:
+        try:
+            return _actor_from_api_key(request, api_key, db)
+        except HTTPException:
+            return None
     if not bearer_token:
         return None
     payload = decode_jwt_token(bearer_token)
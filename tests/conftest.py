@@ -1,13 +1,14 @@
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 from app.main import app
 from app.db.database import Base, get_db
 from app.models.admin import Admin
 from app.models.consent import User, RegionEnum
-from app.utils.security import hash_password, create_jwt_token
+from app.services import api_key_service, policy_engine, policy_snapshot_service
+from app.utils.security import clear_auth_caches, create_jwt_token, hash_password
 
 TEST_DB_URL = "sqlite:///:memory:"
 engine = create_engine(TEST_DB_URL, connect_args={"check_same_thread": False}, poolclass=StaticPool)
@@ -21,6 +22,22 @@ def db():
     yield session
     session.close()
     Base.metadata.drop_all(bind=engine)
+    policy_engine.reset_active_policy()
+    policy_snapshot_service.clear_cache()
+    clear_auth_caches()
+    api_key_service.clear_cache()
+
+
+@pytest.fixture
+def query_counter():
+    statements = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", _record)
+    yield statements
+    event.remove(engine, "before_cursor_execute", _record)
 
 
 @pytest.fixture(scope="function")
@@ -0,0 +1,136 @@
+import pytest
+from app.models.audit import AuditLog
+from app.models.consent import PurposeEnum
+from app.services.audit_writer import AuditWriter, _encode_row, _normalize_row
+from tests.conftest import TestSession
+
+
+def _row(user_id, reason="gdpr_requires_grant"):
+    return {"action": "decision", "details": {"user_id": str(user_id), "reason": reason}, "user_id": user_id}
+
+
+class TestAuditWriter:
+    def test_submit_rejected_when_not_running(self, db, test_user):
+        writer = AuditWriter(TestSession)
+        assert writer.submit([_row(test_user.id)]) is False
+
+    def test_stop_flushes_queued_rows(self, db, test_user):
+        user_id = test_user.id
+        writer = AuditWriter(TestSession, flush_interval_ms=10_000, batch_size=100)
+        writer.start()
+        assert writer.submit([_row(user_id), _row(user_id)]) is True
+        writer.stop()
+        assert db.query(AuditLog).filter(AuditLog.user_id == user_id).count() == 2
+        assert writer.stats()["flushed"] == 2
+        assert writer.stats()["queue_depth"] == 0
+
+    def test_full_queue_rejects_whole_submission(self, db, test_user):
+        user_id = test_user.id
+        writer = AuditWriter(TestSession, max_queue_size=1, flush_interval_ms=10_000)
+        writer.start()
+        assert writer.submit([_row(user_id), _row(user_id)]) is False
+        assert writer.stats()["rejected"] == 2
+        writer.stop()
+
+    def test_spool_replay_skips_persisted_rows(self, db, test_user, tmp_path):
+        user_id = test_user.id
+        persisted, pending = _normalize_row(_row(user_id, "persisted")), _normalize_row(_row(user_id, "pending"))
+        db.add(AuditLog(**persisted))
+        db.commit()
+        spool = tmp_path / "audit.spool"
+        spool.write_text(_encode_row(persisted) + "\n" + _encode_row(pending) + "\n")
+        writer = AuditWriter(TestSession, spool_path=str(spool))
+        writer.start()
+        writer.stop()
+        assert db.query(AuditLog).filter(AuditLog.user_id == user_id).count() == 2
+        assert spool.read_text() == ""
+
+    def test_decide_uses_running_writer(self, db, test_user, monkeypatch):
+        from app.services import audit_writer as audit_writer_module
+        from app.services.decision_service import decide
+        user_id = test_user.id
+        writer = AuditWriter(TestSession, flush_interval_ms=10_000)
+        monkeypatch.setattr(audit_writer_module, "audit_writer", writer)
+        writer.start()
+        decide(db, user_id, PurposeEnum.ANALYTICS)
+        assert writer.stats()["submitted"] == 1
+        writer.stop()
+        assert db.query(AuditLog).filter(AuditLog.action == "decision").count() == 1
+
+
+class TestAuditArchive:
+    def test_export_range_writes_verified_archive(self, db, tmp_path):
+        import gzip
+        import json
+        from datetime import datetime, timedelta, timezone
+        from app.jobs.audit_archive import export_audit_range, verify_audit_archive
+        lower = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        db.add_all([AuditLog(action="decision", details={"n": index}, event_time=lower + timedelta(days=index * 20), created_at=lower) for index in range(3)])
+        db.commit()
+        path = tmp_path / "audit_logs_p2025_01.jsonl.gz"
+        manifest = export_audit_range(db, lower, datetime(2025, 2, 1, tzinfo=timezone.utc), path, batch_size=1)
+        assert manifest["rows"] == 2
+        assert verify_audit_archive(path)
+        with gzip.open(path, "rt", encoding="utf-8") as handle:
+            assert [json.loads(line)["details"]["n"] for line in handle] == [0, 1]
+        path.write_bytes(path.read_bytes()[:-1])
+        assert not verify_audit_archive(path)
+
+    def test_export_reads_from_detached_partition_table(self, db, tmp_path):
+        from datetime import datetime, timezone
+        from sqlalchemy import text
+        from app.db.partitions import partition_table
+        from app.jobs.audit_archive import export_audit_range
+        lower = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        db.add(AuditLog(action="decision", details={"n": 0}, event_time=lower, created_at=lower))
+        db.commit()
+        db.execute(text("CREATE TABLE audit_logs_p2025_01 AS SELECT * FROM audit_logs"))
+        db.execute(text("DELETE FROM audit_logs"))
+        db.commit()
+        path = tmp_path / "audit_logs_p2025_01.jsonl.gz"
+        assert export_audit_range(db, lower, datetime(2025, 2, 1, tzinfo=timezone.utc), path)["rows"] == 0
+        assert export_audit_range(db, lower, datetime(2025, 2, 1, tzinfo=timezone.utc), path, source=partition_table(AuditLog.__table__, "audit_logs_p2025_01"))["rows"] == 1
+        db.execute(text("DROP TABLE audit_logs_p2025_01"))
+        db.commit()
+
+    def test_retention_archives_nothing_without_partitions(self, db):
+        from app.jobs.audit_archive import archive_stale_audit_partitions
+        from app.utils.helpers import get_utc_now
+        assert archive_stale_audit_partitions(db, get_utc_now()) == 0
+
+
+class TestParquetAuditArchive:
+    @pytest.fixture
+    def archive_dir(self, db, tmp_path, test_user):
+        pytest.importorskip("pyarrow")
+        import uuid
+        from datetime import datetime, timedelta, timezone
+        from app.models.consent import RegionEnum, User
+        from app.services.audit_cold_archive import verify_parquet_archive, write_parquet_archive
+        others = [User(id=uuid.UUID(int=index + 1), email=f"u{index}@example.com", region=RegionEnum.EU) for index in range(3)]
+        db.add_all(others)
+        db.commit()
+        for month in (1, 2):
+            start = datetime(2025, month, 1, tzinfo=timezone.utc)
+            db.add_all([AuditLog(action="decision", user_id=user.id, details={"month": month}, event_time=start + timedelta(days=day), created_at=start) for user in [test_user, *others] for day in (1, 10)])
+            db.commit()
+            path = tmp_path / f"audit_logs_p2025_{month:02d}.parquet"
+            assert write_parquet_archive(db, start, datetime(2025, month + 1, 1, tzinfo=timezone.utc), path, row_group_size=2)["rows"] == 8
+            assert verify_parquet_archive(path)
+        return tmp_path
+
+    def test_query_prunes_files_and_row_groups(self, archive_dir):
+        from datetime import datetime, timezone
+        from uuid import UUID
+        from app.services.audit_cold_archive import query_audit_archive
+        result = query_audit_archive(str(archive_dir), start=datetime(2025, 2, 1, tzinfo=timezone.utc), user_id=UUID(int=2))
+        assert [(item["user_id"], item["details"]["month"]) for item in result["items"]] == [(str(UUID(int=2)), 2)] * 2
+        assert result["stats"] == {"files_total": 2, "files_scanned": 1, "row_groups_total": 4, "row_groups_scanned": 1}
+
+    def test_endpoint(self, client, archive_dir, admin_headers, auth_headers, monkeypatch):
+        from app.config import settings
+        monkeypatch.setattr(settings, "AUDIT_ARCHIVE_DIR", str(archive_dir))
+        response = client.get("/admin/audit/archive", params={"end": "2025-01-05T00:00:00Z", "limit": 3}, headers=admin_headers)
+        assert response.status_code == 200
+        assert len(response.json()["items"]) == 3
+        assert client.get("/admin/audit/archive", headers=auth_headers).status_code == 403
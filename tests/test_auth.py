@@ -50,3 +50,143 @@ class TestJWTToken:
         response = client.get("/admin/audit", headers=admin_headers)
         assert response.status_code == 200
 
+
+
+class TestAuthCache:
+    def test_repeat_requests_skip_token_and_actor_queries(self, client, test_user, auth_headers, query_counter):
+        url = f"/consent/preferences/{test_user.id}"
+        client.get(url, headers=auth_headers)
+        query_counter.clear()
+        client.get(url, headers=auth_headers)
+        assert len(query_counter) == 2  # ETag lookup + preferences read, nothing for authentication
+
+    def test_deleted_user_token_is_rejected(self, client, db, test_user, auth_headers):
+        from app.models.consent import RequestTypeEnum
+        from app.services.subject_request_service import create_request, process_delete_request
+        assert client.get(f"/consent/preferences/{test_user.id}", headers=auth_headers).status_code == 200
+        process_delete_request(db, create_request(db, test_user.id, RequestTypeEnum.DELETE))
+        assert client.get(f"/consent/preferences/{test_user.id}", headers=auth_headers).status_code == 401
+
+    def test_invalid_token_is_not_cached(self):
+        from app.utils.security import auth_cache_stats, decode_jwt_token
+        assert decode_jwt_token("not-a-token") is None
+        assert auth_cache_stats()["tokens"]["size"] == 0
+
+
+class TestPasswordPool:
+    def test_pool_hashes_and_verifies_in_worker_processes(self):
+        from app.services.password_hasher import PasswordHasher
+        hasher = PasswordHasher(workers=1, queue_size=1)
+        hasher.start()
+        try:
+            hashed = hasher.hash("s3cret")
+            assert hasher.verify("s3cret", hashed) and not hasher.verify("wrong", hashed)
+            stats = hasher.stats()
+            assert stats["running"] and stats["completed"] == 3 and stats["hash_ms_avg"] > 0
+        finally:
+            hasher.stop()
+
+    def test_async_calls_wait_on_the_event_loop_not_a_thread(self):
+        import asyncio
+        import threading
+        from app.services.password_hasher import PasswordHasher
+        hasher = PasswordHasher(workers=1, queue_size=4)
+        hasher.start()
+
+        async def burst():
+            hashed = await hasher.hash_async("s3cret")
+            return await asyncio.gather(*(hasher.verify_async("s3cret", hashed) for _ in range(4)))
+
+        try:
+            threads = threading.active_count()
+            assert asyncio.run(burst()) == [True] * 4
+            assert threading.active_count() <= threads + 2
+            assert hasher.stats()["completed"] == 5
+        finally:
+            hasher.stop()
+
+    def test_async_callers_queue_for_a_free_slot_without_polling(self, monkeypatch):
+        import asyncio
+        from app.services import password_hasher as module
+        from app.services.password_hasher import PasswordHasher, PasswordPoolBusy
+        monkeypatch.setattr(module.asyncio, "sleep", lambda delay: pytest.fail("admission must not poll"))
+        waiting = PasswordHasher(workers=0, queue_size=1, admission_timeout_ms=5000)
+        impatient = PasswordHasher(workers=0, queue_size=1, admission_timeout_ms=0)
+
+        async def pair(hasher):
+            return await asyncio.gather(hasher.hash_async("a"), hasher.hash_async("b"), return_exceptions=True)
+
+        assert all(isinstance(result, str) for result in asyncio.run(pair(waiting)))
+        assert waiting.stats()["completed"] == 2 and waiting.stats()["in_flight"] == 0
+        assert sum(isinstance(result, PasswordPoolBusy) for result in asyncio.run(pair(impatient))) == 1
+        assert impatient.stats()["rejected"] == 1
+
+    def test_saturated_pool_returns_503_with_retry_after(self, client, test_user, monkeypatch):
+        import threading
+        from app.services.password_hasher import password_hasher
+        monkeypatch.setattr(password_hasher, "_admission", threading.BoundedSemaphore(1))
+        monkeypatch.setattr(password_hasher, "_admission_timeout", 0)
+        password_hasher._admission.acquire()
+        response = client.post("/auth/login", json={"email": "test@example.com", "password": "testpass"})
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "1"
+        assert password_hasher.stats()["rejected"] >= 1
+
+
+class TestApiKeys:
+    @pytest.fixture
+    def service_key(self, client, admin_headers):
+        response = client.post("/admin/api-keys", json={"name": "edge", "scopes": ["decision"]}, headers=admin_headers)
+        assert response.status_code == 201
+        return response.json()
+
+    def test_service_key_calls_decisions_without_queries_for_auth(self, client, test_user, service_key, query_counter):
+        headers = {"X-API-Key": service_key["api_key"]}
+        url = f"/decision?user_id={test_user.id}&purpose=analytics"
+        assert client.get(url, headers=headers).status_code == 200
+        query_counter.clear()
+        assert client.get(url, headers=headers).status_code == 200
+        assert not [s for s in query_counter if "api_keys" in s]
+
+    def test_scopes_are_enforced(self, client, test_user, service_key):
+        response = client.get(f"/consent/preferences/{test_user.id}", headers={"X-API-Key": service_key["api_key"]})
+        assert response.status_code == 403
+        assert response.json()["detail"] == "insufficient_scope"
+
+    def test_revocation_and_bad_keys(self, client, db, test_user, service_key, admin_headers):
+        from app.services import api_key_service
+        headers = {"X-API-Key": service_key["api_key"]}
+        url = f"/decision?user_id={test_user.id}&purpose=analytics"
+        assert client.get(url, headers=headers).status_code == 200
+        assert client.get(url, headers={"X-API-Key": service_key["api_key"][:-1] + "x"}).status_code == 401
+        assert client.delete(f"/admin/api-keys/{service_key['id']}", headers=admin_headers).status_code == 200
+        assert client.get(url, headers=headers).status_code == 401
+        assert api_key_service.refresh_revocations(db) == 1
+
+    def test_keys_are_stored_hashed(self, db, service_key):
+        from app.models.api_key import ApiKey
+        record = db.query(ApiKey).one()
+        assert service_key["api_key"] not in (record.key_hash, record.prefix)
+        assert service_key["api_key"].startswith(f"cps_{record.prefix}_")
+
+    def test_unknown_scope_rejected(self, client, admin_headers):
+        assert client.post("/admin/api-keys", json={"name": "x", "scopes": ["everything"]}, headers=admin_headers).status_code == 422
+
+    def test_service_keys_cannot_write_or_administer(self, client, test_user, admin_headers):
+        for scopes in (["consent"], ["admin"], ["decision", "users"]):
+            assert client.post("/admin/api-keys", json={"name": "x", "scopes": scopes}, headers=admin_headers).status_code == 422
+        bound = client.post("/admin/api-keys", json={"name": "app", "scopes": ["consent"], "user_id": str(test_user.id)}, headers=admin_headers).json()
+        other = client.post("/users", json={"email": "other@example.com", "region": "US"}).json()
+        body = {"user_id": other.get("id") or other.get("user_id"), "purpose": "ads", "region": "US"}
+        assert client.post("/consent/grant", json=body, headers={"X-API-Key": bound["api_key"]}).status_code == 403
+
+    def test_service_key_is_not_admin(self, client, test_user, service_key):
+        headers = {"X-API-Key": service_key["api_key"]}
+        assert client.post("/decision/batch", json={"items": [{"user_id": str(test_user.id), "purpose": "ads"}]}, headers=headers).status_code == 200
+        assert client.post("/admin/admins", json={"email": "evil@example.com", "password": "password123"}, headers=headers).status_code == 403
+
+    def test_scope_comes_from_matched_route(self, test_user, service_key):
+        from fastapi.testclient import TestClient
+        from app.main import app
+        mounted = TestClient(app, root_path="/consent-service")
+        assert mounted.get(f"/consent-service/decision?user_id={test_user.id}&purpose=analytics", headers={"X-API-Key": service_key["api_key"]}).status_code == 200
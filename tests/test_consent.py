@@ -1,3 +1,4 @@
+import os
 import pytest
 from app.models.consent import RegionEnum
 
@@ -39,3 +40,370 @@ class TestPreferences:
         assert "preferences" in data
         assert "region" in data
 
+
+
+class TestConsentCurrent:
+    def test_writes_upsert_current_state(self, db, test_user):
+        from app.models.consent import ConsentCurrent, PurposeEnum, StatusEnum
+        from app.services.consent_service import grant_consent, revoke_consent
+        grant_consent(db, test_user.id, PurposeEnum.ANALYTICS, RegionEnum.EU)
+        revoked = revoke_consent(db, test_user.id, PurposeEnum.ANALYTICS, RegionEnum.EU)
+        current = db.query(ConsentCurrent).filter_by(user_id=test_user.id, purpose=PurposeEnum.ANALYTICS).one()
+        assert current.status == StatusEnum.REVOKED
+        assert current.consent_id == revoked.id
+        assert current.version == 2
+
+    def test_update_preferences_reads_current_state(self, db, test_user):
+        from app.models.consent import PurposeEnum, StatusEnum
+        from app.services.preferences_service import update_preferences
+        _, preferences = update_preferences(db, test_user.id, {PurposeEnum.ADS: StatusEnum.GRANTED, PurposeEnum.EMAIL: StatusEnum.DENIED})
+        assert preferences[PurposeEnum.ADS] == StatusEnum.GRANTED
+        assert preferences[PurposeEnum.EMAIL] == StatusEnum.DENIED
+        assert preferences[PurposeEnum.LOCATION] == StatusEnum.REVOKED
+
+    def test_expired_current_state_reads_as_revoked(self, db, test_user):
+        from datetime import timedelta
+        from app.models.consent import PurposeEnum, StatusEnum
+        from app.services.consent_service import grant_consent
+        from app.services.preferences_service import get_latest_preferences
+        from app.utils.helpers import get_utc_now
+        grant_consent(db, test_user.id, PurposeEnum.ANALYTICS, RegionEnum.EU, expires_at=get_utc_now() - timedelta(minutes=1))
+        _, preferences = get_latest_preferences(db, test_user.id)
+        assert preferences[PurposeEnum.ANALYTICS] == StatusEnum.REVOKED
+
+
+class TestConsentVersioning:
+    def test_preferences_etag_and_304(self, client, test_user, auth_headers):
+        first = client.get(f"/consent/preferences/{test_user.id}", headers=auth_headers)
+        etag = first.headers["ETag"]
+        cached = client.get(f"/consent/preferences/{test_user.id}", headers={**auth_headers, "If-None-Match": etag})
+        assert cached.status_code == 304 and cached.content == b""
+        client.post("/consent/grant", json={"user_id": str(test_user.id), "purpose": "analytics", "region": "EU"}, headers=auth_headers)
+        changed = client.get(f"/consent/preferences/{test_user.id}", headers={**auth_headers, "If-None-Match": etag})
+        assert changed.status_code == 200 and changed.headers["ETag"] != etag
+
+    def test_decision_etag(self, client, test_user, auth_headers):
+        url = f"/decision?user_id={test_user.id}&purpose=analytics"
+        etag = client.get(url, headers=auth_headers).headers["ETag"]
+        assert client.get(url, headers={**auth_headers, "If-None-Match": etag}).status_code == 304
+
+    def test_decision_etag_carries_the_evaluated_region(self, client, db, test_user, auth_headers, monkeypatch):
+        from app.services import decision_service
+        url = f"/decision?user_id={test_user.id}&purpose=analytics"
+        etag = client.get(url, headers=auth_headers).headers["ETag"]
+        test_user.region = RegionEnum.US
+        db.commit()
+        moved = client.get(url, headers={**auth_headers, "If-None-Match": etag})
+        assert moved.status_code == 200 and moved.json()["region"] == "US" and moved.headers["ETag"] != etag
+        monkeypatch.setattr(decision_service, "consent_etag_state", lambda db, user_id: ("1.0.1", None))
+        assert [decision_service.get_decision_etag(db, test_user.id, fallback_region=region) for region in (RegionEnum.EU, lambda: RegionEnum.US, None)] == ['"1.0.1.EU"', '"1.0.1.US"', '"1.0.1.ROW"']
+
+    def test_not_modified_decisions_are_not_audited(self, client, db, test_user, auth_headers):
+        from app.models.audit import AuditLog
+        url = f"/decision?user_id={test_user.id}&purpose=analytics"
+        etag = client.get(url, headers=auth_headers).headers["ETag"]
+        assert client.get(url, headers={**auth_headers, "If-None-Match": etag}).status_code == 304
+        assert db.query(AuditLog).filter(AuditLog.action == "decision").count() == 1
+
+    def test_if_match_optimistic_concurrency(self, client, test_user, auth_headers):
+        etag = client.get(f"/consent/preferences/{test_user.id}", headers=auth_headers).headers["ETag"]
+        body = {"user_id": str(test_user.id), "updates": {"ads": "granted"}}
+        updated = client.post("/consent/preferences/update", json=body, headers={**auth_headers, "If-Match": etag})
+        assert updated.status_code == 200 and updated.headers["ETag"] != etag
+        stale = client.post("/consent/preferences/update", json=body, headers={**auth_headers, "If-Match": etag})
+        assert stale.status_code == 412
+
+    def test_expiry_changes_etag_without_a_write(self, db, test_user):
+        import time
+        from datetime import timedelta
+        from app.models.consent import PurposeEnum
+        from app.services.consent_service import grant_consent
+        from app.services.preferences_service import get_consent_etag
+        from app.utils.helpers import get_utc_now
+        user_id = test_user.id
+        grant_consent(db, user_id, PurposeEnum.ANALYTICS, RegionEnum.EU, expires_at=get_utc_now() + timedelta(milliseconds=50))
+        before = get_consent_etag(db, user_id)
+        time.sleep(0.1)
+        assert get_consent_etag(db, user_id) != before
+
+    def test_etag_lookup_is_one_statement(self, db, test_user, query_counter):
+        from app.services.preferences_service import get_consent_etag
+        user_id = test_user.id
+        query_counter.clear()
+        get_consent_etag(db, user_id)
+        assert len(query_counter) == 1
+
+
+class TestConsentHistoryPagination:
+    def _seed(self, db, user, count):
+        from datetime import timedelta
+        from app.models.consent import ConsentHistory, PurposeEnum, StatusEnum
+        from app.utils.helpers import get_utc_now
+        base = get_utc_now()
+        db.add_all([ConsentHistory(user_id=user.id, purpose=PurposeEnum.ANALYTICS, status=StatusEnum.GRANTED, region=RegionEnum.EU, timestamp=base - timedelta(minutes=index // 2)) for index in range(count)])
+        db.commit()
+
+    def test_pages_cover_history_once_in_order(self, client, db, test_user, auth_headers):
+        self._seed(db, test_user, 7)
+        seen, cursor = [], None
+        while True:
+            response = client.get(f"/consent/history/{test_user.id}", params={"limit": 3, **({"cursor": cursor} if cursor else {})}, headers=auth_headers)
+            assert response.status_code == 200
+            page = response.json()
+            assert len(page["items"]) <= 3
+            seen.extend(page["items"])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+        assert len({item["id"] for item in seen}) == 7
+        assert [item["timestamp"] for item in seen] == sorted((item["timestamp"] for item in seen), reverse=True)
+
+    def test_invalid_cursor_and_other_user(self, client, db, test_user, auth_headers):
+        from app.models.consent import User
+        assert client.get(f"/consent/history/{test_user.id}", params={"cursor": "not-a-cursor"}, headers=auth_headers).status_code == 422
+        other = User(email="other@example.com", region=RegionEnum.US)
+        db.add(other)
+        db.commit()
+        assert client.get(f"/consent/history/{other.id}", headers=auth_headers).status_code == 403
+
+    def test_iter_history_reads_in_pages(self, db, test_user, query_counter):
+        from app.services.consent_service import iter_history
+        self._seed(db, test_user, 5)
+        query_counter.clear()
+        assert len(list(iter_history(db, test_user.id, page_size=2))) == 5
+        assert len(query_counter) == 4
+
+
+class TestConsentAsOf:
+    def _record(self, db, user, purpose, status, timestamp, **extra):
+        from app.models.consent import ConsentHistory
+        db.add(ConsentHistory(user_id=user.id, purpose=purpose, status=status, region=RegionEnum.EU, timestamp=timestamp, **extra))
+        db.commit()
+
+    def test_state_at_each_instant(self, db, test_user):
+        from datetime import timedelta
+        from app.models.consent import PurposeEnum, StatusEnum
+        from app.services.consent_service import get_consent_as_of, status_as_of
+        from app.utils.helpers import get_utc_now
+        now = get_utc_now()
+        self._record(db, test_user, PurposeEnum.ANALYTICS, StatusEnum.GRANTED, now - timedelta(days=10), expires_at=now - timedelta(days=6))
+        self._record(db, test_user, PurposeEnum.ANALYTICS, StatusEnum.GRANTED, now - timedelta(days=5))
+        self._record(db, test_user, PurposeEnum.ANALYTICS, StatusEnum.REVOKED, now - timedelta(days=2))
+        at = lambda days: status_as_of(get_consent_as_of(db, test_user.id, now - timedelta(days=days)).get(PurposeEnum.ANALYTICS), now - timedelta(days=days))
+        assert [at(11), at(8), at(6), at(3), at(1)] == [None, StatusEnum.GRANTED, StatusEnum.EXPIRED, StatusEnum.GRANTED, StatusEnum.REVOKED]
+
+    def test_bulk_is_two_statements_per_chunk(self, db, test_user, query_counter):
+        from app.models.consent import PurposeEnum, StatusEnum, User
+        from app.services.consent_service import get_consents_as_of
+        from app.utils.helpers import get_utc_now
+        others = [User(email=f"u{index}@example.com", region=RegionEnum.US) for index in range(3)]
+        db.add_all(others)
+        db.commit()
+        for user in [test_user, *others]:
+            self._record(db, user, PurposeEnum.ADS, StatusEnum.GRANTED, get_utc_now())
+        user_ids = [test_user.id, *(user.id for user in others)]
+        query_counter.clear()
+        states = get_consents_as_of(db, user_ids, get_utc_now())
+        assert len(query_counter) == 2
+        assert all(state[PurposeEnum.ADS].status == StatusEnum.GRANTED for state in states.values())
+
+    def test_endpoints(self, client, db, test_user, auth_headers, admin_headers):
+        import uuid
+        from app.utils.helpers import get_utc_now
+        client.post("/consent/grant", json={"user_id": str(test_user.id), "purpose": "analytics", "region": "EU"}, headers=auth_headers)
+        at = get_utc_now().isoformat()
+        response = client.get("/consent/as-of", params={"user_id": str(test_user.id), "at": at, "purpose": ["analytics", "ads"]}, headers=auth_headers)
+        assert response.status_code == 200
+        assert [(entry["purpose"], entry["status"]) for entry in response.json()["consents"]] == [("analytics", "granted"), ("ads", None)]
+        missing = str(uuid.uuid4())
+        bulk = client.post("/consent/as-of/bulk", json={"user_ids": [str(test_user.id), missing], "at": at}, headers=admin_headers)
+        assert bulk.status_code == 200
+        assert bulk.json()["missing_user_ids"] == [missing]
+        assert client.post("/consent/as-of/bulk", json={"user_ids": [str(test_user.id)], "at": at}, headers=auth_headers).status_code == 403
+
+
+class TestConsentImport:
+    def test_csv_import_loads_history_current_and_audit(self, db, test_user):
+        import io
+        from app.models.audit import AuditLog
+        from app.models.consent import ConsentCurrent, ConsentHistory, PurposeEnum, StatusEnum
+        from app.services import consent_import_service
+        test_user.external_id = "partner-1"
+        db.commit()
+        body = "\n".join([
+            "user_id,external_id,purpose,status,region,timestamp",
+            f"{test_user.id},,analytics,granted,,2026-01-01T00:00:00+00:00",
+            f"{test_user.id},,analytics,revoked,US,2026-02-01T00:00:00+00:00",
+            ",partner-1,ads,granted,,",
+            ",nobody,ads,granted,,",
+            f"{test_user.id},,telepathy,granted,,",
+        ])
+        job = consent_import_service.create_import_job(db, "csv", submitted_by="cli")
+        job = consent_import_service.run_import(db, job, io.BytesIO(body.encode("utf-8")), batch_size=2)
+        assert (job.status, job.total_rows, job.imported_rows, job.rejected_rows) == ("completed", 5, 3, 2)
+        assert job.errors == [{"row": 4, "error": "user_not_found"}, {"row": 5, "error": "invalid_purpose"}]
+        assert db.query(ConsentHistory).count() == 3
+        current = {row.purpose: row.status for row in db.query(ConsentCurrent).filter(ConsentCurrent.user_id == test_user.id)}
+        assert current == {PurposeEnum.ANALYTICS: StatusEnum.REVOKED, PurposeEnum.ADS: StatusEnum.GRANTED}
+        audit = db.query(AuditLog).filter(AuditLog.action == "CONSENT_IMPORTED").all()
+        assert len(audit) == 3 and all(row.subject_id == test_user.id and row.details["import_job_id"] == str(job.id) for row in audit)
+
+    def test_backdated_record_does_not_replace_newer_state(self, db, test_user):
+        import io
+        import json
+        from app.models.consent import ConsentCurrent, PurposeEnum, StatusEnum
+        from app.services import consent_import_service, consent_service
+        consent_service.grant_consent(db, test_user.id, PurposeEnum.EMAIL, RegionEnum.EU)
+        body = json.dumps({"user_id": str(test_user.id), "purpose": "email", "status": "revoked", "timestamp": "2020-01-01T00:00:00Z"}) + "\nnot json\n"
+        job = consent_import_service.run_import(db, consent_import_service.create_import_job(db, "ndjson"), io.BytesIO(body.encode("utf-8")))
+        assert (job.imported_rows, job.rejected_rows) == (1, 1)
+        assert db.query(ConsentCurrent.status).filter(ConsentCurrent.user_id == test_user.id).scalar() == StatusEnum.GRANTED
+        assert len(consent_service.get_history_page(db, test_user.id)[0]) == 2
+
+    def test_endpoint_runs_import_and_reports_progress(self, client, db, test_user, admin_headers, auth_headers):
+        body = f'{{"user_id": "{test_user.id}", "purpose": "ads", "status": "granted"}}\n'
+        assert client.post("/admin/consent-imports", content=body, headers=auth_headers).status_code == 403
+        assert client.post("/admin/consent-imports", params={"format": "xml"}, content=body, headers=admin_headers).status_code == 422
+        response = client.post("/admin/consent-imports", content=body, headers={**admin_headers, "Content-Type": "application/x-ndjson"})
+        assert response.status_code == 202
+        job = client.get(f"/admin/consent-imports/{response.json()['id']}", headers=admin_headers).json()
+        assert (job["status"], job["imported_rows"]) == ("completed", 1)
+
+    def test_out_of_range_timestamps_are_rejected_before_partitioning(self, db, test_user, monkeypatch):
+        import io
+        from datetime import timedelta
+        from app.config import settings
+        from app.db import partitions
+        from app.services import consent_import_service
+        monkeypatch.setattr(settings, "CONSENT_IMPORT_MAX_AGE_DAYS", 365)
+        monkeypatch.setattr(partitions, "is_partitioned", lambda db, table: True)
+        created = []
+        monkeypatch.setattr(partitions, "ensure_monthly_partitions", lambda db, table, *, start, end: created.append((start, end)) or [])
+        body = "\n".join(["user_id,purpose,status,timestamp", *(f"{test_user.id},ads,granted,{stamp}" for stamp in ("1970-01-01T00:00:00Z", "9999-01-01T00:00:00Z", ""))])
+        job = consent_import_service.run_import(db, consent_import_service.create_import_job(db, "csv"), io.BytesIO(body.encode("utf-8")))
+        assert (job.imported_rows, [error["error"] for error in job.errors]) == (1, ["timestamp_out_of_range"] * 2)
+        assert len(created) == 1 and created[0][1] - created[0][0] <= timedelta(days=62)
+
+    def test_staging_csv_matches_copy_csv_format(self):
+        import csv
+        import uuid
+        from datetime import datetime, timezone
+        from app.models.consent import PurposeEnum, StatusEnum
+        from app.services.consent_import_service import _STAGED_COLUMNS, _staging_csv
+        row = {column: None for column in _STAGED_COLUMNS}
+        row.update(id=uuid.UUID(int=1), user_id=uuid.UUID(int=2), audit_id=uuid.UUID(int=3), purpose=PurposeEnum.ADS, status=StatusEnum.GRANTED, region=RegionEnum.EU, timestamp=datetime(2026, 1, 1, tzinfo=timezone.utc), source='partner "a", batch 1')
+        buffer = _staging_csv([row])
+        line = buffer.getvalue()
+        assert ",,," in line and '"partner ""a"", batch 1"' in line
+        values = dict(zip(_STAGED_COLUMNS, next(csv.reader(buffer))))
+        assert (values["purpose"], values["status"], values["region"], values["timestamp"]) == ("ads", "granted", "EU", "2026-01-01T00:00:00+00:00")
+        assert (values["expires_at"], values["audit_id"]) == ("", str(uuid.UUID(int=3)))
+
+    @pytest.mark.skipif(not os.environ.get("TEST_POSTGRES_URL"), reason="needs Postgres COPY (set TEST_POSTGRES_URL)")
+    def test_copy_staging_loads_history_and_audit_on_postgres(self):
+        import io
+        import json
+        import uuid
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import Session
+        from app.db.database import Base
+        from app.models.audit import AuditLog
+        from app.models.consent import ConsentCurrent, ConsentHistory, StatusEnum, User
+        from app.services import consent_import_service, policy_snapshot_service
+        engine = create_engine(os.environ["TEST_POSTGRES_URL"])
+        Base.metadata.create_all(engine)
+        policy_snapshot_service.clear_cache()
+        try:
+            with Session(engine) as session:
+                user = User(id=uuid.uuid4(), email="copy@example.com", region=RegionEnum.EU)
+                session.add(user)
+                session.commit()
+                records = [{"user_id": str(user.id), "purpose": "ads", "status": status, "timestamp": stamp, "source": 'crm, "eu"'} for status, stamp in (("granted", "2026-01-01T00:00:00Z"), ("revoked", "2026-02-01T00:00:00Z"))]
+                body = "\n".join(json.dumps(record) for record in records)
+                job = consent_import_service.run_import(session, consent_import_service.create_import_job(session, "ndjson"), io.BytesIO(body.encode("utf-8")))
+                assert (job.status, job.imported_rows) == ("completed", 2)
+                history = session.query(ConsentHistory).filter(ConsentHistory.user_id == user.id).order_by(ConsentHistory.timestamp).all()
+                assert [(row.status, row.source, row.expires_at) for row in history] == [(StatusEnum.GRANTED, 'crm, "eu"', None), (StatusEnum.REVOKED, 'crm, "eu"', None)]
+                assert session.query(ConsentCurrent.status).filter(ConsentCurrent.user_id == user.id).scalar() == StatusEnum.REVOKED
+                audit = session.query(AuditLog).filter(AuditLog.action == "CONSENT_IMPORTED").all()
+                assert sorted(row.details["status"] for row in audit) == ["granted", "revoked"] and all(row.details["import_job_id"] == str(job.id) for row in audit)
+        finally:
+            policy_snapshot_service.clear_cache()
+            Base.metadata.drop_all(engine)
+            engine.dispose()
+
+
+class TestIdempotentWrites:
+    def test_repeated_grant_is_coalesced(self, db, test_user):
+        from app.models.audit import AuditLog
+        from app.models.consent import ConsentHistory, PurposeEnum, User
+        from app.services import consent_service
+        first = consent_service.grant_consent(db, test_user.id, PurposeEnum.ADS, RegionEnum.EU)
+        assert consent_service.grant_consent(db, test_user.id, PurposeEnum.ADS, RegionEnum.EU).id == first.id
+        assert (db.query(ConsentHistory).count(), db.query(AuditLog).count()) == (1, 1)
+        assert db.query(User.consent_version).filter(User.id == test_user.id).scalar() == 1
+        assert consent_service.revoke_consent(db, test_user.id, PurposeEnum.ADS, RegionEnum.EU).id != first.id
+
+    def test_idempotency_key_replays_grant(self, client, db, test_user, auth_headers):
+        from app.models.consent import ConsentHistory
+        body = {"user_id": str(test_user.id), "purpose": "analytics", "region": "EU"}
+        headers = {**auth_headers, "Idempotency-Key": "retry-1"}
+        first = client.post("/consent/grant", json=body, headers=headers)
+        client.post("/consent/revoke", json=body, headers=auth_headers)
+        replay = client.post("/consent/grant", json=body, headers=headers)
+        assert first.status_code == replay.status_code == 201
+        assert replay.json() == first.json() and replay.headers["Idempotent-Replayed"] == "true"
+        assert db.query(ConsentHistory).count() == 2
+        assert client.post("/consent/revoke", json=body, headers=headers).status_code == 422
+
+    def test_failed_write_releases_key(self, client, test_user, auth_headers):
+        body = {"user_id": str(test_user.id), "updates": {"ads": "granted"}}
+        headers = {**auth_headers, "Idempotency-Key": "retry-2"}
+        assert client.post("/consent/preferences/update", json=body, headers={**headers, "If-Match": '"99.0.x"'}).status_code == 412
+        assert client.post("/consent/preferences/update", json=body, headers=headers).status_code == 200
+
+    def test_preferences_replay_and_noop_update(self, client, db, test_user, auth_headers):
+        from app.models.consent import ConsentHistory
+        body = {"user_id": str(test_user.id), "updates": {"ads": "granted", "email": "granted"}}
+        first = client.post("/consent/preferences/update", json=body, headers={**auth_headers, "Idempotency-Key": "prefs-1"})
+        replay = client.post("/consent/preferences/update", json=body, headers={**auth_headers, "Idempotency-Key": "prefs-1"})
+        assert replay.json() == first.json() and replay.headers["ETag"] == first.headers["ETag"] and "Idempotent-Replayed" not in first.headers
+        noop = client.post("/consent/preferences/update", json=body, headers={**auth_headers, "If-Match": first.headers["ETag"]})
+        assert noop.status_code == 200 and noop.headers["ETag"] == first.headers["ETag"]
+        assert db.query(ConsentHistory).count() == 2
+
+    def test_expired_keys_are_taken_over_and_purged(self, db, test_user):
+        from datetime import timedelta
+        from app.models.idempotency import IdempotencyKey
+        from app.services import idempotency_service
+        from app.utils.helpers import get_utc_now
+        calls = []
+        operation = lambda: calls.append(1) or (200, {"n": len(calls)}, {})
+        assert idempotency_service.run_idempotent(db, "user:1", "k", "hash", operation) == ((200, {"n": 1}, {}), False)
+        assert idempotency_service.run_idempotent(db, "user:1", "k", "hash", operation) == ((200, {"n": 1}, {}), True)
+        db.query(IdempotencyKey).update({IdempotencyKey.expires_at: get_utc_now() - timedelta(seconds=1)})
+        db.commit()
+        assert idempotency_service.run_idempotent(db, "user:1", "k", "hash", operation)[0][1] == {"n": 2}
+        db.query(IdempotencyKey).update({IdempotencyKey.expires_at: get_utc_now() - timedelta(seconds=1)})
+        db.commit()
+        assert idempotency_service.purge_expired_keys(db) == 1
+
+    def test_abandoned_claim_is_taken_over_after_lease(self, db, monkeypatch):
+        from datetime import timedelta
+        from app.config import settings
+        from app.services import idempotency_service
+        from app.utils.helpers import get_utc_now
+
+        def crash():
+            raise SystemExit  # not an Exception: the claim is left behind as if the process died mid-request
+
+        with pytest.raises(SystemExit):
+            idempotency_service.run_idempotent(db, "user:1", "k", "hash", crash)
+        db.rollback()
+        with pytest.raises(ValueError, match="idempotency_key_in_progress"):
+            idempotency_service.run_idempotent(db, "user:1", "k", "hash", lambda: (200, {}, {}))
+        later = get_utc_now() + timedelta(seconds=settings.IDEMPOTENCY_LEASE_SECONDS + 1)
+        monkeypatch.setattr(idempotency_service, "get_utc_now", lambda: later)
+        assert idempotency_service.run_idempotent(db, "user:1", "k", "hash", lambda: (200, {"ok": True}, {})) == ((200, {"ok": True}, {}), False)
+        monkeypatch.setattr(idempotency_service, "get_utc_now", lambda: later + timedelta(seconds=settings.IDEMPOTENCY_LEASE_SECONDS + 1))
+        assert idempotency_service.run_idempotent(db, "user:1", "k", "hash", lambda: (500, {}, {}))[1] is True
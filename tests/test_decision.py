@@ -34,3 +34,255 @@ class TestDecisionService:
         assert "policy_snapshot" in result
         assert result["policy_snapshot"] is not None
 
+
+class TestBatchDecision:
+    def test_decide_batch_matches_single_decisions(self, db, test_user):
+        from app.services.consent_service import grant_consent
+        from app.services.decision_service import decide_batch
+        grant_consent(db, test_user.id, PurposeEnum.ANALYTICS, RegionEnum.EU)
+        results = decide_batch(db, [(test_user.id, None, PurposeEnum.ANALYTICS), (test_user.id, None, PurposeEnum.ADS)])
+        assert [(r["allowed"], r["reason"]) for r in results] == [(True, "gdpr_granted"), (False, "gdpr_requires_grant")]
+
+    def test_decide_batch_bulk_inserts_audit_logs(self, db, test_user):
+        from app.models.audit import AuditLog
+        from app.services.decision_service import decide_batch
+        decide_batch(db, [(test_user.id, None, purpose) for purpose in PurposeEnum])
+        assert db.query(AuditLog).filter(AuditLog.action == "decision").count() == len(PurposeEnum)
+
+    def test_decide_batch_unknown_user(self, db, test_user):
+        import uuid
+        from app.services.decision_service import decide_batch
+        results = decide_batch(db, [(uuid.uuid4(), None, PurposeEnum.ANALYTICS), (None, "missing-external", PurposeEnum.ADS)])
+        assert all(r["error"] == "user_not_found" for r in results)
+
+    def test_batch_endpoint_streams_ndjson(self, client, test_user, auth_headers):
+        import json
+        response = client.post("/decision/batch", json={"items": [{"user_id": str(test_user.id), "purpose": "analytics"}, {"user_id": str(test_user.id), "purpose": "email"}]}, headers=auth_headers)
+        assert response.status_code == 200
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert [line["purpose"] for line in lines] == ["analytics", "email"]
+        assert lines[0]["region"] == "EU"
+
+    def test_decide_batch_yields_chunk_by_chunk(self, db, test_user, query_counter, monkeypatch):
+        from app.services import decision_service
+        monkeypatch.setattr(decision_service, "_BATCH_CHUNK_SIZE", 2)
+        user_id = test_user.id
+        decide(db, user_id, PurposeEnum.ANALYTICS)
+        query_counter.clear()
+        results = decision_service.iter_decide_batch(db, [(user_id, None, purpose) for purpose in list(PurposeEnum)[:4]])
+        assert next(results)["purpose"] == list(PurposeEnum)[0]
+        assert len([s for s in query_counter if s.lstrip().upper().startswith("SELECT")]) == 1
+        assert len(list(results)) == 3
+        assert len([s for s in query_counter if s.lstrip().upper().startswith("SELECT")]) == 2
+
+    def test_decide_batch_skips_deleted_users(self, db, test_user):
+        from app.services.decision_service import decide_batch
+        from app.utils.helpers import get_utc_now
+        test_user.external_id, test_user.deleted_at = "ext-deleted", get_utc_now()
+        db.commit()
+        results = decide_batch(db, [(test_user.id, None, PurposeEnum.ANALYTICS), (None, "ext-deleted", PurposeEnum.ADS)])
+        assert [r.get("error") for r in results] == ["user_not_found", "user_not_found"]
+
+    def test_batch_endpoint_external_id_requires_admin(self, client, auth_headers):
+        response = client.post("/decision/batch", json={"items": [{"external_id": "ext-1", "purpose": "analytics"}]}, headers=auth_headers)
+        assert response.status_code == 403
+
+
+class TestDecisionAll:
+    def test_decide_all_matches_single_decisions(self, db, test_user):
+        from app.models.audit import AuditLog
+        from app.services.consent_service import grant_consent
+        from app.services.decision_service import decide_all
+        user_id = test_user.id
+        grant_consent(db, user_id, PurposeEnum.ANALYTICS, RegionEnum.EU)
+        initial_count = db.query(AuditLog).count()
+        result = decide_all(db, user_id)
+        assert db.query(AuditLog).count() == initial_count + 1
+        assert set(result["decisions"]) == set(PurposeEnum)
+        for purpose, (allowed, reason) in result["decisions"].items():
+            single = decide(db, user_id, purpose)
+            assert (single["allowed"], single["reason"]) == (allowed, reason)
+
+    def test_decide_all_uses_single_select(self, db, test_user, query_counter):
+        from app.services.decision_service import decide_all
+        user_id = test_user.id
+        decide_all(db, user_id)
+        query_counter.clear()
+        decide_all(db, user_id)
+        assert len([s for s in query_counter if s.lstrip().upper().startswith("SELECT")]) == 1
+
+    def test_compact_encoding(self):
+        from app.services.decision_service import encode_decisions_compact
+        decisions = {purpose: (False, "gdpr_requires_grant") for purpose in PurposeEnum}
+        decisions[list(PurposeEnum)[1]] = (True, "gdpr_granted")
+        encoded = encode_decisions_compact(decisions)
+        assert encoded["allowed_mask"] == 0b10
+        assert [encoded["reasons"][code] for code in encoded["reason_codes"]] == [reason for _, reason in decisions.values()]
+
+    def test_endpoint_formats(self, client, test_user, auth_headers):
+        full = client.get(f"/decision/all?user_id={test_user.id}", headers=auth_headers)
+        assert full.status_code == 200
+        assert len(full.json()["decisions"]) == len(PurposeEnum)
+        compact = client.get(f"/decision/all?user_id={test_user.id}&format=compact", headers=auth_headers).json()
+        assert compact["purposes"] == [purpose.value for purpose in PurposeEnum]
+        assert compact["allowed_mask"] == sum(1 << i for i, item in enumerate(full.json()["decisions"]) if item["allowed"])
+
+    def test_endpoint_rejects_other_users(self, client, auth_headers):
+        import uuid
+        assert client.get(f"/decision/all?user_id={uuid.uuid4()}", headers=auth_headers).status_code == 403
+
+
+class TestDecisionQueryCount:
+    def test_decide_uses_single_select(self, db, test_user, query_counter):
+        user_id = test_user.id
+        decide(db, user_id, PurposeEnum.ANALYTICS)  # first decision interns the region's policy snapshot
+        query_counter.clear()
+        decide(db, user_id, PurposeEnum.ANALYTICS)
+        selects = [s for s in query_counter if s.lstrip().upper().startswith("SELECT")]
+        assert len(selects) == 1
+        assert len(query_counter) == 2  # state lookup + audit insert
+
+    def test_decide_with_history_uses_single_select(self, db, test_user, query_counter):
+        from app.services.consent_service import grant_consent
+        user_id = test_user.id
+        grant_consent(db, user_id, PurposeEnum.ANALYTICS, RegionEnum.EU)
+        query_counter.clear()
+        result = decide(db, user_id, PurposeEnum.ANALYTICS)
+        assert result["reason"] == "gdpr_granted"
+        assert len([s for s in query_counter if s.lstrip().upper().startswith("SELECT")]) == 1
+
+    def test_decide_unknown_user(self, db):
+        import uuid
+        with pytest.raises(ValueError, match="user_not_found"):
+            decide(db, uuid.uuid4(), PurposeEnum.ANALYTICS)
+
+    def test_decide_batch_query_count_is_independent_of_size(self, db, test_user, query_counter):
+        from app.services.decision_service import decide_batch
+        user_id = test_user.id
+        decide(db, user_id, PurposeEnum.ANALYTICS)
+        query_counter.clear()
+        decide_batch(db, [(user_id, None, purpose) for purpose in PurposeEnum])
+        assert len([s for s in query_counter if s.lstrip().upper().startswith("SELECT")]) == 1
+
+
+class TestDecisionRollups:
+    @pytest.fixture
+    def rollup_mode(self, monkeypatch):
+        from app.config import settings
+        monkeypatch.setattr(settings, "DECISION_AUDIT_MODE", "rollup")
+        monkeypatch.setattr(settings, "DECISION_AUDIT_SAMPLE_RATE", 0.0)
+        return settings
+
+    def test_rollup_mode_counts_instead_of_rows(self, db, test_user, rollup_mode):
+        from app.models.audit import AuditLog, DecisionRollup
+        from app.services.decision_rollup_service import flush_rollups
+        decide(db, test_user.id, PurposeEnum.ANALYTICS)
+        decide(db, test_user.id, PurposeEnum.ANALYTICS)
+        assert db.query(AuditLog).filter(AuditLog.action == "decision").count() == 0
+        assert flush_rollups(db) == 2
+        rollup = db.query(DecisionRollup).one()
+        assert (rollup.region, rollup.purpose, rollup.allowed, rollup.reason, rollup.count) == ("EU", "analytics", False, "gdpr_requires_grant", 2)
+
+    def test_flush_merges_into_existing_bucket(self, db, test_user, rollup_mode, monkeypatch):
+        from datetime import datetime, timezone
+        from app.models.audit import DecisionRollup
+        from app.services import decision_service
+        from app.services.decision_rollup_service import flush_rollups
+        monkeypatch.setattr(decision_service, "get_utc_now", lambda: datetime(2026, 1, 1, 12, 0, 30, tzinfo=timezone.utc))
+        decide(db, test_user.id, PurposeEnum.ADS)
+        flush_rollups(db)
+        decide(db, test_user.id, PurposeEnum.ADS)
+        flush_rollups(db)
+        assert [r.count for r in db.query(DecisionRollup).all()] == [2]
+
+    def test_watchlisted_user_keeps_full_rows(self, db, test_user, rollup_mode, monkeypatch):
+        from app.models.audit import AuditLog
+        from app.services.decision_rollup_service import flush_rollups
+        monkeypatch.setattr(rollup_mode, "DECISION_AUDIT_WATCHLIST", str(test_user.id))
+        decide(db, test_user.id, PurposeEnum.EMAIL)
+        flush_rollups(db)
+        assert db.query(AuditLog).filter(AuditLog.action == "decision").count() == 1
+
+    def test_admin_rollup_endpoint_is_read_only(self, client, db, test_user, admin_headers, rollup_mode):
+        from app.services.decision_rollup_service import flush_rollups, pending_count
+        decide(db, test_user.id, PurposeEnum.LOCATION)
+        assert client.get("/admin/audit/rollups?purpose=location", headers=admin_headers).json() == []
+        assert pending_count() == 1
+        flush_rollups(db)
+        response = client.get("/admin/audit/rollups?purpose=location", headers=admin_headers)
+        assert response.status_code == 200
+        assert response.json()[0]["count"] == 1
+
+
+class TestDecisionTokens:
+    def test_token_round_trip(self, client, test_user, auth_headers):
+        from app.services.decision_token_service import verify_decision_token
+        response = client.get(f"/decision/token?user_id={test_user.id}", headers=auth_headers)
+        assert response.status_code == 200
+        claims = verify_decision_token(response.json()["token"])
+        assert claims["user_id"] == test_user.id
+        assert claims["policy_version"] == 0
+        full = client.get(f"/decision/all?user_id={test_user.id}", headers=auth_headers).json()
+        assert {item["purpose"]: item["allowed"] for item in full["decisions"]} == {purpose.value: decision["allowed"] for purpose, decision in claims["decisions"].items()}
+
+    def test_tampered_or_expired_token_is_rejected(self, db, test_user, monkeypatch):
+        from app.config import settings
+        from app.services.decision_token_service import issue_decision_token, verify_decision_token
+        token = issue_decision_token(db, test_user.id)["token"]
+        with pytest.raises(ValueError, match="invalid_decision_token"):
+            verify_decision_token(token, key="some-other-secret")
+        monkeypatch.setattr(settings, "DECISION_TOKEN_TTL_SECONDS", -1)
+        with pytest.raises(ValueError, match="invalid_decision_token"):
+            verify_decision_token(issue_decision_token(db, test_user.id)["token"])
+
+    def test_auth_tokens_are_not_decision_tokens(self, user_token):
+        from app.services.decision_token_service import verify_decision_token
+        from app.config import settings
+        with pytest.raises(ValueError, match="invalid_decision_token"):
+            verify_decision_token(user_token, key=settings.SECRET_KEY)
+
+    def test_algorithm_is_not_taken_from_token_header(self, db, test_user):
+        import base64
+        import jwt
+        from app.services.decision_token_service import ISSUER, TOKEN_TYPE, verify_decision_token
+        secret = "edge-shared-secret"
+        claims = {"iss": ISSUER, "sub": str(test_user.id), "typ": TOKEN_TYPE, "exp": 4102444800, "region": "EU", "pv": 0, "dec": {"purposes": [], "allowed_mask": 0, "reason_codes": [], "reasons": []}}
+        with pytest.raises(ValueError, match="invalid_decision_token"):
+            verify_decision_token(jwt.encode(claims, secret, algorithm="HS512"), key=secret)
+        token = jwt.encode(claims, secret, algorithm="HS256", headers={"kid": "edge"})
+        assert verify_decision_token(token, key=secret)["user_id"] == test_user.id
+        jwk = {"kty": "oct", "kid": "edge", "k": base64.urlsafe_b64encode(secret.encode()).decode().rstrip("=")}
+        with pytest.raises(ValueError, match="invalid_decision_token"):
+            verify_decision_token(token, jwks={"keys": [jwk]}, algorithms=["HS256"])
+        with pytest.raises(ValueError, match="invalid_decision_token"):
+            verify_decision_token(token, jwks={"keys": [{**jwk, "alg": "HS256"}]})
+        assert verify_decision_token(token, jwks={"keys": [{**jwk, "alg": "HS256"}]}, algorithms=["HS256"])["region"].value == "EU"
+
+    def test_jwks_is_empty_for_hmac_signing(self, client):
+        assert client.get("/.well-known/jwks.json").json() == {"keys": []}
+
+
+class TestDecisionAsOf:
+    def test_replays_consent_and_policy_in_force(self, db, test_user, client, auth_headers):
+        import copy
+        from datetime import timedelta
+        from app.models.consent import ConsentHistory
+        from app.models.policy import PolicyDefinition
+        from app.services import policy_engine
+        from app.services.decision_service import decide_as_of
+        from app.utils.helpers import get_utc_now
+        now = get_utc_now()
+        db.add(ConsentHistory(user_id=test_user.id, purpose=PurposeEnum.ANALYTICS, status=StatusEnum.GRANTED, region=RegionEnum.EU, timestamp=now - timedelta(days=5)))
+        db.add(ConsentHistory(user_id=test_user.id, purpose=PurposeEnum.ANALYTICS, status=StatusEnum.REVOKED, region=RegionEnum.EU, timestamp=now - timedelta(days=1)))
+        db.commit()
+        definition = copy.deepcopy(policy_engine.DEFAULT_POLICY_DEFINITION)
+        definition["frameworks"]["gdpr"]["reasons"]["granted"] = "gdpr_v1_granted"
+        policy_engine.create_policy_version(db, definition)
+        db.query(PolicyDefinition).update({PolicyDefinition.published_at: now - timedelta(days=4)})
+        db.commit()
+        assert decide_as_of(db, test_user.id, now - timedelta(days=6), [PurposeEnum.ANALYTICS])["decisions"][PurposeEnum.ANALYTICS] == (RegionEnum.EU, False, "gdpr_requires_grant")
+        assert decide_as_of(db, test_user.id, now - timedelta(days=5))["policy_version"] == 0
+        assert decide_as_of(db, test_user.id, now - timedelta(days=3))["decisions"][PurposeEnum.ANALYTICS] == (RegionEnum.EU, True, "gdpr_v1_granted")
+        response = client.get("/decision/as-of", params={"user_id": str(test_user.id), "at": now.isoformat(), "purpose": "analytics"}, headers=auth_headers)
+        assert response.status_code == 200
+        assert response.json()["decisions"] == [{"purpose": "analytics", "region": "EU", "allowed": False, "reason": "gdpr_requires_grant"}]
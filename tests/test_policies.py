@@ -0,0 +1,111 @@
+import copy
+import pytest
+from app.models.consent import PurposeEnum, RegionEnum, StatusEnum
+from app.services import policy_engine
+from app.services.decision_service import decide
+
+
+def _definition_with_ccpa_in_canada():
+    definition = copy.deepcopy(policy_engine.DEFAULT_POLICY_DEFINITION)
+    definition["frameworks"]["ccpa"]["regions"].append("CA")
+    return definition
+
+
+class TestCompiledPolicy:
+    def test_default_policy_is_version_zero(self):
+        assert policy_engine.get_active_policy().version == 0
+
+    def test_snapshot_records_policy_version(self):
+        snapshot = policy_engine.get_active_policy().snapshot(RegionEnum.BR)
+        assert snapshot == {"region": "BR", "policy": "lgpd", "requires_explicit": True, "default": "deny", "policy_version": 0}
+
+    def test_reason_codes_round_trip(self):
+        policy = policy_engine.get_active_policy()
+        allowed, code = policy.evaluate_code(RegionEnum.US, PurposeEnum.ADS, StatusEnum.DENIED)
+        assert (allowed, policy.reasons[code]) == (False, "ccpa_denied")
+
+    def test_region_in_two_frameworks_is_rejected(self):
+        definition = copy.deepcopy(policy_engine.DEFAULT_POLICY_DEFINITION)
+        definition["frameworks"]["ccpa"]["regions"].append("EU")
+        with pytest.raises(ValueError, match="invalid_policy_definition"):
+            policy_engine.compile_policy(definition, version=1)
+
+
+class TestPolicyVersions:
+    def test_publish_hot_swaps_active_policy(self, db, test_user):
+        test_user.region = RegionEnum.CA
+        db.commit()
+        assert decide(db, test_user.id, PurposeEnum.ANALYTICS)["reason"] == "row_default_allow"
+        record = policy_engine.create_policy_version(db, _definition_with_ccpa_in_canada())
+        assert record.is_active and policy_engine.get_active_policy().version == record.version
+        result = decide(db, test_user.id, PurposeEnum.ANALYTICS)
+        assert result["reason"] == "ccpa_default_allow"
+        assert result["policy_snapshot"]["policy_version"] == record.version
+
+    def test_concurrent_create_takes_next_version(self, db):
+        from sqlalchemy import event
+        from sqlalchemy.orm import Session
+        from app.models.policy import PolicyDefinition
+
+        def concurrent_create(session, flush_context, instances):
+            with Session(bind=db.get_bind()) as other:
+                other.add(PolicyDefinition(version=1, definition=policy_engine.DEFAULT_POLICY_DEFINITION))
+                other.commit()
+
+        event.listen(db, "before_flush", concurrent_create, once=True)
+        record = policy_engine.create_policy_version(db, _definition_with_ccpa_in_canada(), publish=False)
+        assert record.version == 2
+        assert [row.version for row in db.query(PolicyDefinition).order_by(PolicyDefinition.version)] == [1, 2]
+
+    def test_load_active_policy_from_db(self, db):
+        record = policy_engine.create_policy_version(db, _definition_with_ccpa_in_canada())
+        policy_engine.reset_active_policy()
+        assert policy_engine.load_active_policy(db).version == record.version
+
+    def test_admin_endpoints(self, client, admin_headers, auth_headers):
+        payload = {"definition": _definition_with_ccpa_in_canada(), "publish": False}
+        assert client.post("/admin/policies", json=payload, headers=auth_headers).status_code == 403
+        created = client.post("/admin/policies", json=payload, headers=admin_headers)
+        assert created.status_code == 201
+        assert created.json()["is_active"] is False
+        assert client.get("/admin/policies/active", headers=admin_headers).json()["version"] == 0
+        published = client.post(f"/admin/policies/{created.json()['version']}/publish", headers=admin_headers)
+        assert published.status_code == 200
+        assert client.get("/admin/policies/active", headers=admin_headers).json()["version"] == created.json()["version"]
+        assert client.post("/admin/policies/999/publish", headers=admin_headers).status_code == 404
+
+
+class TestPolicySnapshotInterning:
+    def test_repeated_writes_share_one_snapshot_row(self, db, test_user):
+        from app.models.consent import ConsentHistory
+        from app.models.policy import PolicySnapshot
+        from app.services.consent_service import grant_consent, revoke_consent
+        grant_consent(db, test_user.id, PurposeEnum.ANALYTICS, RegionEnum.EU)
+        revoke_consent(db, test_user.id, PurposeEnum.ANALYTICS, RegionEnum.EU)
+        decide(db, test_user.id, PurposeEnum.ANALYTICS)
+        assert db.query(PolicySnapshot).count() == 1
+        history = db.query(ConsentHistory).filter(ConsentHistory.user_id == test_user.id).all()
+        assert len({row.policy_snapshot_id for row in history}) == 1
+        assert history[0].policy_snapshot == policy_engine.get_active_policy().snapshot(RegionEnum.EU)
+
+    def test_snapshot_hash_ignores_key_order(self):
+        from app.services.policy_snapshot_service import snapshot_hash
+        assert snapshot_hash({"a": 1, "b": 2}) == snapshot_hash({"b": 2, "a": 1})
+
+    def test_snapshots_endpoint_lists_distinct_rows(self, client, admin_headers, test_user, user_token):
+        headers = {"Authorization": f"Bearer {user_token}"}
+        for purpose in ("analytics", "marketing"):
+            client.post("/consent/grant", json={"user_id": str(test_user.id), "purpose": purpose, "region": "EU"}, headers=headers)
+        snapshots = client.get("/admin/policies/snapshots", headers=admin_headers).json()
+        assert [item["region"] for item in snapshots] == ["EU"]
+        assert snapshots[0]["source"] == "policy_snapshots"
+
+    def test_new_snapshot_does_not_commit_callers_work(self, db):
+        from app.models.consent import User
+        from app.models.policy import PolicySnapshot
+        from app.services.policy_snapshot_service import intern_snapshot
+        db.add(User(email="pending@example.com", region=RegionEnum.EU))
+        content_hash = intern_snapshot(db, {"policy_version": 99, "region": "EU"})
+        db.rollback()
+        assert db.query(User).filter(User.email == "pending@example.com").first() is None
+        assert db.get(PolicySnapshot, content_hash) is not None
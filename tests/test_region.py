@@ -28,6 +28,15 @@ class TestLocalIP:
         ("192.168.1.1", True),
         ("10.0.0.1", True),
         ("172.16.0.1", True),
+        ("172.20.5.4", True),
+        ("172.31.255.255", True),
+        ("172.32.0.1", False),
+        ("100.64.0.1", True),
+        ("fc00::1", True),
+        ("fe80::1", True),
+        ("::ffff:10.0.0.1", True),
+        ("2001:4860:4860::8888", False),
+        ("not-an-ip", False),
         ("localhost", True),
         ("::1", True),
         ("8.8.8.8", False),
@@ -37,6 +46,23 @@ class TestLocalIP:
         assert _is_local_ip(ip) == expected
 
 
+class TestRegionResolver:
+    def test_resolver_without_database_resolves_nothing(self):
+        from app.services.region_service import RegionResolver
+        resolver = RegionResolver(None, cache_size=2)
+        assert resolver.lookup("8.8.8.8") is None
+        assert resolver.lookup("8.8.8.8") is None
+        stats = resolver.stats()
+        assert stats["available"] is False and stats["cache_hits"] == 1 and stats["cache_maxsize"] == 2
+
+    def test_lru_is_bounded(self):
+        from app.services.region_service import RegionResolver
+        resolver = RegionResolver(None, cache_size=2)
+        for ip in ("1.1.1.1", "2.2.2.2", "3.3.3.3"):
+            resolver.lookup(ip)
+        assert resolver.stats()["cache_size"] == 2
+
+
 class TestRegionEndpoint:
     def test_region_endpoint_requires_auth(self, client):
         response = client.get("/region")
@@ -50,3 +76,120 @@ class TestRegionEndpoint:
         assert "region" in data
         assert "detected" in data
 
+
+
+class TestClientIpAndFallback:
+    @staticmethod
+    def _request(peer, forwarded_for=None):
+        from starlette.requests import Request
+        headers = [(b"x-forwarded-for", forwarded_for.encode())] if forwarded_for else []
+        return Request({"type": "http", "headers": headers, "client": (peer, 1234)})
+
+    def test_trusted_proxy_walk(self, monkeypatch):
+        from app.config import settings
+        from app.utils.helpers import extract_client_ip
+        monkeypatch.setattr(settings, "TRUSTED_PROXIES", "10.0.0.0/8")
+        assert extract_client_ip(self._request("10.0.0.5", "1.2.3.4, 5.6.7.8, 10.0.0.9")) == "5.6.7.8"
+        assert extract_client_ip(self._request("8.8.4.4", "1.2.3.4")) == "8.8.4.4"
+
+    def test_local_ip_never_triggers_network_lookup(self, monkeypatch):
+        from app.services import region_service
+        monkeypatch.setattr(region_service, "_get_public_ip", lambda: pytest.fail("network lookup on request path"))
+        monkeypatch.setattr(region_service, "_public_ip", None)
+        assert detect_region_from_ip("127.0.0.1") == RegionEnum.ROW
+
+    def test_fallback_region_is_lazy(self, db, test_user):
+        from app.models.consent import PurposeEnum
+        from app.services.decision_service import decide
+        result = decide(db, test_user.id, PurposeEnum.ANALYTICS, fallback_region=lambda: pytest.fail("fallback evaluated"))
+        assert result["region"] == RegionEnum.EU
+
+
+class _FakeReader:
+    def __init__(self, records, database_type="GeoLite2-Country", build_epoch=1):
+        self.records = records
+        self.calls = 0
+        self.database_type = database_type
+        self.build_epoch = build_epoch
+
+    def metadata(self):
+        from types import SimpleNamespace
+        return SimpleNamespace(database_type=self.database_type, build_epoch=self.build_epoch)
+
+    def get(self, address):
+        self.calls += 1
+        return self.records.get(str(address))
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def fake_resolver(monkeypatch):
+    from app.services import region_service
+    reader = _FakeReader({"8.8.8.8": {"country": {"iso_code": "US"}}, "81.2.69.142": {"country": {"iso_code": "GB"}}, "2.2.2.2": {"registered_country": {"iso_code": "FR"}}, "3.3.3.3": {"country": {"iso_code": "DE"}, "registered_country": {"iso_code": "US"}}})
+    resolver = region_service.RegionResolver(None, cache_size=16, reader=reader)
+    monkeypatch.setattr(region_service, "_resolver", resolver)
+    return reader
+
+
+class TestRegionBatch:
+    def test_resolve_regions_dedupes_and_maps(self, fake_resolver):
+        from app.services.region_service import resolve_regions
+        results = list(resolve_regions(["8.8.8.8", "8.8.8.8", "81.2.69.142", "2.2.2.2", "3.3.3.3", "10.0.0.1", "bogus", ""]))
+        assert results == [("8.8.8.8", RegionEnum.US, True), ("8.8.8.8", RegionEnum.US, True), ("81.2.69.142", RegionEnum.UK, True), ("2.2.2.2", RegionEnum.ROW, False), ("3.3.3.3", RegionEnum.EU, True), ("10.0.0.1", RegionEnum.ROW, False), ("bogus", RegionEnum.ROW, False)]
+        assert fake_resolver.calls == 4
+
+    def test_batch_endpoint_accepts_json_and_lines(self, client, admin_headers, auth_headers, fake_resolver):
+        import json
+        response = client.post("/region/batch", json=["8.8.8.8", "10.1.1.1"], headers=admin_headers)
+        assert [json.loads(line) for line in response.text.splitlines()] == [{"ip": "8.8.8.8", "region": "US", "detected": True}, {"ip": "10.1.1.1", "region": "ROW", "detected": False}]
+        text = client.post("/region/batch", content="81.2.69.142\n8.8.8.8\n", headers={**admin_headers, "Content-Type": "text/plain"})
+        assert [json.loads(line)["region"] for line in text.text.splitlines()] == ["UK", "US"]
+        assert client.post("/region/batch", content='{"ip": 1}', headers=admin_headers).status_code == 422
+        assert client.post("/region/batch", json=["8.8.8.8"], headers=auth_headers).status_code == 403
+
+    def test_cli(self, tmp_path, capsys, fake_resolver):
+        from app.cli import main
+        path = tmp_path / "ips.txt"
+        path.write_text("8.8.8.8\n81.2.69.142\n")
+        assert main(["region-batch", str(path), "--format", "csv"]) == 0
+        assert capsys.readouterr().out.splitlines() == ["ip,region,detected", "8.8.8.8,US,1", "81.2.69.142,UK,1"]
+
+
+class TestGeoipReload:
+    @pytest.fixture
+    def db_file(self, tmp_path, monkeypatch, fake_resolver):
+        from app.services import region_service
+        path = tmp_path / "GeoLite2-Country.mmdb"
+        path.write_bytes(b"v1")
+        readers = {"v1": _FakeReader({"8.8.8.8": {"country": {"iso_code": "US"}}}, build_epoch=1), "v2": _FakeReader({"8.8.8.8": {"country": {"iso_code": "DE"}}}, build_epoch=2), "bad": _FakeReader({}, database_type="GeoLite2-ASN")}
+        monkeypatch.setattr(region_service, "GEOIP_DB_PATH", path)
+        monkeypatch.setattr(region_service, "_open_reader", lambda db_path: readers[db_path.read_bytes().decode()])
+        monkeypatch.setattr(region_service, "_rejected_signature", None)
+        region_service.reload_geoip_database()
+        return path
+
+    def test_swap_replaces_reader_and_clears_cache(self, db_file):
+        import os
+        from app.services import region_service
+        assert region_service.detect_region_from_ip("8.8.8.8") == RegionEnum.US
+        old = region_service.get_resolver()
+        db_file.write_bytes(b"v2")
+        os.utime(db_file, ns=(1, 10 ** 18))
+        assert region_service.check_geoip_reload() is True
+        assert region_service.get_resolver() is not old
+        assert region_service.detect_region_from_ip("8.8.8.8") == RegionEnum.EU
+        assert old.lookup("8.8.8.8") == RegionEnum.US  # in-flight holders keep the old reader
+        assert region_service.check_geoip_reload() is False
+
+    def test_invalid_database_keeps_current_reader(self, db_file, client, admin_headers):
+        from app.services import region_service
+        current = region_service.get_resolver()
+        db_file.write_bytes(b"bad")
+        response = client.post("/admin/geoip/reload", headers=admin_headers)
+        assert response.status_code == 422
+        assert region_service.get_resolver() is current
+        assert region_service.check_geoip_reload() is False
+        db_file.write_bytes(b"v2")
+        assert client.post("/admin/geoip/reload", headers=admin_headers).json()["build_epoch"] == 2
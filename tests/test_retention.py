@@ -1,3 +1,4 @@
+import os
 import pytest
 from datetime import timedelta
 from app.models.consent import ConsentHistory, PurposeEnum, StatusEnum, RegionEnum
@@ -34,3 +35,78 @@ class TestRetentionEndpoint:
         response = client.get("/retention/run", headers=admin_headers)
         assert response.status_code == 200
 
+
+
+class TestConsentCompaction:
+    def test_moves_superseded_rows_and_keeps_history_readable(self, db, test_user):
+        from app.jobs.compaction import compact_consent_history
+        from app.models.consent import ConsentHistoryArchive
+        from app.services import consent_service
+        now = get_utc_now()
+        consent_service.grant_consent(db, test_user.id, PurposeEnum.ADS, RegionEnum.EU)
+        old = [ConsentHistory(user_id=test_user.id, purpose=PurposeEnum.ANALYTICS, status=status, region=RegionEnum.EU, timestamp=now - timedelta(days=days)) for days, status in ((300, StatusEnum.GRANTED), (200, StatusEnum.REVOKED))]
+        db.add_all(old)
+        db.commit()
+        consent_service.grant_consent(db, test_user.id, PurposeEnum.ANALYTICS, RegionEnum.EU)
+        db.query(ConsentHistory).filter(ConsentHistory.purpose == PurposeEnum.ADS).update({ConsentHistory.timestamp: now - timedelta(days=400)})
+        db.commit()
+        assert compact_consent_history(db, now - timedelta(days=90), batch_size=1) == 2
+        assert db.query(ConsentHistory).count() == 2
+        assert db.query(ConsentHistoryArchive).count() == 2
+        history = list(consent_service.iter_history(db, test_user.id, page_size=1))
+        assert [row.purpose for row in history] == [PurposeEnum.ANALYTICS, PurposeEnum.ANALYTICS, PurposeEnum.ANALYTICS, PurposeEnum.ADS]
+        state = consent_service.get_consent_as_of(db, test_user.id, now - timedelta(days=250))
+        assert state[PurposeEnum.ANALYTICS].status == StatusEnum.GRANTED and PurposeEnum.ADS in state
+
+
+class TestPartitionedRetention:
+    def test_partition_names_round_trip(self):
+        from datetime import datetime, timezone
+        from app.db.partitions import add_months, parse_partition_name, partition_name
+        start = datetime(2026, 12, 1, tzinfo=timezone.utc)
+        assert partition_name("consent_history", start) == "consent_history_p2026_12"
+        assert parse_partition_name("consent_history", "consent_history_p2026_12") == ("consent_history_p2026_12", start, add_months(start, 1))
+        assert add_months(start, 1) == datetime(2027, 1, 1, tzinfo=timezone.utc)
+        assert parse_partition_name("consent_history", "consent_history_default") is None
+
+    def test_stale_consents_deleted_in_batches(self, db, test_user, monkeypatch):
+        from app.config import settings
+        from app.jobs.retention import _delete_stale_consents
+        from app.jobs.partitions import run_partition_maintenance
+        monkeypatch.setattr(settings, "RETENTION_DELETE_BATCH_SIZE", 2)
+        now = get_utc_now()
+        db.add_all([ConsentHistory(user_id=test_user.id, purpose=PurposeEnum.ANALYTICS, status=StatusEnum.GRANTED, region=RegionEnum.EU, timestamp=now - timedelta(days=days)) for days in (400, 390, 380, 370, 370, 1)])
+        db.commit()
+        assert run_partition_maintenance(db) == {}
+        assert _delete_stale_consents(db, now - timedelta(days=365)) == 5
+        assert db.query(ConsentHistory).count() == 1
+
+    def test_batched_deletes_run_on_their_own_session(self, db, test_user, monkeypatch):
+        from app.jobs import retention
+        sessions = []
+        monkeypatch.setattr(retention, "_delete_in_batches", lambda session, model, cutoff, batch_size: sessions.append(session) or 0)
+        retention._delete_stale_consents(db, get_utc_now())
+        assert len(sessions) == 2 and all(session is not db for session in sessions)
+
+    @pytest.mark.skipif(not os.environ.get("TEST_POSTGRES_URL"), reason="needs Postgres partitioning (set TEST_POSTGRES_URL)")
+    def test_new_month_takes_its_rows_from_the_default_partition(self):
+        from datetime import datetime, timezone
+        from sqlalchemy import create_engine, text
+        from sqlalchemy.orm import Session
+        from app.db.partitions import ensure_monthly_partitions
+        engine = create_engine(os.environ["TEST_POSTGRES_URL"])
+        with Session(engine) as session:
+            session.execute(text('CREATE TABLE partition_probe (id int NOT NULL, "timestamp" timestamptz NOT NULL) PARTITION BY RANGE ("timestamp")'))
+            session.execute(text("CREATE TABLE partition_probe_default PARTITION OF partition_probe DEFAULT"))
+            session.execute(text("INSERT INTO partition_probe VALUES (1, '2020-03-05Z'), (2, '2020-03-20Z'), (3, '2020-05-01Z')"))
+            session.commit()
+            try:
+                assert ensure_monthly_partitions(session, "partition_probe", start=datetime(2020, 3, 1, tzinfo=timezone.utc), end=datetime(2020, 4, 1, tzinfo=timezone.utc)) == ["partition_probe_p2020_03"]
+                assert session.execute(text("SELECT id FROM partition_probe_p2020_03 ORDER BY id")).scalars().all() == [1, 2]
+                assert session.execute(text("SELECT id FROM partition_probe_default")).scalars().all() == [3]
+                assert session.execute(text("SELECT count(*) FROM pg_inherits WHERE inhparent = 'partition_probe'::regclass")).scalar() == 2
+            finally:
+                session.rollback()
+                session.execute(text("DROP TABLE partition_probe CASCADE"))
+                session.commit()
+        engine.dispose()
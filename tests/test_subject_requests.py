@@ -34,3 +34,46 @@ class TestSubjectRequests:
         response = client.post("/subject-requests", json={"user_id": str(other.id), "request_type": "export"}, headers=auth_headers)
         assert response.status_code == 403
 
+
+
+class TestExport:
+    def test_export_streams_full_document_and_completes_request(self, client, db, test_user, auth_headers):
+        from app.models.consent import RequestStatusEnum, SubjectRequest
+        for purpose in ("analytics", "ads", "email"):
+            assert client.post("/consent/grant", json={"user_id": str(test_user.id), "purpose": purpose, "region": "EU"}, headers=auth_headers).status_code == 201
+        created = client.post("/subject-requests", json={"user_id": str(test_user.id), "request_type": "export"}, headers=auth_headers).json()
+        response = client.get(f"/subject-requests/export/{created['request_id']}", params={"token": created["verification_token"]}, headers=auth_headers)
+        assert response.status_code == 200 and response.headers["content-type"] == "application/json"
+        export = response.json()
+        assert export["user_id"] == str(test_user.id) and export["preferences"]["ads"] == "granted"
+        assert [entry["purpose"] for entry in export["history"]] == ["email", "ads", "analytics"]
+        assert {log["action"] for log in export["audit_logs"]} >= {"CONSENT_GRANTED", "subject.request.created"}
+        assert len(export["policy_snapshots"]) == 1
+        db.expire_all()
+        request = db.get(SubjectRequest, created["request_id"])
+        assert request.status == RequestStatusEnum.COMPLETED and request.result_location
+
+    def test_audit_rows_are_read_in_keyset_pages(self, db, test_user, query_counter):
+        from datetime import timedelta
+        from app.models.audit import AuditLog
+        from app.services.subject_request_service import iter_subject_audit_logs
+        from app.utils.helpers import get_utc_now
+        now = get_utc_now()
+        db.add_all([AuditLog(action=f"event-{i}", user_id=test_user.id, event_time=now - timedelta(minutes=i // 2), created_at=now) for i in range(7)])
+        db.commit()
+        query_counter.clear()
+        rows = list(iter_subject_audit_logs(db, test_user.id, page_size=3))
+        assert len(rows) == 7 and len({row.id for row in rows}) == 7
+        assert [row.event_time for row in rows] == sorted((row.event_time for row in rows), reverse=True)
+        assert len([s for s in query_counter if "audit_logs" in s]) == 3
+
+    def test_export_errors_are_reported_before_streaming(self, client, test_user, auth_headers, monkeypatch):
+        from app.services import preferences_service
+        created = client.post("/subject-requests", json={"user_id": str(test_user.id), "request_type": "export"}, headers=auth_headers).json()
+
+        def missing(db, user_id):
+            raise ValueError("user_not_found")
+
+        monkeypatch.setattr(preferences_service, "get_latest_preferences", missing)
+        response = client.get(f"/subject-requests/export/{created['request_id']}", params={"token": created["verification_token"]}, headers=auth_headers)
+        assert response.status_code == 404 and response.json()["detail"] == "User not found"